@@ -0,0 +1,140 @@
+import re
+from itertools import zip_longest
+
+PARAGRAPH_SPLIT = re.compile(r'\n\s*\n')
+SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+')
+
+
+def _segments(text, max_size):
+    """Split text into paragraphs, breaking oversized paragraphs into sentences (or hard slices)"""
+    for paragraph in PARAGRAPH_SPLIT.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_size:
+            yield paragraph
+            continue
+
+        for sentence in SENTENCE_SPLIT.split(paragraph):
+            sentence = sentence.strip()
+            while len(sentence) > max_size:
+                yield sentence[:max_size]
+                sentence = sentence[max_size:]
+            if sentence:
+                yield sentence
+
+
+def split_into_chunks(text, chunk_size=3000, overlap=300):
+    """Split long text into chunks of at most chunk_size characters.
+
+    Chunks end on paragraph or sentence boundaries where possible, and each
+    chunk repeats up to ``overlap`` characters of trailing segments from the
+    previous one so concepts spanning a boundary are not lost.
+    """
+    chunks = []
+    current = []
+    current_len = 0
+
+    for segment in _segments(text, chunk_size):
+        # +1 for the joining newline
+        if current and current_len + len(segment) + 1 > chunk_size:
+            chunks.append('\n'.join(current))
+
+            # Carry trailing segments into the next chunk as overlap
+            carried = []
+            carried_len = 0
+            for previous in reversed(current):
+                if carried_len + len(previous) + 1 > overlap:
+                    break
+                carried.insert(0, previous)
+                carried_len += len(previous) + 1
+
+            current = carried
+            current_len = carried_len
+
+        current.append(segment)
+        current_len += len(segment) + 1
+
+    if current:
+        chunks.append('\n'.join(current))
+
+    return chunks
+
+
+def select_evenly(items, limit):
+    """Pick at most `limit` items spread evenly across the list"""
+    if limit <= 0:
+        return []
+    if len(items) <= limit:
+        return list(items)
+    step = len(items) / limit
+    return [items[int(i * step)] for i in range(limit)]
+
+
+def condense_sections(chunks, sections, limit, min_excerpt=500):
+    """Group chunks into ``sections`` contiguous runs, each condensed to at most ``limit`` characters.
+
+    A run that does not fit is represented by evenly spaced excerpts of its
+    chunks (each at least ``min_excerpt`` characters where possible), so a few
+    prompts still cover the whole document.
+    """
+    sections = max(1, min(sections, len(chunks)))
+    condensed = []
+    for i in range(sections):
+        run = chunks[i * len(chunks) // sections:(i + 1) * len(chunks) // sections]
+        text = '\n'.join(run)
+        if len(text) <= limit:
+            condensed.append(text)
+            continue
+
+        picked = select_evenly(run, max(1, limit // min_excerpt))
+        budget = limit // len(picked) - 1
+        excerpts = []
+        for chunk in picked:
+            excerpt = chunk[:budget]
+            # End on a word boundary when the cut falls mid-word
+            if len(chunk) > budget and ' ' in excerpt:
+                excerpt = excerpt[:excerpt.rfind(' ')]
+            excerpts.append(excerpt)
+        condensed.append('\n'.join(excerpts))
+    return condensed
+
+
+def type_quotas(num_questions, question_types):
+    """Spread num_questions over the requested types as evenly as possible, in order"""
+    share, extra = divmod(num_questions, len(question_types))
+    return {question_type: share + (i < extra) for i, question_type in enumerate(question_types)}
+
+
+def question_key(question):
+    """Normalized question text used to spot duplicates across chunks"""
+    return re.sub(r'\W+', ' ', str(question['question']).lower()).strip()
+
+
+def merge_by_type(results, num_questions, question_types):
+    """Merge per-chunk question lists into one quiz.
+
+    Chunks are visited round-robin so the quiz covers the whole document, and
+    each type is taken up to its quota so the mix follows ``question_types``
+    even though the model tends to list questions grouped by type. Duplicates
+    are dropped; if a type falls short, other requested types fill the gap.
+    """
+    quotas = type_quotas(num_questions, question_types)
+    merged = []
+    spare = []
+    seen = set()
+    for round_questions in zip_longest(*results):
+        for question in round_questions:
+            if question is None or question.get('type') not in quotas:
+                continue
+            key = question_key(question)
+            if key in seen:
+                continue
+            seen.add(key)
+            if quotas[question['type']] > 0:
+                quotas[question['type']] -= 1
+                merged.append(question)
+            else:
+                spare.append(question)
+
+    return (merged + spare)[:num_questions]
@@ -0,0 +1,92 @@
+import threading
+import time
+
+# Breaker states
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Stop calling an unhealthy upstream after repeated failures, probing again after a cooldown"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._rejected = 0
+
+    def allow_request(self):
+        """Return True if a call to the upstream may be attempted now"""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._probe_in_flight = False
+
+            if self._state == CLOSED:
+                return True
+
+            # Let a single probe through while half-open
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def stats(self):
+        """Return breaker state for monitoring"""
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                "rejected_calls": self._rejected
+            }
+
+
+class OutcomeTally:
+    """Collects the outcomes of several related calls so they count once against a breaker"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.successes = 0
+        self.failures = 0
+
+    def record_success(self):
+        with self._lock:
+            self.successes += 1
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+
+    def apply(self, breaker):
+        """Record one success if any call reached a healthy upstream, else one failure"""
+        if self.successes:
+            breaker.record_success()
+        elif self.failures:
+            breaker.record_failure()
@@ -0,0 +1,67 @@
+import hashlib
+import re
+from collections import Counter
+
+# Bump when tokenization changes so stale indexes are rebuilt
+CONCEPT_INDEX_VERSION = 2
+
+STOPWORDS = {'the', 'a', 'an', 'and', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+             'is', 'are', 'am', 'was', 'were', 'be', 'been', 'being', 'by', 'that',
+             'this', 'these', 'those', 'it', 'its', 'as', 'from', 'has', 'have',
+             'had', 'not', 'or', 'but', 'if', 'then', 'else', 'when', 'where', 'how'}
+
+NON_WORD = re.compile(r'[^\w\s]')
+
+
+def _is_term_word(word):
+    return word not in STOPWORDS and len(word) > 3
+
+
+def tokenize(text):
+    """Lowercase, strip punctuation and drop stopwords and short words"""
+    words = NON_WORD.sub('', text.lower()).split()
+    return [word for word in words if _is_term_word(word)]
+
+
+def extract_terms(text, max_ngram=2):
+    """Count unigrams and n-gram phrases made of adjacent non-stopword words"""
+    words = NON_WORD.sub('', text.lower()).split()
+    keep = [_is_term_word(word) for word in words]
+    counts = Counter()
+
+    for n in range(1, max_ngram + 1):
+        for i in range(len(words) - n + 1):
+            if all(keep[i:i + n]):
+                counts[' '.join(words[i:i + n])] += 1
+
+    return counts
+
+
+def content_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def build_concept_index(text, top_n=100, terms=None):
+    """Build the compact term-frequency index stored alongside a study material.
+
+    ``terms`` may be passed when the caller has already run extract_terms.
+    """
+    if terms is None:
+        terms = extract_terms(text)
+    return {
+        "version": CONCEPT_INDEX_VERSION,
+        "content_hash": content_hash(text),
+        "token_count": sum(count for term, count in terms.items() if ' ' not in term),
+        "terms": [[term, count] for term, count in terms.most_common(top_n)]
+    }
+
+
+def is_current(index, text):
+    """True if a stored index was built from this exact text with the current tokenizer"""
+    return bool(index) and index.get('version') == CONCEPT_INDEX_VERSION and \
+        index.get('content_hash') == content_hash(text)
+
+
+def concepts_from_index(index, num_concepts=10):
+    """Top concepts from a stored index, most frequent first"""
+    return [term for term, _ in index['terms'][:num_concepts]]
@@ -0,0 +1,123 @@
+import copy
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+class QuestionCache:
+    """Two-tier cache of generated questions: an in-process LRU backed by a MongoDB collection"""
+
+    def __init__(self, collection=None, memory_size=256, ttl_seconds=7 * 24 * 3600,
+                 max_entries=10000):
+        self.collection = collection
+        self.memory_size = memory_size
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "persistent_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0
+        }
+
+    @staticmethod
+    def make_key(content, model, num_questions, question_types):
+        """Build a content-addressed key from the exact content sent and the generation parameters"""
+        payload = json.dumps({
+            "content": hashlib.sha256(content.encode('utf-8')).hexdigest(),
+            "model": model,
+            "num_questions": num_questions,
+            "question_types": list(question_types)
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, key):
+        """Return cached questions for a key, or None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return copy.deepcopy(entry[1])
+            if entry:
+                del self._memory[key]
+
+        if self.collection is not None:
+            try:
+                doc = self.collection.find_one({
+                    "_id": key,
+                    "created_at": {"$gte": datetime.now() - timedelta(seconds=self.ttl_seconds)}
+                })
+            except Exception:
+                logger.exception("Question cache lookup failed")
+                doc = None
+
+            if doc:
+                self._count("persistent_hits")
+                self._remember(key, doc['questions'])
+                return copy.deepcopy(doc['questions'])
+
+        self._count("misses")
+        return None
+
+    def set(self, key, questions):
+        """Store questions in both tiers"""
+        self._remember(key, copy.deepcopy(questions))
+        self._count("stores")
+
+        if self.collection is None:
+            return
+
+        try:
+            self.collection.replace_one(
+                {"_id": key},
+                {"_id": key, "questions": questions, "created_at": datetime.now()},
+                upsert=True
+            )
+            self._evict_overflow()
+        except Exception:
+            logger.exception("Question cache store failed")
+
+    def _remember(self, key, questions):
+        """Insert into the in-process LRU tier"""
+        with self._lock:
+            self._memory[key] = (time.monotonic(), questions)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_size:
+                self._memory.popitem(last=False)
+
+    def _evict_overflow(self):
+        """Drop the oldest persistent entries once the collection grows past max_entries"""
+        overflow = self.collection.estimated_document_count() - self.max_entries
+        if overflow <= 0:
+            return
+
+        oldest = self.collection.find({}, {"_id": 1}).sort("created_at", 1).limit(overflow)
+        ids = [doc['_id'] for doc in oldest]
+        if ids:
+            result = self.collection.delete_many({"_id": {"$in": ids}})
+            with self._lock:
+                self._counters["evictions"] += result.deleted_count
+
+    def stats(self):
+        """Return hit/miss counters for monitoring"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["persistent_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0
+        return stats
@@ -1,60 +1,251 @@
 import os
 import json
-import re
+import logging
 import random
+from collections import Counter
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
 from config import Config
 from datetime import datetime
+from ai.circuit_breaker import CircuitBreaker, OutcomeTally
+from ai.stream_parser import IncrementalQuestionParser
+from ai.chunking import split_into_chunks, condense_sections, merge_by_type
+from ai.concept_index import tokenize, is_current, concepts_from_index
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Number of content characters sent to Gemini in a single prompt
+GEMINI_CONTENT_LIMIT = 3000
+
+# Upstream statuses worth retrying
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# usageMetadata field -> token kind label
+USAGE_FIELDS = {'promptTokenCount': 'prompt', 'candidatesTokenCount': 'candidates',
+                'totalTokenCount': 'total'}
+
+GEMINI_REQUEST_DURATION = registry.histogram(
+    'gemini_request_duration_seconds',
+    'Gemini HTTP call time per attempt (time to response headers when streaming).',
+    ('mode', 'outcome'), buckets=(0.1, 0.25, 0.5, 1, 2, 4, 8, 15, 30, 60))
+GEMINI_TOKENS = registry.counter(
+    'gemini_tokens_total', 'Tokens reported in Gemini usageMetadata.', ('kind',))
+FALLBACK_GENERATIONS = registry.counter(
+    'question_fallback_generations_total', 'Generations that used rule-based fallback questions.')
+FALLBACK_QUESTIONS = registry.counter(
+    'question_fallback_questions_total', 'Questions produced by the rule-based fallback.')
 
 class QuestionGenerator:
-    def __init__(self):
+    def __init__(self, cache=None):
         if not Config.GEMINI_API_KEY:
-            print("Warning: GEMINI_API_KEY not configured. Only fallback questions will be available.")
-        self.api_url = f"https://generativelanguage.googleapis.com/v1beta/models/{Config.GEMINI_MODEL}:generateContent?key={Config.GEMINI_API_KEY}"
+            logger.warning("GEMINI_API_KEY not configured. Only fallback questions will be available.")
+        model_url = f"{Config.GEMINI_API_BASE}/v1beta/models/{Config.GEMINI_MODEL}"
+        self.api_url = f"{model_url}:generateContent?key={Config.GEMINI_API_KEY}"
+        self.stream_url = f"{model_url}:streamGenerateContent?alt=sse&key={Config.GEMINI_API_KEY}"
         self.headers = {'Content-Type': 'application/json'}
-        print(f"QuestionGenerator initialized with model: {Config.GEMINI_MODEL}")
+        self.cache = cache
+        self.timeout = (Config.GEMINI_CONNECT_TIMEOUT, Config.GEMINI_READ_TIMEOUT)
+        self.breaker = CircuitBreaker(
+            failure_threshold=Config.GEMINI_BREAKER_THRESHOLD,
+            reset_timeout=Config.GEMINI_BREAKER_RESET_SECONDS
+        )
+        
+        # Keep-alive connections shared by all generation workers
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=Config.GEMINI_POOL_SIZE, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Caps concurrent per-chunk Gemini calls across every generation in this process
+        self.chunk_executor = ThreadPoolExecutor(max_workers=Config.GEMINI_CHUNK_CONCURRENCY,
+                                                 thread_name_prefix='gemini-chunk')
+        logger.info("QuestionGenerator initialized",
+                    extra={"model": Config.GEMINI_MODEL, "api_base": Config.GEMINI_API_BASE})
 
     def extract_key_concepts(self, text, num_concepts=10):
         """Extract key concepts from text using simple frequency analysis"""
-        text = text.lower()
-        text = re.sub(r'[^\w\s]', '', text)
-        words = text.split()
-        
-        stopwords = {'the', 'a', 'an', 'and', 'in', 'on', 'at', 'to', 'for', 'of', 'with', 
-                    'is', 'are', 'am', 'was', 'were', 'be', 'been', 'being', 'by', 'that', 
-                    'this', 'these', 'those', 'it', 'its', 'as', 'from', 'has', 'have', 
-                    'had', 'not', 'or', 'but', 'if', 'then', 'else', 'when', 'where', 'how'}
+        word_counts = Counter(tokenize(text))
+        return [word for word, _ in word_counts.most_common(num_concepts)]
+
+    def _key_concepts(self, content, concept_index=None, rank_concepts=None):
+        """Key concepts from the material's precomputed index, rescanning only if it is stale.
         
-        filtered_words = [word for word in words if word not in stopwords and len(word) > 3]
-        word_counts = {}
+        ``rank_concepts(concept_index)`` can rerank the indexed terms (e.g. by
+        TF-IDF against the user's corpus); plain frequency order is the fallback.
+        """
+        if not is_current(concept_index, content):
+            return self.extract_key_concepts(content)
         
-        for word in filtered_words:
-            word_counts[word] = word_counts.get(word, 0) + 1
+        if rank_concepts:
+            try:
+                concepts = rank_concepts(concept_index)
+                if concepts:
+                    return concepts
+            except Exception:
+                logger.exception("Concept ranking failed")
         
-        sorted_words = sorted(word_counts.items(), key=lambda x: x[1], reverse=True)
-        return [word for word, _ in sorted_words[:num_concepts]]
+        return concepts_from_index(concept_index)
 
-    def generate_questions(self, content, num_questions=5, question_types=None):
+    def generate_questions(self, content, num_questions=5, question_types=None, use_cache=True,
+                           concept_index=None, rank_concepts=None):
         """Generate quiz questions using Gemini API with fallback mechanism"""
         if question_types is None:
             question_types = ["multiple_choice", "true_false", "short_answer"]
         
+        questions = []
+        
         # Try Gemini API first if key is available
         if Config.GEMINI_API_KEY:
-            try:
-                questions = self._generate_with_gemini(content, num_questions, question_types)
-                if questions and len(questions) >= num_questions:
-                    return questions[:num_questions]
-            except Exception as e:
-                print(f"Gemini API failed: {str(e)}")
-        
-        # Fallback to rule-based generation
-        print("Using fallback question generation")
-        key_concepts = self.extract_key_concepts(content)
-        return self._generate_fallback_questions(key_concepts, num_questions, question_types)
-
-    def _generate_with_gemini(self, content, num_questions, question_types):
-        """Generate questions using Gemini API"""
+            if Config.GEMINI_CHUNKED_GENERATION and len(content) > GEMINI_CONTENT_LIMIT:
+                questions = self._generate_chunked(content, num_questions, question_types, use_cache)
+            else:
+                questions = self._generate_single(content, num_questions, question_types, use_cache)
+            
+            if len(questions) >= num_questions:
+                return questions[:num_questions]
+        
+        # Fallback to rule-based generation for whatever is missing
+        logger.info("Using fallback question generation")
+        self._record_fallback(num_questions - len(questions))
+        key_concepts = self._key_concepts(content, concept_index, rank_concepts)
+        return questions + self._generate_fallback_questions(
+            key_concepts, num_questions - len(questions), question_types)
+
+    def _generate_single(self, content, num_questions, question_types, use_cache=True, breaker=None):
+        """Generate questions from one prompt's worth of content, or return [] on failure.
+        
+        Call outcomes are recorded on ``breaker`` (default: the generator's own breaker).
+        """
+        cache_key = None
+        if self.cache and use_cache:
+            cache_key = self.cache.make_key(content[:GEMINI_CONTENT_LIMIT], Config.GEMINI_MODEL,
+                                            num_questions, question_types)
+            questions = self.cache.get(cache_key)
+            if questions:
+                return questions
+        
+        # Skip straight to the fallback while Gemini is unhealthy
+        if not self.breaker.allow_request():
+            logger.warning("Gemini circuit breaker open, skipping API call")
+            return []
+        
+        try:
+            questions = self._generate_with_gemini(content, num_questions, question_types, breaker)
+            if questions and len(questions) >= num_questions:
+                questions = questions[:num_questions]
+                if cache_key:
+                    self.cache.set(cache_key, questions)
+                return questions
+        except Exception as e:
+            logger.warning("Gemini API failed", extra={"error": str(e)})
+        
+        return []
+
+    def _generate_chunked(self, content, num_questions, question_types, use_cache=True):
+        """Map-reduce generation for long content.
+        
+        The content is split into overlapping chunks and grouped into as few
+        prompts as the quiz needs (one per GEMINI_MIN_QUESTIONS_PER_CHUNK
+        questions, at most GEMINI_MAX_CHUNKS); each prompt condenses its part of
+        the document so together they cover all of it. Prompts run concurrently
+        on the shared chunk pool and the results are merged by type quota.
+        """
+        chunks = split_into_chunks(content, GEMINI_CONTENT_LIMIT, Config.GEMINI_CHUNK_OVERLAP)
+        calls = min(Config.GEMINI_MAX_CHUNKS,
+                    max(1, num_questions // max(Config.GEMINI_MIN_QUESTIONS_PER_CHUNK, 1)))
+        sections = condense_sections(chunks, calls, GEMINI_CONTENT_LIMIT)
+        # Ask each prompt for a small surplus to absorb duplicates
+        per_call = -(-num_questions // len(sections)) + 1
+        
+        # One generation is one breaker outcome, however many prompts fail
+        tally = OutcomeTally()
+        futures = [self.chunk_executor.submit(self._generate_single, section, per_call,
+                                              question_types, use_cache, tally)
+                   for section in sections]
+        results = [future.result() for future in futures]
+        tally.apply(self.breaker)
+        
+        return merge_by_type(results, num_questions, question_types)
+
+    def stream_questions(self, content, num_questions=5, question_types=None, use_cache=True,
+                         concept_index=None, rank_concepts=None):
+        """Yield quiz questions one at a time as Gemini produces them.
+        
+        Questions are validated as soon as each JSON object is complete. If the
+        stream fails or ends early, the remaining questions come from the fallback
+        generator so callers always receive num_questions questions.
+        """
+        if question_types is None:
+            question_types = ["multiple_choice", "true_false", "short_answer"]
+        
+        produced = []
+        
+        if Config.GEMINI_API_KEY:
+            cache_key = None
+            if self.cache and use_cache:
+                cache_key = self.cache.make_key(content[:GEMINI_CONTENT_LIMIT], Config.GEMINI_MODEL,
+                                                num_questions, question_types)
+                cached = self.cache.get(cache_key)
+                if cached:
+                    yield from cached
+                    return
+            
+            if self.breaker.allow_request():
+                try:
+                    for question in self._stream_with_gemini(content, num_questions, question_types):
+                        produced.append(question)
+                        yield question
+                        if len(produced) >= num_questions:
+                            break
+                    
+                    if cache_key and len(produced) >= num_questions:
+                        self.cache.set(cache_key, produced)
+                except Exception as e:
+                    logger.warning("Gemini streaming failed", extra={"error": str(e), "produced": len(produced)})
+            else:
+                logger.warning("Gemini circuit breaker open, skipping API call")
+        
+        # Fill whatever Gemini didn't deliver with rule-based questions
+        remaining = num_questions - len(produced)
+        if remaining > 0:
+            logger.info("Using fallback question generation")
+            self._record_fallback(remaining)
+            key_concepts = self._key_concepts(content, concept_index, rank_concepts)
+            yield from self._generate_fallback_questions(key_concepts, remaining, question_types)
+
+    def _stream_with_gemini(self, content, num_questions, question_types):
+        """Yield validated questions from Gemini's server-sent-events streaming API"""
+        data = self._build_request(content, num_questions, question_types)
+        response = self._post_with_retries(data, url=self.stream_url, stream=True)
+        parser = IncrementalQuestionParser()
+        usage = None
+        
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                
+                chunk = json.loads(line[len('data:'):].strip())
+                # Each chunk carries the running totals; keep the latest
+                usage = chunk.get('usageMetadata', usage)
+                for candidate in chunk.get('candidates', []):
+                    for part in candidate.get('content', {}).get('parts', []):
+                        for question in parser.feed(part.get('text', '')):
+                            self._validate_question(question)
+                            yield question
+                
+                if parser.done:
+                    break
+        finally:
+            response.close()
+            self._record_usage(usage)
+
+    def _build_request(self, content, num_questions, question_types):
+        """Build the Gemini request body for a question generation prompt"""
         prompt = f"""
         Generate exactly {num_questions} quiz questions based on the following content.
         Include these question types: {', '.join(question_types)}.
@@ -83,7 +274,7 @@ class QuestionGenerator:
         ]
         
         CONTENT TO BASE QUESTIONS ON:
-        {content[:3000]}
+        {content[:GEMINI_CONTENT_LIMIT]}
         """
         
         data = {
@@ -97,10 +288,15 @@ class QuestionGenerator:
                 "maxOutputTokens": 2048
             }
         }
+        
+        return data
 
-        response = requests.post(self.api_url, headers=self.headers, json=data)
-        response.raise_for_status()
+    def _generate_with_gemini(self, content, num_questions, question_types, breaker=None):
+        """Generate questions using Gemini API"""
+        data = self._build_request(content, num_questions, question_types)
+        response = self._post_with_retries(data, breaker=breaker)
         result = response.json()
+        self._record_usage(result.get('usageMetadata'))
         
         if 'candidates' not in result:
             raise ValueError("Invalid response format from Gemini API")
@@ -116,16 +312,85 @@ class QuestionGenerator:
             
             # Validate question format
             for q in questions:
-                if not all(k in q for k in ['type', 'question', 'correct_answer', 'explanation']):
-                    raise ValueError("Invalid question format in API response")
-                if q['type'] == 'multiple_choice' and 'options' not in q:
-                    raise ValueError("Missing options in multiple choice question")
+                self._validate_question(q)
             
             return questions
         except (json.JSONDecodeError, ValueError) as e:
-            print(f"Failed to parse Gemini response: {str(e)}")
+            logger.warning("Failed to parse Gemini response", extra={"error": str(e)})
             raise
 
+    def _validate_question(self, q):
+        """Raise ValueError if a generated question is missing required fields"""
+        if not isinstance(q, dict) or not all(k in q for k in ['type', 'question', 'correct_answer', 'explanation']):
+            raise ValueError("Invalid question format in API response")
+        if q['type'] == 'multiple_choice' and 'options' not in q:
+            raise ValueError("Missing options in multiple choice question")
+
+    def _post_with_retries(self, data, url=None, stream=False, breaker=None):
+        """POST to Gemini with timeouts and jittered exponential backoff on 429/5xx"""
+        attempts = Config.GEMINI_MAX_RETRIES + 1
+        mode = 'stream' if stream else 'generate'
+        breaker = breaker or self.breaker
+        
+        for attempt in range(attempts):
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                response = self.session.post(url or self.api_url, json=data, timeout=self.timeout,
+                                             stream=stream)
+                self._record_call(mode, response.status_code, started)
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    if response.status_code >= 400:
+                        # A streamed body is never read, so free its connection now
+                        response.close()
+                    response.raise_for_status()
+                    breaker.record_success()
+                    return response
+                error = requests.HTTPError(f"{response.status_code} from Gemini API", response=response)
+                retry_after = response.headers.get('Retry-After')
+                # Return the connection to the pool instead of leaking it across retries
+                response.close()
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record_call(mode, 'timeout' if isinstance(e, requests.Timeout) else 'connection_error',
+                                  started)
+                error = e
+            except requests.HTTPError:
+                # Other 4xx responses are request errors, not upstream health problems
+                breaker.record_success()
+                raise
+            
+            if attempt == attempts - 1:
+                break
+            
+            delay = min(Config.GEMINI_BACKOFF_MAX, Config.GEMINI_BACKOFF_BASE * (2 ** attempt))
+            delay = random.uniform(delay / 2, delay)
+            if retry_after and retry_after.isdigit():
+                delay = min(Config.GEMINI_BACKOFF_MAX, max(delay, int(retry_after)))
+            logger.info("Gemini request failed, retrying", extra={"error": str(error), "delay_seconds": round(delay, 2)})
+            time.sleep(delay)
+        
+        breaker.record_failure()
+        raise error
+
+    @staticmethod
+    def _record_call(mode, outcome, started):
+        GEMINI_REQUEST_DURATION.observe(time.perf_counter() - started, mode=mode, outcome=outcome)
+
+    @staticmethod
+    def _record_usage(usage):
+        """Count the tokens Gemini reports for one response"""
+        if not isinstance(usage, dict):
+            return
+        for field, kind in USAGE_FIELDS.items():
+            if usage.get(field):
+                GEMINI_TOKENS.inc(usage[field], kind=kind)
+
+    @staticmethod
+    def _record_fallback(num_questions):
+        if num_questions > 0:
+            FALLBACK_GENERATIONS.inc()
+            FALLBACK_QUESTIONS.inc(num_questions)
+
     def _generate_fallback_questions(self, key_concepts, num_questions, question_types):
         """Generate fallback questions when API fails"""
         questions = []
@@ -0,0 +1,66 @@
+import json
+
+
+class IncrementalQuestionParser:
+    """Incrementally extract complete objects from a JSON array that arrives in chunks.
+
+    Text before the opening ``[`` (such as a Markdown code fence) is ignored.
+    Each call to ``feed`` returns the objects completed by that chunk.
+    """
+
+    def __init__(self):
+        self._in_array = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._buffer = []
+
+    def feed(self, text):
+        objects = []
+
+        for char in text:
+            if self._done:
+                break
+
+            if not self._in_array:
+                if char == '[':
+                    self._in_array = True
+                continue
+
+            if self._depth == 0:
+                # Between array elements
+                if char == '{':
+                    self._depth = 1
+                    self._buffer = [char]
+                elif char == ']':
+                    self._done = True
+                continue
+
+            self._buffer.append(char)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    objects.append(json.loads(''.join(self._buffer)))
+                    self._buffer = []
+
+        return objects
+
+    @property
+    def done(self):
+        """True once the closing bracket of the array has been seen"""
+        return self._done
@@ -0,0 +1,42 @@
+import numpy as np
+
+
+def idf(doc_freqs, n_docs):
+    """Smoothed inverse document frequency"""
+    return np.log((1.0 + n_docs) / (1.0 + doc_freqs)) + 1.0
+
+
+def rank_terms(batch, doc_freqs, n_docs, top_k=10):
+    """Score the candidate terms of many documents at once.
+
+    ``batch`` is a list of ``[(term, count), ...]`` lists (one per document),
+    ``doc_freqs`` maps term -> number of corpus documents containing it.
+    Returns the top_k terms of each document by sublinear TF-IDF.
+    """
+    # CSR layout: row r's entries are terms[indptr[r]:indptr[r + 1]], so memory grows
+    # with the number of (document, term) pairs rather than documents x vocabulary
+    terms, counts, indptr = [], [], [0]
+    for doc_terms in batch:
+        for term, count in doc_terms:
+            terms.append(term)
+            counts.append(count)
+        indptr.append(len(terms))
+
+    if not terms:
+        return [[] for _ in batch]
+
+    df = np.fromiter((doc_freqs.get(term, 0) for term in terms), dtype=np.float64, count=len(terms))
+    scores = (1.0 + np.log(np.asarray(counts, dtype=np.float64))) * idf(df, max(n_docs, 1))
+
+    ranked = []
+    for start, end in zip(indptr, indptr[1:]):
+        k = min(top_k, end - start)
+        if k == 0:
+            ranked.append([])
+            continue
+        row = scores[start:end]
+        top = np.argpartition(-row, k - 1)[:k]
+        top = top[np.argsort(-row[top], kind='stable')]
+        ranked.append([terms[start + i] for i in top])
+
+    return ranked
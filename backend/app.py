@@ -1,8 +1,8 @@
 import os
-from flask import Flask, jsonify
+import logging
+from flask import Flask, Response, jsonify
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
-from pymongo import MongoClient
 from datetime import datetime
 
 # Import config
@@ -12,6 +12,19 @@ from config import Config
 app = Flask(__name__)
 app.config.from_object(Config)
 
+# Structured JSON logging written off the request thread
+from utils.structured_logging import configure_logging
+log_handler = configure_logging(app,
+                                level=Config.LOG_LEVEL,
+                                queue_size=Config.LOG_QUEUE_SIZE,
+                                sample_rate=Config.LOG_REQUEST_SAMPLE_RATE,
+                                slow_request_ms=Config.LOG_SLOW_REQUEST_MS)
+logger = logging.getLogger(__name__)
+
+# Prometheus metrics (request latency per route, Mongo commands per request)
+from utils.metrics import configure_metrics, registry as metrics_registry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+configure_metrics(app)
+
 # IMPORTANT: Add this line to disable URL normalization
 app.url_map.strict_slashes = False
 
@@ -22,22 +35,52 @@ CORS(app,
      methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
      allow_headers=["Content-Type", "Authorization"])
 
-# Setup JWT
+# Setup JWT; the current user is built from the token claims, without a users lookup
+from services.user_context import lookup_user
 jwt = JWTManager(app)
+jwt.user_lookup_loader(lookup_user)
+
+# MongoDB connection (created lazily per process)
+from database import pool_stats
+from indexes import ensure_indexes, index_cli
+
+from services.user_stats import stats_cli
+from services.corpus import corpus_cli
+from services.attempts import attempts_cli
+from services import grading
+from services.response_cache import response_cache
+from services.passwords import password_hasher
 
-# MongoDB connection
-client = MongoClient(app.config['MONGO_URI'])
-db = client.quiz_planner
+app.cli.add_command(index_cli)
+app.cli.add_command(stats_cli)
+app.cli.add_command(corpus_cli)
+app.cli.add_command(attempts_cli)
+
+# Build any missing indexes at startup (existing ones are left untouched)
+if Config.MONGO_ENSURE_INDEXES:
+    try:
+        for problem in ensure_indexes():
+            logger.warning("Index problem", extra={"problem": problem})
+    except Exception:
+        logger.exception("Could not ensure MongoDB indexes")
 
 # Import controllers
 from controllers.auth_controller import auth_bp
 from controllers.material_controller import material_bp
-from controllers.quiz_controller import quiz_bp
+from controllers.quiz_controller import quiz_bp, generation_queue, question_generator
+from controllers.search_controller import search_bp
+
+# Fail jobs left queued or running by workers that died, freeing their users' slots
+try:
+    generation_queue.fail_stale_jobs()
+except Exception:
+    logger.exception("Could not sweep stale generation jobs")
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
 app.register_blueprint(material_bp, url_prefix='/api/materials')
 app.register_blueprint(quiz_bp, url_prefix='/api/quizzes')
+app.register_blueprint(search_bp, url_prefix='/api/search')
 
 # Add explicit OPTIONS handler for materials endpoint
 @app.route('/api/materials', methods=['OPTIONS'])
@@ -52,6 +95,23 @@ def handle_materials_options():
 def health_check():
     return jsonify({"status": "healthy", "environment": os.environ.get('ENVIRONMENT', 'development')})
 
+@app.route('/metrics')
+def metrics():
+    return Response(metrics_registry.render(), content_type=METRICS_CONTENT_TYPE)
+
+@app.route('/api/health/stats')
+def health_stats():
+    return jsonify({
+        "generation_queue": generation_queue.stats(),
+        "question_cache": question_generator.cache.stats() if question_generator and question_generator.cache else None,
+        "gemini_circuit_breaker": question_generator.breaker.stats() if question_generator else None,
+        "grading_plan_cache": grading.plan_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "logging": {"dropped_records": log_handler.dropped},
+        "mongo_pool": pool_stats()
+    })
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     host = '0.0.0.0'  # Bind to all interfaces
@@ -0,0 +1,71 @@
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+WORDS = (
+    "photosynthesis chlorophyll sunlight energy glucose oxygen carbon dioxide membrane "
+    "mitochondria respiration enzyme protein nucleus ribosome transcription translation "
+    "genome mutation evolution selection population ecosystem nitrogen cycle water "
+    "climate atmosphere molecule reaction catalyst equilibrium gradient diffusion osmosis"
+).split()
+
+
+def sample_text(rng, num_words):
+    """Deterministic pseudo-prose built from a fixed vocabulary"""
+    sentences = []
+    while num_words > 0:
+        length = min(num_words, rng.randint(8, 16))
+        sentences.append(' '.join(rng.choice(WORDS) for _ in range(length)).capitalize() + '.')
+        num_words -= length
+    return ' '.join(sentences)
+
+
+def summarize(samples, elapsed=None):
+    """Latency percentiles in milliseconds (nearest rank) and optional throughput"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 4)
+
+    summary = {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 4),
+        "p50_ms": pick(0.5),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(ordered[-1] * 1000, 4)
+    }
+    if elapsed:
+        summary["per_second"] = round(len(ordered) / elapsed, 2)
+    return summary
+
+
+def environment():
+    """What a run was measured on, so reports can be compared"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine()
+    }
+
+
+def write_report(report, output=None):
+    """Write a JSON report to a file, or stdout when no path is given"""
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if output:
+        with open(output, 'w') as f:
+            f.write(text + '\n')
+        print(f"Report written to {output}", file=sys.stderr)
+    else:
+        print(text)
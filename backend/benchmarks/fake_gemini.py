@@ -0,0 +1,336 @@
+"""Local stand-in for the Gemini generateContent and streamGenerateContent APIs.
+
+Latency, errors, 429 bursts, malformed output and cut-off streams are all
+configurable, so timeouts, retries and queueing can be exercised offline.
+Point the backend at it with GEMINI_API_BASE:
+
+    python -m benchmarks.fake_gemini --port 8089 --latency-ms 400 --error-rate 0.05
+    GEMINI_API_BASE=http://127.0.0.1:8089 GEMINI_API_KEY=fake python app.py
+
+GET /_fake/stats reports what the server has served so far.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+QUESTION_COUNT_PATTERN = re.compile(r'Generate exactly (\d+) quiz questions')
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'lognormal')
+
+
+def fake_questions(num_questions, tag=''):
+    """A valid question array in the shape QuestionGenerator asks for.
+
+    ``tag`` goes into every question text so different prompts get distinct
+    questions and the generator's de-duplication keeps them all.
+    """
+    questions = []
+    for i in range(num_questions):
+        kind = i % 3
+        if kind == 0:
+            questions.append({
+                "type": "multiple_choice",
+                "question": f"Benchmark question {i + 1} {tag}?",
+                "options": ["Alpha", "Beta", "Gamma", "Delta"],
+                "correct_answer": "Alpha",
+                "explanation": "Alpha is the reference answer."
+            })
+        elif kind == 1:
+            questions.append({
+                "type": "true_false",
+                "question": f"Benchmark statement {i + 1} {tag}.",
+                "correct_answer": True,
+                "explanation": "The statement is true."
+            })
+        else:
+            questions.append({
+                "type": "short_answer",
+                "question": f"Describe benchmark concept {i + 1} {tag}.",
+                "correct_answer": "reference answer",
+                "explanation": "Any answer mentioning the reference is accepted."
+            })
+    return questions
+
+
+def _prompt(body):
+    try:
+        return str(body['contents'][0]['parts'][0]['text'])
+    except (KeyError, IndexError, TypeError):
+        return ''
+
+
+def _requested_count(prompt):
+    match = QUESTION_COUNT_PATTERN.search(prompt)
+    return int(match.group(1)) if match else 5
+
+
+def _prompt_tag(prompt):
+    """Short digest of the prompt: the same content gets the same questions, like a real model"""
+    return hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:8]
+
+
+def _usage(prompt_bytes, text):
+    # Roughly four characters per token, like the real tokenizer on English text
+    prompt_tokens, candidate_tokens = prompt_bytes // 4, len(text) // 4
+    return {"promptTokenCount": prompt_tokens, "candidatesTokenCount": candidate_tokens,
+            "totalTokenCount": prompt_tokens + candidate_tokens}
+
+
+class FaultProfile:
+    """How the fake behaves; every probability is per request.
+
+    Outcomes are checked in order: 429 burst, server error, hang, malformed
+    JSON, cut-off stream, then success. A burst returns 429 for
+    ``rate_limit_burst`` consecutive requests out of every ``rate_limit_every``.
+    """
+
+    def __init__(self, latency_ms=200, latency_distribution='fixed', latency_spread=0.5,
+                 error_rate=0.0, error_status=503, rate_limit_every=0, rate_limit_burst=0,
+                 retry_after=1, hang_rate=0.0, hang_seconds=60, malformed_rate=0.0,
+                 truncate_rate=0.0, stream_chunks=4, seed=None):
+        if latency_distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"latency_distribution must be one of {', '.join(LATENCY_DISTRIBUTIONS)}")
+        self.latency_ms = latency_ms
+        self.latency_distribution = latency_distribution
+        self.latency_spread = latency_spread
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit_every = rate_limit_every
+        self.rate_limit_burst = rate_limit_burst
+        self.retry_after = retry_after
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.malformed_rate = malformed_rate
+        self.truncate_rate = truncate_rate
+        self.stream_chunks = max(1, stream_chunks)
+        self.seed = seed
+
+    def latency(self, rng):
+        """Seconds before responding (for streams, before the first chunk)"""
+        base = self.latency_ms / 1000
+        if self.latency_distribution == 'uniform':
+            return max(0.0, rng.uniform(base * (1 - self.latency_spread), base * (1 + self.latency_spread)))
+        if self.latency_distribution == 'lognormal':
+            # latency_ms is the median; spread is the sigma of the underlying normal
+            return rng.lognormvariate(0, self.latency_spread) * base
+        return base
+
+    def outcome(self, sequence, rng):
+        if self.rate_limit_every and sequence % self.rate_limit_every < self.rate_limit_burst:
+            return 'rate_limited'
+        roll = rng.random()
+        for name, rate in (('error', self.error_rate), ('hang', self.hang_rate),
+                           ('malformed', self.malformed_rate), ('truncated', self.truncate_rate)):
+            if roll < rate:
+                return name
+            roll -= rate
+        return 'ok'
+
+    def to_dict(self):
+        return dict(vars(self))
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.startswith('/_fake/stats'):
+            self._send_json(200, self.server.stats())
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            body = {}
+
+        if ':streamGenerateContent' in self.path:
+            mode = 'stream'
+        elif ':generateContent' in self.path:
+            mode = 'generate'
+        else:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found"}})
+            return
+
+        outcome, delay = self.server.plan_response()
+        self.server.record(mode, outcome)
+
+        if outcome == 'rate_limited':
+            self._send_json(429, {"error": {"code": 429, "message": "Resource has been exhausted",
+                                            "status": "RESOURCE_EXHAUSTED"}},
+                            {"Retry-After": str(self.server.profile.retry_after)})
+            return
+
+        time.sleep(self.server.profile.hang_seconds if outcome == 'hang' else delay)
+
+        if outcome == 'error':
+            status = self.server.profile.error_status
+            self._send_json(status, {"error": {"code": status, "message": "The service is currently unavailable",
+                                               "status": "UNAVAILABLE"}})
+            return
+
+        prompt = _prompt(body)
+        text = json.dumps(fake_questions(_requested_count(prompt), _prompt_tag(prompt)))
+        if outcome == 'malformed':
+            # Cut the array off mid-object, as a model hitting its token limit does
+            text = text[:len(text) // 2]
+
+        if mode == 'stream':
+            self._stream(text, length, outcome)
+        else:
+            self._send_json(200, {
+                "candidates": [{"content": {"parts": [{"text": text}], "role": "model"},
+                                "finishReason": "STOP"}],
+                "usageMetadata": _usage(length, text)
+            })
+
+    def _stream(self, text, prompt_bytes, outcome):
+        """Server-sent events with the text split over several chunks"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        count = self.server.profile.stream_chunks
+        size = -(-len(text) // count)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        if outcome == 'truncated':
+            pieces = pieces[:max(1, len(pieces) // 2)]
+
+        sent = ''
+        try:
+            for i, piece in enumerate(pieces):
+                if i:
+                    time.sleep(self.server.chunk_delay())
+                sent += piece
+                chunk = {"candidates": [{"content": {"parts": [{"text": piece}], "role": "model"}}],
+                         "usageMetadata": _usage(prompt_bytes, sent)}
+                self.wfile.write(f"data: {json.dumps(chunk)}\r\n\r\n".encode())
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeGeminiServer(ThreadingHTTPServer):
+    """Threaded HTTP server answering Gemini calls according to a FaultProfile"""
+
+    daemon_threads = True
+
+    def __init__(self, host='127.0.0.1', port=0, profile=None):
+        super().__init__((host, port), FakeGeminiHandler)
+        self.profile = profile or FaultProfile()
+        self._rng = random.Random(self.profile.seed)
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._counts = {}
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def plan_response(self):
+        """Pick (outcome, latency) for the next request from the shared seeded generator"""
+        with self._lock:
+            sequence = self._sequence
+            self._sequence += 1
+            return self.profile.outcome(sequence, self._rng), self.profile.latency(self._rng)
+
+    def chunk_delay(self):
+        with self._lock:
+            return self.profile.latency(self._rng) / self.profile.stream_chunks
+
+    def record(self, mode, outcome):
+        with self._lock:
+            key = f"{mode}.{outcome}"
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name='fake-gemini', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self._sequence, "responses": dict(self._counts)}
+
+
+def add_arguments(parser, prefix=''):
+    """Fault-profile options, shared with the load harness (which prefixes them)"""
+    parser.add_argument(f'--{prefix}latency-ms', type=float, default=200,
+                        help="Response latency (the median for lognormal)")
+    parser.add_argument(f'--{prefix}latency-distribution', choices=LATENCY_DISTRIBUTIONS, default='fixed')
+    parser.add_argument(f'--{prefix}latency-spread', type=float, default=0.5,
+                        help="Uniform: +/- fraction of the latency; lognormal: sigma")
+    parser.add_argument(f'--{prefix}error-rate', type=float, default=0.0)
+    parser.add_argument(f'--{prefix}error-status', type=int, default=503)
+    parser.add_argument(f'--{prefix}rate-limit-every', type=int, default=0,
+                        help="Start a burst of 429s every N requests (0 disables)")
+    parser.add_argument(f'--{prefix}rate-limit-burst', type=int, default=0,
+                        help="Consecutive 429 responses per burst")
+    parser.add_argument(f'--{prefix}retry-after', type=int, default=1)
+    parser.add_argument(f'--{prefix}hang-rate', type=float, default=0.0,
+                        help="Fraction of requests that stall for --hang-seconds (client timeouts)")
+    parser.add_argument(f'--{prefix}hang-seconds', type=float, default=60)
+    parser.add_argument(f'--{prefix}malformed-rate', type=float, default=0.0)
+    parser.add_argument(f'--{prefix}truncate-rate', type=float, default=0.0,
+                        help="Fraction of streams that end before the JSON array is complete")
+    parser.add_argument(f'--{prefix}stream-chunks', type=int, default=4)
+    parser.add_argument(f'--{prefix}seed', type=int, default=None)
+
+
+def profile_from_args(args, prefix=''):
+    """Build a FaultProfile from options registered by add_arguments"""
+    prefix = prefix.replace('-', '_')
+    names = ('latency_ms', 'latency_distribution', 'latency_spread', 'error_rate', 'error_status',
+             'rate_limit_every', 'rate_limit_burst', 'retry_after', 'hang_rate', 'hang_seconds',
+             'malformed_rate', 'truncate_rate', 'stream_chunks', 'seed')
+    return FaultProfile(**{name: getattr(args, prefix + name) for name in names})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeGeminiServer(args.host, args.port, profile_from_args(args))
+    print(f"Fake Gemini listening on {server.base_url} (GEMINI_API_BASE={server.base_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(json.dumps(server.stats()))
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
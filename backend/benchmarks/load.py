@@ -0,0 +1,294 @@
+"""End-to-end load harness: register -> material -> generate -> attempt -> dashboard.
+
+By default the Flask app runs in-process against mongomock and a local fake
+Gemini server, so runs are reproducible offline. Run from the backend directory:
+
+    python -m benchmarks.load [--users 20] [--concurrency 8] [--output load.json]
+
+Use --mongo-uri to measure against a real mongod, or --base-url to drive an
+already running server over HTTP (its own database and Gemini settings apply).
+The --gemini-* options inject latency and failures into the fake Gemini server
+(see benchmarks/fake_gemini.py); --stream generates through /generate/stream.
+Steps mongomock cannot execute are skipped (and listed in the report) unless
+--mongo-uri or --base-url is given.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import sample_text, summarize, environment, write_report
+from benchmarks.fake_gemini import FakeGeminiServer, add_arguments, profile_from_args
+
+STEPS = ('register', 'login', 'create_material', 'list_materials', 'generate_request',
+         'generate_job', 'get_quiz', 'submit_attempt', 'dashboard')
+
+# Steps that fail under mongomock -> why
+MONGOMOCK_UNSUPPORTED_STEPS = {
+    'list_materials': "mongomock cannot evaluate the listing's $strLenCP/$substrCP projection"
+}
+
+
+class StepFailed(Exception):
+    def __init__(self, step, status, body):
+        super().__init__(f"{step} returned {status}: {body}")
+        self.step = step
+        self.status = status
+
+
+class InProcessClient:
+    """Calls the WSGI app directly with one Flask test client per thread"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, json=None, token=None):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = client.open(path, method=method, json=json, headers=headers)
+        body = response.get_json(silent=True)
+        return response.status_code, body if body is not None else response.get_data(as_text=True)
+
+
+class HttpClient:
+    """Calls a running server with one keep-alive session per thread"""
+
+    def __init__(self, base_url):
+        import requests
+        self._requests = requests
+        self.base_url = base_url.rstrip('/')
+        self._local = threading.local()
+
+    def request(self, method, path, json=None, token=None):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = self._requests.Session()
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = session.request(method, self.base_url + path, json=json, headers=headers, timeout=60)
+        try:
+            body = response.json()
+        except ValueError:
+            body = response.text
+        return response.status_code, body
+
+
+def _start_in_process_app(args):
+    """Configure the environment, then import the app so Config picks it up"""
+    fake_gemini = None
+    if not args.no_gemini:
+        fake_gemini = FakeGeminiServer(profile=profile_from_args(args, 'gemini-')).start()
+        os.environ['GEMINI_API_KEY'] = 'benchmark-key'
+        os.environ['GEMINI_API_BASE'] = fake_gemini.base_url
+    else:
+        os.environ['GEMINI_API_KEY'] = ''
+    # Per-request access logs would drown out the warnings worth seeing
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    if args.mongo_uri:
+        os.environ['MONGO_URI'] = args.mongo_uri
+        os.environ.setdefault('MONGO_DB_NAME', f"quiz_planner_bench_{uuid.uuid4().hex[:8]}")
+    else:
+        import mongomock
+        import pymongo
+        print("Using mongomock: it has no indexes, so write-heavy steps (create_material's corpus "
+              "upserts) slow down as data accumulates. Compare only runs with identical parameters "
+              "and use --mongo-uri for realistic latencies.", file=sys.stderr)
+        shared = mongomock.MongoClient()
+        pymongo.MongoClient = lambda *a, **k: shared
+
+    import app as app_module
+    # Keep stdout for the report
+    app_module.log_handler.target.setStream(sys.stderr)
+    skipped = {} if args.mongo_uri else dict(MONGOMOCK_UNSUPPORTED_STEPS)
+    return InProcessClient(app_module.app), fake_gemini, skipped
+
+
+def _answers(quiz, rng):
+    """Answer roughly three quarters of the questions correctly"""
+    return {str(i): question['correct_answer'] if rng.random() < 0.75 else "wrong"
+            for i, question in enumerate(quiz['questions'])}
+
+
+def _stream_result(text):
+    """Payload of the final done (or error) event of a generation stream"""
+    event = None
+    for line in text.splitlines():
+        if line.startswith('event:'):
+            event = line[len('event:'):].strip()
+        elif line.startswith('data:') and event in ('done', 'error'):
+            return event, json.loads(line[len('data:'):])
+    return None, None
+
+
+def _generate_streamed(call, body, token):
+    """The stream holds the request open until every question has been sent"""
+    text = call('generate_request', 'POST', '/api/quizzes/generate/stream', (200,), body, token)
+    event, result = _stream_result(text)
+    if event != 'done':
+        raise StepFailed('generate_job', event or 'incomplete', result)
+    return result['quiz_id']
+
+
+def _generate_queued(call, body, token, deadline):
+    """Queue a generation job and long-poll it to completion"""
+    job = call('generate_request', 'POST', '/api/quizzes/generate', (200, 201, 202), body, token)
+    if 'job_id' not in job:
+        return job.get('quiz_id') or job['quiz']['id']
+    while job.get('status') not in ('completed', 'failed'):
+        if time.perf_counter() > deadline:
+            raise StepFailed('generate_job', 'timeout', job)
+        job = call('poll_job', 'GET', f"/api/quizzes/jobs/{job['job_id']}?wait=10", (200,), token=token)
+    if job['status'] != 'completed':
+        raise StepFailed('generate_job', job['status'], job.get('error'))
+    return job['result']['quiz_id']
+
+
+def run_scenario(client, index, run_id, args, skipped=()):
+    """One user's full journey; returns {step: seconds}"""
+    rng = random.Random(f"{args.seed}-{index}")
+    timings = {}
+
+    def call(step, method, path, expected, json=None, token=None):
+        started = time.perf_counter()
+        status, body = client.request(method, path, json=json, token=token)
+        timings[step] = timings.get(step, 0) + time.perf_counter() - started
+        if status not in expected:
+            raise StepFailed(step, status, body)
+        return body
+
+    email = f"bench-{run_id}-{index}@example.com"
+    credentials = {"email": email, "password": "benchmark-password"}
+    call('register', 'POST', '/api/auth/register', (201,), {**credentials, "name": f"Bench {index}"})
+    token = call('login', 'POST', '/api/auth/login', (200,), credentials)['access_token']
+
+    material = call('create_material', 'POST', '/api/materials', (201,), {
+        "title": f"Benchmark material {index}",
+        # Unique content per user so the question cache does not hide generation cost
+        "content": f"{run_id} {index}. " + sample_text(rng, args.material_words),
+        "tags": ["benchmark"]
+    }, token)['material']
+    if 'list_materials' not in skipped:
+        call('list_materials', 'GET', '/api/materials?limit=20', (200,), token=token)
+
+    generate_started = time.perf_counter()
+    generate_body = {"material_id": material['id'], "num_questions": args.questions}
+    if args.stream:
+        quiz_id = _generate_streamed(call, generate_body, token)
+    else:
+        quiz_id = _generate_queued(call, generate_body, token, generate_started + args.job_timeout)
+    timings['generate_job'] = time.perf_counter() - generate_started
+    timings.pop('poll_job', None)
+
+    quiz = call('get_quiz', 'GET', f"/api/quizzes/{quiz_id}", (200,), token=token)
+    call('submit_attempt', 'POST', f"/api/quizzes/{quiz_id}/attempt", (201,),
+         {"answers": _answers(quiz, rng)}, token)
+    call('dashboard', 'GET', '/api/quizzes/dashboard', (200,), token=token)
+    return timings
+
+
+def run(client, args, skipped=None):
+    skipped = skipped or {}
+    run_id = uuid.uuid4().hex[:8]
+    samples = {step: [] for step in STEPS}
+    failures = {}
+    completed = 0
+
+    def scenario(index):
+        try:
+            return run_scenario(client, index, run_id, args, skipped), None
+        except StepFailed as e:
+            return None, f"{e.step}:{e.status}"
+        except Exception as e:
+            return None, f"error:{type(e).__name__}"
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for timings, failure in executor.map(scenario, range(args.users)):
+            if failure:
+                failures[failure] = failures.get(failure, 0) + 1
+                continue
+            completed += 1
+            for step, seconds in timings.items():
+                samples[step].append(seconds)
+    elapsed = time.perf_counter() - started
+
+    # Each completed scenario makes one HTTP call per step except generate_job
+    requests_made = sum(len(values) for step, values in samples.items() if step != 'generate_job')
+    return {
+        "duration_seconds": round(elapsed, 3),
+        "scenarios": {"requested": args.users, "completed": completed, "failed": args.users - completed},
+        "failures": failures,
+        "throughput": {
+            "scenarios_per_second": round(completed / elapsed, 2),
+            "requests_per_second": round(requests_made / elapsed, 2)
+        },
+        "steps": {step: summarize(values) for step, values in samples.items() if step not in skipped},
+        "skipped_steps": skipped
+    }
+
+
+def _app_stats(client):
+    """Breaker, queue and fallback counters: how the app coped with the upstream"""
+    status, stats = client.request('GET', '/api/health/stats')
+    result = {}
+    if status == 200 and isinstance(stats, dict):
+        result["gemini_circuit_breaker"] = stats.get("gemini_circuit_breaker")
+        result["generation_queue"] = stats.get("generation_queue")
+
+    status, metrics = client.request('GET', '/metrics')
+    if status == 200 and isinstance(metrics, str):
+        for line in metrics.splitlines():
+            if line.startswith(('question_fallback_', 'gemini_request_duration_seconds_count')):
+                name, value = line.rsplit(' ', 1)
+                result[name] = float(value)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=20, help="Scenarios to run (one new user each)")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--questions', type=int, default=5)
+    parser.add_argument('--material-words', type=int, default=150)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--job-timeout', type=float, default=60)
+    parser.add_argument('--mongo-uri', help="Use this MongoDB (a throwaway database) instead of mongomock")
+    parser.add_argument('--no-gemini', action='store_true', help="No API key: exercise the fallback generator")
+    parser.add_argument('--stream', action='store_true', help="Generate through /api/quizzes/generate/stream")
+    parser.add_argument('--base-url', help="Drive a running server instead of the in-process app")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    add_arguments(parser.add_argument_group('fake Gemini server'), prefix='gemini-')
+    args = parser.parse_args()
+
+    fake_gemini = None
+    skipped = {}
+    if args.base_url:
+        client = HttpClient(args.base_url)
+    else:
+        client, fake_gemini, skipped = _start_in_process_app(args)
+        for step, reason in skipped.items():
+            print(f"Skipping {step}: {reason}", file=sys.stderr)
+
+    report = run(client, args, skipped)
+    report["app"] = _app_stats(client)
+    if fake_gemini:
+        report["fake_gemini"] = fake_gemini.stats()
+        fake_gemini.stop()
+
+    write_report({
+        "benchmark": "load",
+        "environment": environment(),
+        "config": {key: value for key, value in vars(args).items() if key != 'output'},
+        **report
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Micro-benchmarks for CPU-bound hot paths that need no database or network.
+
+Run from the backend directory:
+
+    python -m benchmarks.micro [--iterations 2000] [--output micro.json]
+"""
+import argparse
+import logging
+import random
+import time
+from datetime import datetime
+from bson.objectid import ObjectId
+from flask import Flask, jsonify
+from benchmarks.common import sample_text, summarize, environment, write_report
+from ai.question_generator import QuestionGenerator
+from services import grading
+from utils.json_stream import iter_json_array
+
+QUESTION_TYPES = ["multiple_choice", "true_false", "short_answer"]
+
+
+def _time(func, iterations, warmup):
+    for _ in range(warmup):
+        func()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - call_started)
+    return summarize(samples, time.perf_counter() - started)
+
+
+def _sample_quiz(generator, rng, num_questions):
+    concepts = generator.extract_key_concepts(sample_text(rng, 400))
+    return {
+        "_id": ObjectId(),
+        "user_id": str(ObjectId()),
+        "title": "Benchmark quiz",
+        "description": "Generated for benchmarking",
+        "questions": generator._generate_fallback_questions(concepts, num_questions, QUESTION_TYPES),
+        "created_at": datetime.now(),
+        "updated_at": datetime.now()
+    }
+
+
+def _answers(quiz, rng):
+    """Mostly-correct answers with some near misses so every grader does real work"""
+    answers = {}
+    for i, question in enumerate(quiz['questions']):
+        answer = question['correct_answer']
+        if rng.random() < 0.3:
+            answer = str(answer).upper() if isinstance(answer, str) else not answer
+        answers[str(i)] = answer
+    return answers
+
+
+def build_benchmarks(rng):
+    """name -> zero-argument callable"""
+    logging.getLogger().setLevel(logging.WARNING)
+    generator = QuestionGenerator()
+    app = Flask(__name__)
+
+    short_text = sample_text(rng, 300)
+    long_text = sample_text(rng, 5000)
+    concepts = generator.extract_key_concepts(long_text)
+    quiz = _sample_quiz(generator, rng, 20)
+    answers = _answers(quiz, rng)
+    plan = grading.compile_plan(quiz['questions'])
+    materials = [{
+        "_id": ObjectId(),
+        "title": f"Material {i}",
+        "content": sample_text(rng, 300),
+        "tags": ["bench"],
+        "created_at": datetime.now()
+    } for i in range(200)]
+    quiz_payload = {**quiz, "_id": str(quiz['_id']), "created_at": quiz['created_at'].isoformat(),
+                    "updated_at": quiz['updated_at'].isoformat()}
+
+    def serialize_quiz():
+        with app.app_context():
+            jsonify(quiz_payload).get_data()
+
+    return {
+        "extract_key_concepts.300_words": lambda: generator.extract_key_concepts(short_text),
+        "extract_key_concepts.5000_words": lambda: generator.extract_key_concepts(long_text),
+        "fallback_questions.10": lambda: generator._generate_fallback_questions(concepts, 10, QUESTION_TYPES),
+        "grading.compile_plan.20_questions": lambda: grading.compile_plan(quiz['questions']),
+        "grading.grade.20_questions": lambda: grading.grade(plan, answers),
+        "grading.grade_quiz.cached_plan": lambda: grading.grade_quiz(quiz, answers),
+        "serialize.quiz_jsonify": serialize_quiz,
+        "serialize.export_200_materials": lambda: ''.join(iter_json_array(materials, batch_size=100))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--only', help="Run benchmarks whose name starts with this prefix")
+    parser.add_argument('--output', help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+
+    results = {}
+    for name, func in build_benchmarks(random.Random(args.seed)).items():
+        if args.only and not name.startswith(args.only):
+            continue
+        results[name] = _time(func, args.iterations, args.warmup)
+
+    write_report({
+        "benchmark": "micro",
+        "environment": environment(),
+        "config": {"iterations": args.iterations, "warmup": args.warmup, "seed": args.seed},
+        "results": results
+    }, args.output)
+
+
+if __name__ == '__main__':
+    main()
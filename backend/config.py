@@ -7,16 +7,95 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY', 'dev-secret-key')
     DEBUG = os.environ.get('DEBUG', 'False').lower() == 'true'
     
+    # Logging settings (request payload dumps are only logged at DEBUG)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+    LOG_REQUEST_SAMPLE_RATE = float(os.environ.get('LOG_REQUEST_SAMPLE_RATE', 1.0))
+    LOG_SLOW_REQUEST_MS = int(os.environ.get('LOG_SLOW_REQUEST_MS', 1000))
+    
     # MongoDB settings
     MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/quiz_planner')
+    MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME', 'quiz_planner')
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 20))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 60000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 5000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'primary')
+    MONGO_WRITE_CONCERN = os.environ.get('MONGO_WRITE_CONCERN', 'majority')
+    MONGO_ENSURE_INDEXES = os.environ.get('MONGO_ENSURE_INDEXES', 'True').lower() == 'true'
+    
+    # Listing pagination settings
+    PAGINATION_MAX_LIMIT = int(os.environ.get('PAGINATION_MAX_LIMIT', 100))
+    PAGINATION_COUNT_CACHE_SECONDS = int(os.environ.get('PAGINATION_COUNT_CACHE_SECONDS', 30))
+    PAGINATION_COUNT_CACHE_SIZE = int(os.environ.get('PAGINATION_COUNT_CACHE_SIZE', 1024))
+    MATERIAL_SNIPPET_LENGTH = int(os.environ.get('MATERIAL_SNIPPET_LENGTH', 200))
+    MATERIAL_EXPORT_BATCH_SIZE = int(os.environ.get('MATERIAL_EXPORT_BATCH_SIZE', 100))
+    SEARCH_MAX_QUERY_LENGTH = int(os.environ.get('SEARCH_MAX_QUERY_LENGTH', 200))
     
     # JWT settings
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'jwt-secret-key')
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     
+    # Password hashing settings (any Werkzeug method, e.g. pbkdf2:sha256:600000)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')
+    PASSWORD_SALT_LENGTH = int(os.environ.get('PASSWORD_SALT_LENGTH', 16))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE_SIZE = int(os.environ.get('PASSWORD_HASH_QUEUE_SIZE', 64))
+    PASSWORD_HASH_TIMEOUT_SECONDS = float(os.environ.get('PASSWORD_HASH_TIMEOUT_SECONDS', 10))
+    
     # Gemini settings
     GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
     GEMINI_MODEL = os.environ.get('GEMINI_MODEL', 'gemini-2.0-flash')
+    # Base URL of the Gemini API; point at a local stand-in for offline testing
+    GEMINI_API_BASE = os.environ.get('GEMINI_API_BASE', 'https://generativelanguage.googleapis.com').rstrip('/')
+    GEMINI_POOL_SIZE = int(os.environ.get('GEMINI_POOL_SIZE', 10))
+    GEMINI_CONNECT_TIMEOUT = float(os.environ.get('GEMINI_CONNECT_TIMEOUT', 3.05))
+    GEMINI_READ_TIMEOUT = float(os.environ.get('GEMINI_READ_TIMEOUT', 30))
+    GEMINI_MAX_RETRIES = int(os.environ.get('GEMINI_MAX_RETRIES', 2))
+    GEMINI_BACKOFF_BASE = float(os.environ.get('GEMINI_BACKOFF_BASE', 0.5))
+    GEMINI_BACKOFF_MAX = float(os.environ.get('GEMINI_BACKOFF_MAX', 8))
+    GEMINI_BREAKER_THRESHOLD = int(os.environ.get('GEMINI_BREAKER_THRESHOLD', 5))
+    GEMINI_BREAKER_RESET_SECONDS = int(os.environ.get('GEMINI_BREAKER_RESET_SECONDS', 30))
+    GEMINI_CHUNKED_GENERATION = os.environ.get('GEMINI_CHUNKED_GENERATION', 'True').lower() == 'true'
+    GEMINI_CHUNK_OVERLAP = int(os.environ.get('GEMINI_CHUNK_OVERLAP', 300))
+    GEMINI_MAX_CHUNKS = int(os.environ.get('GEMINI_MAX_CHUNKS', 8))
+    GEMINI_MIN_QUESTIONS_PER_CHUNK = int(os.environ.get('GEMINI_MIN_QUESTIONS_PER_CHUNK', 5))
+    GEMINI_CHUNK_CONCURRENCY = int(os.environ.get('GEMINI_CHUNK_CONCURRENCY', 3))
+    CONCEPT_INDEX_TOP_TERMS = int(os.environ.get('CONCEPT_INDEX_TOP_TERMS', 100))
+    CORPUS_DF_CACHE_SECONDS = int(os.environ.get('CORPUS_DF_CACHE_SECONDS', 60))
+    CORPUS_DF_CACHE_SIZE = int(os.environ.get('CORPUS_DF_CACHE_SIZE', 1024))
+    
+    # Generated question cache settings
+    QUESTION_CACHE_ENABLED = os.environ.get('QUESTION_CACHE_ENABLED', 'True').lower() == 'true'
+    QUESTION_CACHE_MEMORY_SIZE = int(os.environ.get('QUESTION_CACHE_MEMORY_SIZE', 256))
+    QUESTION_CACHE_TTL_SECONDS = int(os.environ.get('QUESTION_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+    QUESTION_CACHE_MAX_ENTRIES = int(os.environ.get('QUESTION_CACHE_MAX_ENTRIES', 10000))
+    
+    # Quiz generation queue settings
+    GENERATION_WORKERS = int(os.environ.get('GENERATION_WORKERS', 4))
+    GENERATION_QUEUE_SIZE = int(os.environ.get('GENERATION_QUEUE_SIZE', 32))
+    GENERATION_MAX_JOBS_PER_USER = int(os.environ.get('GENERATION_MAX_JOBS_PER_USER', 2))
+    GENERATION_JOB_STALE_SECONDS = int(os.environ.get('GENERATION_JOB_STALE_SECONDS', 600))
+    GENERATION_JOB_HEARTBEAT_SECONDS = int(os.environ.get('GENERATION_JOB_HEARTBEAT_SECONDS', 60))
+    GENERATION_JOB_TTL_SECONDS = int(os.environ.get('GENERATION_JOB_TTL_SECONDS', 7 * 24 * 3600))
+    GENERATION_LONG_POLL_MAX_SECONDS = int(os.environ.get('GENERATION_LONG_POLL_MAX_SECONDS', 30))
+    MAX_QUESTIONS_PER_QUIZ = int(os.environ.get('MAX_QUESTIONS_PER_QUIZ', 50))
+    BATCH_GENERATION_MAX_ITEMS = int(os.environ.get('BATCH_GENERATION_MAX_ITEMS', 50))
+    BATCH_GENERATION_CONCURRENCY = int(os.environ.get('BATCH_GENERATION_CONCURRENCY', 4))
+    
+    # Response cache for quiz and material reads
+    RESPONSE_CACHE_ENABLED = os.environ.get('RESPONSE_CACHE_ENABLED', 'True').lower() == 'true'
+    RESPONSE_CACHE_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+    RESPONSE_CACHE_MAX_ENTRY_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRY_BYTES', 256 * 1024))
+    RESPONSE_CACHE_TTL_SECONDS = int(os.environ.get('RESPONSE_CACHE_TTL_SECONDS', 60))
+    
+    # Grading settings
+    SHORT_ANSWER_GRADER = os.environ.get('SHORT_ANSWER_GRADER', 'case_insensitive')
+    SHORT_ANSWER_MATCH_THRESHOLD = float(os.environ.get('SHORT_ANSWER_MATCH_THRESHOLD', 0.8))
+    GRADING_PLAN_CACHE_SIZE = int(os.environ.get('GRADING_PLAN_CACHE_SIZE', 512))
+    BATCH_ATTEMPTS_MAX_ITEMS = int(os.environ.get('BATCH_ATTEMPTS_MAX_ITEMS', 200))
     
     # CORS settings
     CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ALLOWED_ORIGINS', 'http://localhost:3000')
\ No newline at end of file
@@ -1,17 +1,23 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 from bson.objectid import ObjectId
-import pymongo
+from pymongo.errors import DuplicateKeyError
 import re
+from services.passwords import password_hasher, HasherBusyError
+from services import user_context
 
 # Initialize blueprint
 auth_bp = Blueprint('auth', __name__)
 
-# MongoDB connection
-client = pymongo.MongoClient('mongodb://localhost:27017/')
-db = client.quiz_planner
+# Shared MongoDB connection
+from database import db
+
+def _busy_response(error):
+    """503 for when the password hashing pool is saturated"""
+    response = jsonify({"error": str(error)})
+    response.headers['Retry-After'] = '2'
+    return response, 503
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -38,15 +44,24 @@ def register():
     if db.users.find_one({"email": email}):
         return jsonify({"error": "Email already registered"}), 409
     
+    try:
+        password_hash = password_hasher.hash(password)
+    except HasherBusyError as e:
+        return _busy_response(e)
+    
     # Create new user
     user = {
         "email": email,
-        "password": generate_password_hash(password),
+        "password": password_hash,
         "name": name,
         "created_at": datetime.now()
     }
     
-    user_id = db.users.insert_one(user).inserted_id
+    # The unique email index catches a concurrent registration the check above missed
+    try:
+        user_id = db.users.insert_one(user).inserted_id
+    except DuplicateKeyError:
+        return jsonify({"error": "Email already registered"}), 409
     
     return jsonify({
         "message": "User registered successfully",
@@ -72,11 +87,27 @@ def login():
     # Find user
     user = db.users.find_one({"email": email})
     
-    if not user or not check_password_hash(user['password'], password):
-        return jsonify({"error": "Invalid email or password"}), 401
-    
-    # Create access token
-    access_token = create_access_token(identity=str(user['_id']))
+    try:
+        if not user or not password_hasher.verify(user['password'], password):
+            return jsonify({"error": "Invalid email or password"}), 401
+    except HasherBusyError as e:
+        return _busy_response(e)
+    
+    # Upgrade hashes made with outdated parameters while we have the password;
+    # a busy pool just leaves it for the next login
+    if password_hasher.needs_rehash(user['password']):
+        try:
+            db.users.update_one(
+                {"_id": user['_id'], "password": user['password']},
+                {"$set": {"password": password_hasher.hash(password)}}
+            )
+            password_hasher.record_rehash()
+        except HasherBusyError:
+            pass
+    
+    # Create access token carrying the profile claims
+    access_token = create_access_token(identity=str(user['_id']),
+                                       additional_claims=user_context.token_claims(user))
     
     return jsonify({
         "message": "Login successful",
@@ -92,15 +123,13 @@ def login():
 @jwt_required()
 def get_user():
     """Get current user information"""
-    user_id = get_jwt_identity()
-    
-    user = db.users.find_one({"_id": ObjectId(user_id)})
-    
-    if not user:
+    # The stored profile, not the token claims, so earlier updates show up
+    user = user_context.load_user(get_jwt_identity())
+    if user is None:
         return jsonify({"error": "User not found"}), 404
     
     return jsonify({
-        "id": str(user['_id']),
+        "id": user['id'],
         "email": user['email'],
         "name": user.get('name', '')
     }), 200
@@ -115,12 +144,6 @@ def update_user():
     if not data:
         return jsonify({"error": "No update data provided"}), 400
     
-    # Find user
-    user = db.users.find_one({"_id": ObjectId(user_id)})
-    
-    if not user:
-        return jsonify({"error": "User not found"}), 404
-    
     # Update fields
     update_data = {}
     
@@ -130,12 +153,26 @@ def update_user():
     if 'password' in data:
         if len(data['password']) < 6:
             return jsonify({"error": "Password must be at least 6 characters long"}), 400
-        update_data['password'] = generate_password_hash(data['password'])
+        try:
+            update_data['password'] = password_hasher.hash(data['password'])
+        except HasherBusyError as e:
+            return _busy_response(e)
     
     if not update_data:
         return jsonify({"message": "No fields to update"}), 200
     
-    # Update user
-    db.users.update_one({"_id": ObjectId(user_id)}, {"$set": update_data})
+    # Update user and read back the profile in one round trip
+    user = user_context.update_user(user_id, update_data)
+    
+    if user is None:
+        return jsonify({"error": "User not found"}), 404
+    
+    # Issue a token whose claims reflect the change
+    access_token = create_access_token(identity=user_id,
+                                       additional_claims=user_context.token_claims(user))
     
-    return jsonify({"message": "User updated successfully"}), 200
\ No newline at end of file
+    return jsonify({
+        "message": "User updated successfully",
+        "access_token": access_token,
+        "user": user
+    }), 200
\ No newline at end of file
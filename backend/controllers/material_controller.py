@@ -1,15 +1,42 @@
-from flask import Blueprint, request, jsonify, make_response
+import logging
+from flask import Blueprint, Response, request, jsonify, make_response
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson.objectid import ObjectId
-import pymongo
 from datetime import datetime
+from config import Config
+from services import user_stats, corpus
+from services.response_cache import response_cache
+from services import search as search_service
+from ai.concept_index import build_concept_index, extract_terms
+from utils.pagination import PageRequest, LISTING_SORT
+from utils.json_stream import iter_json_array
+from utils.structured_logging import log_request_payload
 
 # Initialize blueprint
 material_bp = Blueprint('material', __name__)
 
-# MongoDB connection
-client = pymongo.MongoClient('mongodb://localhost:27017/')
-db = client.quiz_planner
+logger = logging.getLogger(__name__)
+
+# Shared MongoDB connection
+from database import db
+
+# Listing fields: a content length and snippet instead of the full content
+MATERIAL_SUMMARY_PROJECTION = {
+    "title": 1,
+    "description": 1,
+    "tags": 1,
+    "user_id": 1,
+    "created_at": 1,
+    "content_length": {"$strLenCP": {"$ifNull": ["$content", ""]}},
+    "snippet": {"$substrCP": [{"$ifNull": ["$content", ""]}, 0, Config.MATERIAL_SNIPPET_LENGTH]}
+}
+
+# Derived indexing data that is never returned to clients
+# (counted_terms is only present on materials saved by older versions)
+INTERNAL_FIELDS = {"concept_index": 0, "counted_terms": 0, "corpus_version": 0}
+
+# What update and delete need to maintain stats and the corpus
+WRITE_FIELDS = {"content": 1, "title": 1, "corpus_version": 1}
 
 # Add this function to handle CORS preflight requests
 @material_bp.route('/', methods=['OPTIONS'])
@@ -24,17 +51,10 @@ def materials_options():
 @jwt_required()
 def create_material():
     """Create a new study material"""
-    # Print debugging info
-    print("\n--- CREATE MATERIAL REQUEST ---")
-    print("Headers:", dict(request.headers))
-    print("Authorization:", request.headers.get('Authorization'))
-    
     try:
         user_id = get_jwt_identity()
-        print("User ID from JWT:", user_id)
-        
         data = request.get_json()
-        print("Request data:", data)
+        log_request_payload(logger, "Create material request", data)
         
         # Validate input
         if not data or 'title' not in data or 'content' not in data:
@@ -46,6 +66,8 @@ def create_material():
         if not title or not content:
             return jsonify({"error": "Title and content cannot be empty"}), 400
         
+        terms = extract_terms(content)
+        
         # Create new material
         material = {
             "title": title,
@@ -53,11 +75,16 @@ def create_material():
             "description": data.get('description', '').strip(),
             "tags": data.get('tags', []),
             "user_id": user_id,
-            "created_at": datetime.now()
+            "concept_index": build_concept_index(content, Config.CONCEPT_INDEX_TOP_TERMS, terms),
+            **corpus.corpus_fields(),
+            "created_at": datetime.now(),
+            "updated_at": datetime.now()
         }
         
         material_id = db.study_materials.insert_one(material).inserted_id
-        print("Material created with ID:", material_id)
+        logger.info("Material created", extra={"material_id": str(material_id)})
+        user_stats.record_material_created(user_id, material)
+        corpus.add_document(user_id, content, terms)
         
         # Add CORS headers to response
         response = jsonify({
@@ -71,23 +98,69 @@ def create_material():
         return response, 201
         
     except Exception as e:
-        print("Error in create_material:", str(e))
+        logger.exception("Failed to create material")
         return jsonify({"error": f"Failed to create material: {str(e)}"}), 500
 
 @material_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_materials():
-    """Get all study materials for the current user"""
+    """List the current user's study materials (summaries; full content via get_material)"""
     user_id = get_jwt_identity()
     
-    # Get all materials for the user
-    materials = list(db.study_materials.find({"user_id": user_id}))
+    search_query = search_service.clean_query(request.args.get('search'))
+    
+    # Without paging parameters the response stays a bare list of every material
+    paged = any(param in request.args for param in ('page', 'limit', 'cursor'))
+    try:
+        paging = PageRequest(request.args)
+        if search_query:
+            search_service.check_paging(paging)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    query_filter = {"user_id": user_id}
+    
+    # Search over title, description, tags and content, best match first
+    if search_query:
+        query_filter = search_service.text_filter(query_filter, search_query)
+    sort = dict(search_service.RELEVANCE_SORT if search_query else LISTING_SORT)
+    
+    pipeline = [
+        {"$match": paging.apply(query_filter)},
+        {"$sort": sort}
+    ]
+    if paged:
+        pipeline += [{"$skip": paging.skip}, {"$limit": paging.fetch_limit}]
+    pipeline.append({"$project": MATERIAL_SUMMARY_PROJECTION})
+    
+    materials = db.study_materials.aggregate(pipeline)
+    materials = paging.finish(materials) if paged else list(materials)
     
     # Convert ObjectId to string for JSON serialization
     for material in materials:
         material['_id'] = str(material['_id'])
     
-    return jsonify(materials), 200
+    if not paged:
+        return jsonify(materials), 200
+    
+    return jsonify({
+        "materials": materials,
+        "pagination": paging.to_dict(paging.count(db.study_materials, query_filter))
+    }), 200
+
+@material_bp.route('/export', methods=['GET'])
+@jwt_required()
+def export_materials():
+    """Export every study material with full content as a streamed JSON array"""
+    user_id = get_jwt_identity()
+    
+    materials = db.study_materials.find(
+        {"user_id": user_id}, INTERNAL_FIELDS
+    ).sort(LISTING_SORT).batch_size(Config.MATERIAL_EXPORT_BATCH_SIZE)
+    
+    response = Response(iter_json_array(materials), mimetype='application/json')
+    response.headers['Content-Disposition'] = 'attachment; filename=materials.json'
+    return response
 
 @material_bp.route('/<material_id>', methods=['GET'])
 @jwt_required()
@@ -99,10 +172,15 @@ def get_material(material_id):
     if not ObjectId.is_valid(material_id):
         return jsonify({"error": "Invalid material ID"}), 400
     
+    # Repeat views are served from the response cache (large materials are never kept)
+    cached = response_cache.get(user_id, 'material', material_id)
+    if cached:
+        return response_cache.respond(cached)
+    
     material = db.study_materials.find_one({
         "_id": ObjectId(material_id),
         "user_id": user_id
-    })
+    }, INTERNAL_FIELDS)
     
     if not material:
         return jsonify({"error": "Study material not found"}), 404
@@ -110,7 +188,9 @@ def get_material(material_id):
     # Convert ObjectId to string for JSON serialization
     material['_id'] = str(material['_id'])
     
-    return jsonify(material), 200
+    entry = response_cache.store(user_id, 'material', material_id, material,
+                                 material.get('updated_at', material['created_at']))
+    return response_cache.respond(entry)
 
 @material_bp.route('/<material_id>', methods=['PUT'])
 @jwt_required()
@@ -131,7 +211,7 @@ def update_material(material_id):
     material = db.study_materials.find_one({
         "_id": ObjectId(material_id),
         "user_id": user_id
-    })
+    }, WRITE_FIELDS)
     
     if not material:
         return jsonify({"error": "Study material not found"}), 404
@@ -142,8 +222,12 @@ def update_material(material_id):
     if 'title' in data and data['title'].strip():
         update_data['title'] = data['title'].strip()
     
+    new_terms = None
     if 'content' in data:
+        new_terms = extract_terms(data['content'])
         update_data['content'] = data['content']
+        update_data['concept_index'] = build_concept_index(data['content'], Config.CONCEPT_INDEX_TOP_TERMS, new_terms)
+        update_data.update(corpus.corpus_fields())
     
     if 'description' in data:
         update_data['description'] = data['description'].strip()
@@ -154,11 +238,21 @@ def update_material(material_id):
     if not update_data:
         return jsonify({"message": "No fields to update"}), 200
     
+    update_data['updated_at'] = datetime.now()
+    
     # Update material
-    db.study_materials.update_one(
-        {"_id": ObjectId(material_id)},
-        {"$set": update_data}
-    )
+    changes = {"$set": update_data}
+    if new_terms is not None:
+        # Term lists stored by older versions are re-derived from content now
+        changes["$unset"] = {"counted_terms": ""}
+    db.study_materials.update_one({"_id": ObjectId(material_id)}, changes)
+    user_stats.record_material_updated(user_id, ObjectId(material_id), update_data)
+    response_cache.invalidate(user_id, 'material', material_id)
+    if 'title' in update_data:
+        # Quiz responses embed the material title
+        response_cache.invalidate(user_id, 'quiz')
+    if new_terms is not None:
+        corpus.replace_document(user_id, material, data['content'], new_terms)
     
     return jsonify({"message": "Study material updated successfully"}), 200
 
@@ -176,7 +270,7 @@ def delete_material(material_id):
     material = db.study_materials.find_one({
         "_id": ObjectId(material_id),
         "user_id": user_id
-    })
+    }, WRITE_FIELDS)
     
     if not material:
         return jsonify({"error": "Study material not found"}), 404
@@ -185,6 +279,11 @@ def delete_material(material_id):
     db.study_materials.delete_one({"_id": ObjectId(material_id)})
     
     # Also delete any quizzes related to this material
-    db.quizzes.delete_many({"material_id": material_id})
+    deleted_quizzes = db.quizzes.delete_many({"material_id": material_id}).deleted_count
+    
+    user_stats.record_material_deleted(user_id, ObjectId(material_id), deleted_quizzes)
+    response_cache.invalidate(user_id, 'material', material_id)
+    response_cache.invalidate(user_id, 'quiz')
+    corpus.remove_document(user_id, material)
     
     return jsonify({"message": "Study material deleted successfully"}), 200
\ No newline at end of file
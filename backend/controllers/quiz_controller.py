@@ -1,18 +1,35 @@
 import os
 import sys
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from bson.objectid import ObjectId
-import pymongo
+from pymongo.errors import BulkWriteError
 from datetime import datetime
+from config import Config
+from utils.pagination import PageRequest, LISTING_SORT
+from services import user_stats, corpus, grading
+from services import attempts as attempts_service
+from services import search as search_service
+from services.response_cache import response_cache
+from utils.structured_logging import log_request_payload
+from services.generation_queue import (
+    GenerationQueue, QueueFullError, UserJobLimitError, JOB_QUEUED, JOB_FAILED, format_job
+)
 
 # Initialize blueprint
 quiz_bp = Blueprint('quiz', __name__)
 
-# MongoDB connection
-client = pymongo.MongoClient('mongodb://localhost:27017/')
-db = client.quiz_planner
+logger = logging.getLogger(__name__)
+
+# Shared MongoDB connection
+from database import db
+
+# Generation reads content and the concept index; skip term lists left by older versions
+GENERATION_FIELDS = {"counted_terms": 0}
 
 # Add parent directory to path to ensure imports work properly
 current_dir = Path(__file__).parent
@@ -22,12 +39,53 @@ sys.path.append(str(parent_dir))
 # Import and initialize the question generator
 try:
     from ai.question_generator import QuestionGenerator
-    question_generator = QuestionGenerator()
-    print("QuestionGenerator initialized successfully")
-except Exception as e:
-    print(f"Error initializing QuestionGenerator: {e}")
+    from ai.question_cache import QuestionCache
+    
+    question_cache = None
+    if Config.QUESTION_CACHE_ENABLED:
+        question_cache = QuestionCache(
+            db.question_cache,
+            memory_size=Config.QUESTION_CACHE_MEMORY_SIZE,
+            ttl_seconds=Config.QUESTION_CACHE_TTL_SECONDS,
+            max_entries=Config.QUESTION_CACHE_MAX_ENTRIES
+        )
+    question_generator = QuestionGenerator(cache=question_cache)
+except Exception:
+    logger.exception("Error initializing QuestionGenerator")
     question_generator = None
 
+# Question types the generator knows how to produce
+QUESTION_TYPES = ("multiple_choice", "true_false", "short_answer")
+
+# Fields needed to list quizzes without loading their questions
+QUIZ_SUMMARY_PROJECTION = {
+    "title": 1,
+    "description": 1,
+    "created_at": 1,
+    "material_id": 1,
+    "num_questions": {"$size": {"$ifNull": ["$questions", []]}}
+}
+
+# Fields returned for an attempt already stored under an idempotency key
+ATTEMPT_RECEIPT_PROJECTION = {"idempotency_key": 1, "score": 1, "total_questions": 1, "percentage": 1}
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Bounded pool of generation workers shared by this process
+generation_queue = GenerationQueue(
+    db.generation_jobs,
+    db.generation_slots,
+    max_workers=Config.GENERATION_WORKERS,
+    max_pending=Config.GENERATION_QUEUE_SIZE,
+    max_jobs_per_user=Config.GENERATION_MAX_JOBS_PER_USER,
+    stale_after_seconds=Config.GENERATION_JOB_STALE_SECONDS,
+    heartbeat_seconds=Config.GENERATION_JOB_HEARTBEAT_SECONDS
+)
+
+# Caps concurrent per-material generations across every batch job in this process
+batch_executor = ThreadPoolExecutor(max_workers=Config.BATCH_GENERATION_CONCURRENCY,
+                                    thread_name_prefix='quiz-batch')
+
 @quiz_bp.route('/generate', methods=['POST'])
 @jwt_required()
 def generate_quiz():
@@ -48,49 +106,315 @@ def generate_quiz():
     if not ObjectId.is_valid(material_id):
         return jsonify({"error": "Invalid material ID"}), 400
     
-    # Get parameters
-    num_questions = data.get('num_questions', 5)
-    question_types = data.get('question_types', ["multiple_choice", "true_false", "short_answer"])
+    options_error = _generation_options_error(data)
+    if options_error:
+        return jsonify({"error": options_error}), 400
     
     # Get study material
     material = db.study_materials.find_one({
         "_id": ObjectId(material_id),
         "user_id": user_id
-    })
+    }, GENERATION_FIELDS)
     
     if not material:
         return jsonify({"error": "Study material not found"}), 404
     
-    # Generate questions
+    params = _generation_params(data, material)
+    
+    # Queue generation so the request worker isn't held for the Gemini round trip
     try:
-        questions = question_generator.generate_questions(
-            material['content'],
-            num_questions=num_questions,
-            question_types=question_types
+        job_id = generation_queue.submit(
+            user_id,
+            params,
+            lambda job_params: _create_generated_quiz(user_id, material, job_params)
         )
+    except UserJobLimitError as e:
+        return jsonify({"error": str(e)}), 429
+    except QueueFullError as e:
+        response = jsonify({"error": str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    response = jsonify({
+        "message": "Quiz generation queued",
+        "job_id": job_id,
+        "status": JOB_QUEUED,
+        "status_url": f"/api/quizzes/jobs/{job_id}"
+    })
+    response.headers['Location'] = f"/api/quizzes/jobs/{job_id}"
+    return response, 202
+
+def _generation_options_error(data):
+    """Error message for invalid num_questions/question_types/use_cache in a request body, else None"""
+    num_questions = data.get('num_questions', 5)
+    if not isinstance(num_questions, int) or isinstance(num_questions, bool) or \
+            not 1 <= num_questions <= Config.MAX_QUESTIONS_PER_QUIZ:
+        return f"num_questions must be an integer between 1 and {Config.MAX_QUESTIONS_PER_QUIZ}"
+    
+    question_types = data.get('question_types', list(QUESTION_TYPES))
+    if not isinstance(question_types, list) or not question_types or \
+            not all(isinstance(t, str) and t in QUESTION_TYPES for t in question_types):
+        return f"question_types must be a non-empty list of: {', '.join(QUESTION_TYPES)}"
+    
+    if not isinstance(data.get('use_cache', True), bool):
+        return "use_cache must be a boolean"
+    return None
+
+def _generation_params(data, material):
+    """Generation parameters for a material from a validated request body (or batch item)"""
+    return {
+        "material_id": str(material['_id']),
+        "num_questions": data.get('num_questions', 5),
+        "question_types": list(dict.fromkeys(data.get('question_types', QUESTION_TYPES))),
+        "use_cache": data.get('use_cache', True),
+        "title": data.get('title', f"Quiz on {material['title']}"),
+        "description": data.get('description', f"Generated quiz based on {material['title']}")
+    }
+
+def _generate_for_material(user_id, material, params):
+    """Generate the questions for one material"""
+    return question_generator.generate_questions(
+        material['content'],
+        num_questions=params['num_questions'],
+        question_types=params['question_types'],
+        use_cache=params.get('use_cache', True),
+        concept_index=material.get('concept_index'),
+        rank_concepts=corpus.concept_ranker(user_id)
+    )
+
+def _create_generated_quiz(user_id, material, params):
+    """Generate questions and store the quiz (runs on a generation worker)"""
+    questions = _generate_for_material(user_id, material, params)
+    return _save_generated_quiz(user_id, params, questions)
+
+def _build_quiz(user_id, params, questions):
+    """Create a quiz document for generated questions"""
+    return {
+        "title": params['title'],
+        "description": params['description'],
+        "questions": questions,
+        "user_id": user_id,
+        "material_id": params['material_id'],
+        "created_at": datetime.now(),
+        "updated_at": datetime.now()
+    }
+
+def _save_generated_quiz(user_id, params, questions):
+    """Store a generated quiz and return its summary"""
+    quiz = _build_quiz(user_id, params, questions)
+    
+    quiz_id = db.quizzes.insert_one(quiz).inserted_id
+    user_stats.record_quiz_created(user_id, quiz)
+    
+    return {
+        "quiz_id": str(quiz_id),
+        "title": quiz["title"],
+        "num_questions": len(questions)
+    }
+
+@quiz_bp.route('/generate/batch', methods=['POST'])
+@jwt_required()
+def generate_quiz_batch():
+    """Queue quiz generation for many study materials in one request"""
+    if not question_generator:
+        return jsonify({"error": "Question generator not available"}), 500
+    
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    
+    # Validate input
+    if not data or not isinstance(data.get('items'), list) or not data['items']:
+        return jsonify({"error": "A non-empty list of items is required"}), 400
+    
+    if len(data['items']) > Config.BATCH_GENERATION_MAX_ITEMS:
+        return jsonify({"error": f"At most {Config.BATCH_GENERATION_MAX_ITEMS} items per batch"}), 400
+    
+    # Only well-formed id strings reach the query (other JSON values may not even be hashable)
+    item_material_ids = [_batch_material_id(item) for item in data['items']]
+    
+    # Fetch every referenced material with a single query
+    material_ids = {mid for mid in item_material_ids if mid}
+    materials = {
+        str(material['_id']): material
+        for material in db.study_materials.find({
+            "_id": {"$in": [ObjectId(mid) for mid in material_ids]},
+            "user_id": user_id
+        }, GENERATION_FIELDS)
+    } if material_ids else {}
+    
+    statuses = []
+    queued = []
+    for index, (item, material_id) in enumerate(zip(data['items'], item_material_ids)):
+        status = {"index": index, "material_id": item.get('material_id') if isinstance(item, dict) else None}
+        options_error = _generation_options_error(item) if isinstance(item, dict) else None
+        
+        if not material_id:
+            status.update({"status": "invalid", "error": "Invalid material ID"})
+        elif options_error:
+            status.update({"status": "invalid", "error": options_error})
+        elif material_id not in materials:
+            status.update({"status": "not_found", "error": "Study material not found"})
+        else:
+            status["status"] = JOB_QUEUED
+            queued.append((index, _generation_params(item, materials[material_id])))
         
-        # Create quiz document
-        quiz = {
-            "title": data.get('title', f"Quiz on {material['title']}"),
-            "description": data.get('description', f"Generated quiz based on {material['title']}"),
-            "questions": questions,
-            "user_id": user_id,
-            "material_id": material_id,
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        }
-        
-        quiz_id = db.quizzes.insert_one(quiz).inserted_id
-        
-        return jsonify({
-            "message": "Quiz generated successfully",
-            "quiz_id": str(quiz_id),
-            "title": quiz["title"],
-            "num_questions": len(questions)
-        }), 201
+        statuses.append(status)
     
-    except Exception as e:
-        return jsonify({"error": f"Failed to generate quiz: {str(e)}"}), 500
+    if not queued:
+        return jsonify({"error": "No valid items to generate", "items": statuses}), 400
+    
+    # The whole batch runs as one job so it counts once against the user's limit
+    try:
+        job_id = generation_queue.submit(
+            user_id,
+            {"batch": [params for _, params in queued]},
+            lambda job_params: _create_generated_quizzes(user_id, materials, queued)
+        )
+    except UserJobLimitError as e:
+        return jsonify({"error": str(e)}), 429
+    except QueueFullError as e:
+        response = jsonify({"error": str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+    
+    response = jsonify({
+        "message": "Batch quiz generation queued",
+        "job_id": job_id,
+        "status": JOB_QUEUED,
+        "status_url": f"/api/quizzes/jobs/{job_id}",
+        "items": statuses
+    })
+    response.headers['Location'] = f"/api/quizzes/jobs/{job_id}"
+    return response, 202
+
+def _batch_material_id(item):
+    """The item's material id if it is a valid ObjectId string, otherwise None"""
+    material_id = item.get('material_id') if isinstance(item, dict) else None
+    if isinstance(material_id, str) and ObjectId.is_valid(material_id):
+        return material_id
+    return None
+
+def _create_generated_quizzes(user_id, materials, queued):
+    """Generate several quizzes concurrently and store them together (runs on a generation worker)"""
+    def generate(entry):
+        index, params = entry
+        try:
+            return index, params, _generate_for_material(user_id, materials[params['material_id']], params), None
+        except Exception as e:
+            return index, params, None, str(e)
+    
+    # The shared pool bounds concurrency however many batch jobs are running
+    outcomes = list(batch_executor.map(generate, queued))
+    
+    items = []
+    quizzes = []
+    for index, params, questions, error in outcomes:
+        if error:
+            items.append({"index": index, "material_id": params['material_id'],
+                          "status": JOB_FAILED, "error": error})
+            continue
+        quiz = _build_quiz(user_id, params, questions)
+        quizzes.append(quiz)
+        items.append({"index": index, "material_id": params['material_id'], "status": "created",
+                      "title": quiz['title'], "num_questions": len(questions), "quiz": quiz})
+    
+    if quizzes:
+        db.quizzes.insert_many(quizzes)
+        user_stats.record_quizzes_created(user_id, quizzes)
+    
+    # insert_many assigned the ids in place
+    for item in items:
+        quiz = item.pop('quiz', None)
+        if quiz is not None:
+            item['quiz_id'] = str(quiz['_id'])
+    
+    return {"items": items}
+
+@quiz_bp.route('/generate/stream', methods=['POST'])
+@jwt_required()
+def generate_quiz_stream():
+    """Generate a quiz from study material, streaming questions as server-sent events"""
+    if not question_generator:
+        return jsonify({"error": "Question generator not available"}), 500
+    
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    
+    # Validate input
+    if not data or 'material_id' not in data:
+        return jsonify({"error": "Material ID is required"}), 400
+    
+    material_id = data['material_id']
+    
+    # Validate ObjectId
+    if not ObjectId.is_valid(material_id):
+        return jsonify({"error": "Invalid material ID"}), 400
+    
+    options_error = _generation_options_error(data)
+    if options_error:
+        return jsonify({"error": options_error}), 400
+    
+    # Get study material
+    material = db.study_materials.find_one({
+        "_id": ObjectId(material_id),
+        "user_id": user_id
+    }, GENERATION_FIELDS)
+    
+    if not material:
+        return jsonify({"error": "Study material not found"}), 404
+    
+    params = _generation_params(data, material)
+    
+    def events():
+        questions = []
+        try:
+            for question in question_generator.stream_questions(
+                material['content'],
+                num_questions=params['num_questions'],
+                question_types=params['question_types'],
+                use_cache=params['use_cache'],
+                concept_index=material.get('concept_index'),
+                rank_concepts=corpus.concept_ranker(user_id)
+            ):
+                yield _sse('question', {"index": len(questions), "question": question})
+                questions.append(question)
+            
+            # Persist once every question has been sent
+            yield _sse('done', _save_generated_quiz(user_id, params, questions))
+        except Exception as e:
+            yield _sse('error', {"error": f"Failed to generate quiz: {str(e)}"})
+    
+    response = Response(events(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def _sse(event, payload):
+    """Format a server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+@quiz_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_generation_job(job_id):
+    """Get the status of a quiz generation job, optionally long-polling with ?wait=<seconds>"""
+    user_id = get_jwt_identity()
+    
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        return jsonify({"error": "Invalid wait parameter"}), 400
+    
+    wait = min(max(wait, 0), Config.GENERATION_LONG_POLL_MAX_SECONDS)
+    
+    if wait:
+        job = generation_queue.wait_for_job(job_id, user_id, wait)
+    else:
+        job = generation_queue.get_job(job_id, user_id)
+    
+    if not job:
+        return jsonify({"error": "Generation job not found"}), 404
+    
+    return jsonify(format_job(job)), 200
 
 @quiz_bp.route('/', methods=['GET'])
 @jwt_required()
@@ -98,86 +422,106 @@ def get_all_quizzes():
     """Get all quizzes for current user with pagination and filtering"""
     user_id = get_jwt_identity()
     
-    # Pagination parameters
-    page = int(request.args.get('page', 1))
-    limit = int(request.args.get('limit', 10))
-    skip = (page - 1) * limit
-    
+    # Pagination parameters (page/limit, or cursor for keyset paging)
     # Filtering parameters
-    search_query = request.args.get('search', '')
+    search_query = search_service.clean_query(request.args.get('search'))
     material_id = request.args.get('material', '')
     
+    try:
+        paging = PageRequest(request.args)
+        if search_query:
+            search_service.check_paging(paging)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
     # Create filter
     query_filter = {"user_id": user_id}
     
-    # Add search filter if provided
-    if search_query:
-        query_filter["$or"] = [
-            {"title": {"$regex": search_query, "$options": "i"}},
-            {"description": {"$regex": search_query, "$options": "i"}}
-        ]
-    
     # Add material filter if provided
     if material_id and ObjectId.is_valid(material_id):
         query_filter["material_id"] = material_id
     
-    # Count total for pagination
-    total_quizzes = db.quizzes.count_documents(query_filter)
+    # Search uses the text index and ranks by relevance
+    if search_query:
+        query_filter = search_service.text_filter(query_filter, search_query)
+    sort = dict(search_service.RELEVANCE_SORT if search_query else LISTING_SORT)
     
-    # Get quizzes with pagination
-    quizzes = list(db.quizzes.find(query_filter).sort("created_at", -1).skip(skip).limit(limit))
+    # Count total for pagination
+    total_quizzes = paging.count(db.quizzes, query_filter)
+    
+    # Get quizzes with pagination, counting questions server-side instead of
+    # pulling every question array over the wire
+    quizzes = paging.finish(db.quizzes.aggregate([
+        {"$match": paging.apply(query_filter)},
+        {"$sort": sort},
+        {"$skip": paging.skip},
+        {"$limit": paging.fetch_limit},
+        {"$project": QUIZ_SUMMARY_PROJECTION}
+    ]))
+    
+    # Look up material titles and attempt counts for the whole page at once
+    material_titles = _get_material_titles(quiz['material_id'] for quiz in quizzes)
+    attempt_counts = _get_attempt_counts([str(quiz['_id']) for quiz in quizzes], user_id)
     
     # Convert ObjectId to string and format response
     formatted_quizzes = []
     for quiz in quizzes:
-        # Get related material info
-        material = None
-        if ObjectId.is_valid(quiz['material_id']):
-            material = db.study_materials.find_one({"_id": ObjectId(quiz['material_id'])})
-        
-        # Get attempt count
-        attempt_count = db.quiz_attempts.count_documents({"quiz_id": str(quiz['_id']), "user_id": user_id})
+        quiz_id = str(quiz['_id'])
         
         formatted_quizzes.append({
-            "id": str(quiz['_id']),
+            "id": quiz_id,
             "title": quiz['title'],
             "description": quiz['description'],
-            "num_questions": len(quiz['questions']),
+            "num_questions": quiz['num_questions'],
             "created_at": quiz['created_at'].isoformat(),
             "material_id": str(quiz['material_id']),
-            "material_title": material['title'] if material else "Unknown",
-            "attempt_count": attempt_count
+            "material_title": material_titles.get(str(quiz['material_id']), "Unknown"),
+            "attempt_count": attempt_counts.get(quiz_id, 0)
         })
     
     return jsonify({
         "quizzes": formatted_quizzes,
-        "pagination": {
-            "total": total_quizzes,
-            "page": page,
-            "limit": limit,
-            "pages": (total_quizzes + limit - 1) // limit
-        }
+        "pagination": paging.to_dict(total_quizzes)
     }), 200
 
+def _get_material_titles(material_ids):
+    """Map material id -> title for a batch of materials with a single query"""
+    object_ids = list({ObjectId(mid) for mid in material_ids if ObjectId.is_valid(mid)})
+    if not object_ids:
+        return {}
+    
+    materials = db.study_materials.find({"_id": {"$in": object_ids}}, {"title": 1})
+    return {str(material['_id']): material['title'] for material in materials}
+
+def _get_attempt_counts(quiz_ids, user_id):
+    """Map quiz id -> number of attempts by the user with a single aggregation"""
+    if not quiz_ids:
+        return {}
+    
+    counts = db.quiz_attempts.aggregate([
+        {"$match": {"quiz_id": {"$in": quiz_ids}, "user_id": user_id}},
+        {"$group": {"_id": "$quiz_id", "count": {"$sum": 1}}}
+    ])
+    return {row['_id']: row['count'] for row in counts}
+
 @quiz_bp.route('/<quiz_id>', methods=['GET'])
 @jwt_required()
 def get_quiz(quiz_id):
     """Get a specific quiz with all questions"""
     user_id = get_jwt_identity()
     
-    # Add extensive debugging
-    print(f"\n--- GET QUIZ REQUEST ---")
-    print(f"Quiz ID: {quiz_id}")
-    print(f"User ID: {user_id}")
-    
     if not ObjectId.is_valid(quiz_id):
-        print(f"Invalid quiz ID format: {quiz_id}")
         return jsonify({"error": "Invalid quiz ID"}), 400
     
     # Convert user_id to string if it's an ObjectId
     if isinstance(user_id, ObjectId):
         user_id = str(user_id)
     
+    # Repeat views are served from the response cache
+    cached = response_cache.get(user_id, 'quiz', quiz_id)
+    if cached:
+        return response_cache.respond(cached)
+    
     # Try to find the quiz
     quiz = db.quizzes.find_one({
         "_id": ObjectId(quiz_id),
@@ -185,25 +529,19 @@ def get_quiz(quiz_id):
     })
     
     if not quiz:
-        print(f"Quiz not found for ID: {quiz_id}")
-        
-        # Check if quiz exists for any user to identify the issue
-        any_quiz = db.quizzes.find_one({"_id": ObjectId(quiz_id)})
-        if any_quiz:
-            print(f"Quiz exists but belongs to user: {any_quiz['user_id']}")
-        else:
-            print(f"Quiz doesn't exist in database at all")
-            
+        logger.debug("Quiz not found", extra={"quiz_id": quiz_id})
         return jsonify({"error": "Quiz not found"}), 404
     
     # Get material info
     material = None
     if ObjectId.is_valid(quiz['material_id']):
-        material = db.study_materials.find_one({"_id": ObjectId(quiz['material_id'])})
+        material = db.study_materials.find_one({"_id": ObjectId(quiz['material_id'])}, {"title": 1})
     
     # Get attempt count
     attempt_count = db.quiz_attempts.count_documents({"quiz_id": str(quiz['_id']), "user_id": user_id})
     
+    updated_at = quiz['updated_at']
+    
     # Convert ObjectId to string and format dates
     quiz['_id'] = str(quiz['_id'])
     quiz['material_id'] = str(quiz['material_id'])
@@ -214,8 +552,8 @@ def get_quiz(quiz_id):
     quiz['material_title'] = material['title'] if material else "Unknown"
     quiz['attempt_count'] = attempt_count
     
-    print(f"Quiz found and returned successfully")
-    return jsonify(quiz), 200
+    entry = response_cache.store(user_id, 'quiz', quiz_id, quiz, updated_at)
+    return response_cache.respond(entry)
 
 @quiz_bp.route('/<quiz_id>', methods=['DELETE'])
 @jwt_required()
@@ -234,8 +572,22 @@ def delete_quiz(quiz_id):
     if result.deleted_count == 0:
         return jsonify({"error": "Quiz not found or not owned by user"}), 404
     
-    # Also delete any quiz attempts
-    db.quiz_attempts.delete_many({"quiz_id": quiz_id, "user_id": user_id})
+    response_cache.invalidate(user_id, 'quiz', quiz_id)
+    
+    # Also delete any quiz attempts, keeping the dashboard totals in step
+    attempt_filter = {"quiz_id": quiz_id, "user_id": user_id}
+    removed = list(db.quiz_attempts.aggregate([
+        {"$match": attempt_filter},
+        {"$group": {"_id": None, "count": {"$sum": 1}, "sum": {"$sum": "$percentage"}}}
+    ]))
+    db.quiz_attempts.delete_many(attempt_filter)
+    
+    user_stats.record_quiz_deleted(
+        user_id,
+        ObjectId(quiz_id),
+        removed[0]['count'] if removed else 0,
+        removed[0]['sum'] if removed else 0
+    )
     
     return jsonify({"message": "Quiz deleted successfully"}), 200
 
@@ -252,24 +604,16 @@ def quiz_attempt_options(quiz_id):
 @jwt_required()
 def submit_quiz_attempt(quiz_id):
     """Submit a quiz attempt"""
-    print(f"\n--- SUBMIT QUIZ ATTEMPT ---")
-    print(f"Quiz ID: {quiz_id}")
-    print(f"Headers: {dict(request.headers)}")
-    
     try:
         user_id = get_jwt_identity()
-        print(f"User ID from JWT: {user_id}")
-        
         data = request.get_json()
-        print(f"Request data: {data}")
+        log_request_payload(logger, "Submit quiz attempt request", data)
         
         # Check if data contains answers
         if not data or 'answers' not in data:
-            print("Error: Missing answers in request")
             return jsonify({"error": "Quiz answers are required"}), 400
         
         answers = data['answers']
-        print(f"Answers received: {answers}")
         
         # Validate quiz ID
         if not ObjectId.is_valid(quiz_id):
@@ -284,89 +628,173 @@ def submit_quiz_attempt(quiz_id):
         if not quiz:
             return jsonify({"error": "Quiz not found"}), 404
         
-        # Grade the quiz
-        score = 0
-        results = []
-        
-        for i, question in enumerate(quiz['questions']):
-            question_id = str(i)  # Use index as question ID
-            user_answer = answers.get(question_id)
-            
-            # If question wasn't answered
-            if user_answer is None:
-                results.append({
-                    "question_id": i,
-                    "correct": False,
-                    "correct_answer": question['correct_answer'],
-                    "explanation": question['explanation']
-                })
-                continue
-            
-            # Check if answer is correct
-            is_correct = False
-            
-            if question['type'] == 'multiple_choice':
-                is_correct = user_answer == question['correct_answer']
-            elif question['type'] == 'true_false':
-                # Handle possible string/boolean conversion issues
-                if isinstance(user_answer, str):
-                    is_correct = (user_answer.lower() == 'true' and question['correct_answer'] is True) or \
-                                (user_answer.lower() == 'false' and question['correct_answer'] is False)
-                else:
-                    is_correct = user_answer == question['correct_answer']
-            elif question['type'] == 'short_answer':
-                # Simple exact match for short answers
-                if isinstance(user_answer, str) and isinstance(question['correct_answer'], str):
-                    is_correct = user_answer.lower() == question['correct_answer'].lower()
-                else:
-                    is_correct = user_answer == question['correct_answer']
-            
-            if is_correct:
-                score += 1
-            
-            results.append({
-                "question_id": i,
-                "correct": is_correct,
-                "correct_answer": question['correct_answer'],
-                "explanation": question['explanation']
-            })
-        
-        # Calculate percentage
-        total_questions = len(quiz['questions'])
-        percentage = (score / total_questions) * 100 if total_questions > 0 else 0
+        # Grade the quiz against its compiled answer key
+        score, results = grading.grade_quiz(quiz, answers)
         
-        # Save attempt to database
-        attempt = {
-            "quiz_id": quiz_id,  # Store as string
-            "user_id": user_id,
-            "quiz_title": quiz['title'],
-            "answers": answers,
-            "score": score,
-            "total_questions": total_questions,
-            "percentage": percentage,
-            "results": results,
-            "created_at": datetime.now()
-        }
+        # Save a compact attempt; result detail is rebuilt from the quiz on demand
+        attempt = attempts_service.build_attempt(user_id, quiz, answers, score, results)
         
         attempt_id = db.quiz_attempts.insert_one(attempt).inserted_id
-        print(f"Attempt saved with ID: {attempt_id}")
+        logger.info("Attempt saved", extra={"attempt_id": str(attempt_id), "quiz_id": quiz_id})
+        user_stats.record_attempt(user_id, attempt)
+        # The cached quiz response carries its attempt count
+        response_cache.invalidate(user_id, 'quiz', quiz_id)
         
         # Add CORS headers to response
         response = jsonify({
             "message": "Quiz attempt submitted successfully",
             "attempt_id": str(attempt_id),
             "score": score,
-            "total_questions": total_questions,
-            "percentage": percentage,
+            "total_questions": attempt['total_questions'],
+            "percentage": attempt['percentage'],
             "results": results
         })
         
         return response, 201
         
     except Exception as e:
-        print(f"Error in submit_quiz_attempt: {str(e)}")
+        logger.exception("Failed to submit quiz attempt")
         return jsonify({"error": f"Failed to submit quiz: {str(e)}"}), 500
 
+@quiz_bp.route('/attempts/batch', methods=['POST'])
+@jwt_required()
+def submit_quiz_attempts_batch():
+    """Submit many quiz attempts at once (e.g. syncing attempts collected offline)"""
+    user_id = get_jwt_identity()
+    data = request.get_json()
+    
+    # Validate input
+    if not data or not isinstance(data.get('attempts'), list) or not data['attempts']:
+        return jsonify({"error": "A non-empty list of attempts is required"}), 400
+    
+    if len(data['attempts']) > Config.BATCH_ATTEMPTS_MAX_ITEMS:
+        return jsonify({"error": f"At most {Config.BATCH_ATTEMPTS_MAX_ITEMS} attempts per batch"}), 400
+    
+    items = [{"index": index} for index in range(len(data['attempts']))]
+    pending = []
+    seen_keys = {}
+    
+    for item, entry in zip(items, data['attempts']):
+        if not isinstance(entry, dict):
+            item.update({"status": "invalid", "error": "Attempt must be an object"})
+            continue
+        
+        item['quiz_id'] = entry.get('quiz_id')
+        key = entry.get('idempotency_key')
+        if key is not None:
+            item['idempotency_key'] = key
+        
+        if not item['quiz_id'] or not ObjectId.is_valid(item['quiz_id']):
+            item.update({"status": "invalid", "error": "Invalid quiz ID"})
+        elif not isinstance(entry.get('answers'), dict):
+            item.update({"status": "invalid", "error": "Quiz answers are required"})
+        elif key is not None and not isinstance(key, str):
+            item.update({"status": "invalid", "error": "idempotency_key must be a string"})
+        elif key in seen_keys:
+            item.update({"status": "duplicate", "duplicate_of": seen_keys[key]})
+        else:
+            if key is not None:
+                seen_keys[key] = item['index']
+            pending.append((item, entry))
+    
+    # Attempts already stored by an earlier (retried) request
+    if seen_keys:
+        stored = {
+            attempt['idempotency_key']: attempt
+            for attempt in db.quiz_attempts.find(
+                {"user_id": user_id, "idempotency_key": {"$in": list(seen_keys)}},
+                ATTEMPT_RECEIPT_PROJECTION
+            )
+        }
+        remaining = []
+        for item, entry in pending:
+            attempt = stored.get(entry.get('idempotency_key'))
+            if attempt:
+                item.update(_attempt_receipt(attempt, "duplicate"))
+            else:
+                remaining.append((item, entry))
+        pending = remaining
+    
+    # Load every referenced quiz with one query
+    quizzes = {
+        str(quiz['_id']): quiz
+        for quiz in db.quizzes.find({
+            "_id": {"$in": list({ObjectId(entry['quiz_id']) for _, entry in pending})},
+            "user_id": user_id
+        })
+    } if pending else {}
+    
+    # Grade in one pass
+    attempts = []
+    graded = []
+    graded_results = []
+    for item, entry in pending:
+        quiz = quizzes.get(entry['quiz_id'])
+        if not quiz:
+            item.update({"status": "not_found", "error": "Quiz not found"})
+            continue
+        
+        score, results = grading.grade_quiz(quiz, entry['answers'])
+        attempt = attempts_service.build_attempt(user_id, quiz, entry['answers'], score, results)
+        if entry.get('idempotency_key') is not None:
+            attempt['idempotency_key'] = entry['idempotency_key']
+        attempts.append(attempt)
+        graded.append(item)
+        graded_results.append(results)
+    
+    # Persist with one unordered insert; a concurrent replay of the same key loses the race
+    failed = {}
+    if attempts:
+        try:
+            db.quiz_attempts.insert_many(attempts, ordered=False)
+        except BulkWriteError as e:
+            failed = {error['index']: error for error in e.details.get('writeErrors', [])}
+    
+    inserted = []
+    for position, (item, attempt, results) in enumerate(zip(graded, attempts, graded_results)):
+        error = failed.get(position)
+        if error is None:
+            inserted.append(attempt)
+            item.update(_attempt_receipt(attempt, "created"))
+            item['results'] = results
+            continue
+        
+        existing = None
+        if error.get('code') == DUPLICATE_KEY_ERROR and 'idempotency_key' in attempt:
+            existing = db.quiz_attempts.find_one(
+                {"user_id": user_id, "idempotency_key": attempt['idempotency_key']},
+                ATTEMPT_RECEIPT_PROJECTION
+            )
+        if existing:
+            item.update(_attempt_receipt(existing, "duplicate"))
+        else:
+            item.update({"status": "failed", "error": error.get('errmsg', 'Write failed')})
+    
+    if inserted:
+        user_stats.record_attempts(user_id, inserted)
+        for quiz_id in {attempt['quiz_id'] for attempt in inserted}:
+            response_cache.invalidate(user_id, 'quiz', quiz_id)
+    
+    counts = {}
+    for item in items:
+        counts[item['status']] = counts.get(item['status'], 0) + 1
+    
+    return jsonify({
+        "message": f"Processed {len(items)} attempts",
+        "counts": counts,
+        "items": items
+    }), 200
+
+def _attempt_receipt(attempt, status):
+    """Per-attempt entry returned by the batch endpoint"""
+    return {
+        "status": status,
+        "attempt_id": str(attempt['_id']),
+        "score": attempt['score'],
+        "total_questions": attempt['total_questions'],
+        "percentage": attempt['percentage']
+    }
+
 @quiz_bp.route('/attempts', methods=['OPTIONS'])
 def quiz_attempts_options():
     """Handle OPTIONS request for quiz attempts endpoint"""
@@ -382,15 +810,18 @@ def get_user_attempts():
     """Get all quiz attempts for the current user with pagination and filtering"""
     user_id = get_jwt_identity()
     
-    # Pagination parameters
-    page = int(request.args.get('page', 1))
-    limit = int(request.args.get('limit', 10))
-    skip = (page - 1) * limit
-    
+    # Pagination parameters (page/limit, or cursor for keyset paging)
     # Filtering parameters
-    search_query = request.args.get('search', '')
+    search_query = search_service.clean_query(request.args.get('search'))
     quiz_id = request.args.get('quiz', '')
     
+    try:
+        paging = PageRequest(request.args)
+        if search_query:
+            search_service.check_paging(paging)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
     # Date range filtering
     start_date = request.args.get('start_date', '')
     end_date = request.args.get('end_date', '')
@@ -398,10 +829,6 @@ def get_user_attempts():
     # Create filter
     query_filter = {"user_id": user_id}
     
-    # Add search filter if provided (search by quiz title)
-    if search_query:
-        query_filter["quiz_title"] = {"$regex": search_query, "$options": "i"}
-    
     # Add quiz filter if provided
     if quiz_id:
         query_filter["quiz_id"] = quiz_id
@@ -425,11 +852,17 @@ def get_user_attempts():
     if date_filter:
         query_filter["created_at"] = date_filter
     
+    # Search by quiz title through the text index, best match first
+    if search_query:
+        query_filter = search_service.text_filter(query_filter, search_query)
+    sort = search_service.RELEVANCE_SORT if search_query else LISTING_SORT
+    
     # Count total for pagination
-    total_attempts = db.quiz_attempts.count_documents(query_filter)
+    total_attempts = paging.count(db.quiz_attempts, query_filter)
     
     # Get attempts with pagination
-    attempts = list(db.quiz_attempts.find(query_filter).sort("created_at", -1).skip(skip).limit(limit))
+    attempts = paging.finish(db.quiz_attempts.find(paging.apply(query_filter), attempts_service.LISTING_PROJECTION)
+                             .sort(sort).skip(paging.skip).limit(paging.fetch_limit))
     
     # Convert ObjectId to string for JSON serialization
     for attempt in attempts:
@@ -438,22 +871,10 @@ def get_user_attempts():
         # Format dates
         if 'created_at' in attempt:
             attempt['created_at'] = attempt['created_at'].isoformat()
-        
-        # Simplify response by removing detailed results
-        if 'results' in attempt:
-            del attempt['results']
-        
-        if 'answers' in attempt:
-            del attempt['answers']
     
     return jsonify({
         "attempts": attempts,
-        "pagination": {
-            "total": total_attempts,
-            "page": page,
-            "limit": limit,
-            "pages": (total_attempts + limit - 1) // limit
-        }
+        "pagination": paging.to_dict(total_attempts)
     }), 200
 
 @quiz_bp.route('/dashboard', methods=['GET'])
@@ -462,70 +883,34 @@ def get_quiz_dashboard():
     """Get quiz dashboard data for the current user"""
     user_id = get_jwt_identity()
     
-    print(f"\n--- GET QUIZ DASHBOARD ---")
-    print(f"User ID: {user_id}")
-    
     try:
-        # Get all attempts for the user (limit to last 5 for dashboard)
-        attempts = list(db.quiz_attempts.find({"user_id": user_id}).sort("created_at", -1).limit(5))
-        
-        # Get total counts for stats
-        total_attempts = db.quiz_attempts.count_documents({"user_id": user_id})
-        total_quizzes = db.quizzes.count_documents({"user_id": user_id})
+        # All dashboard data lives in the user's materialized stats document
+        stats = user_stats.get_user_stats(user_id)
         
-        # Get actual material count
-        total_materials = db.study_materials.count_documents({"user_id": user_id})
-        
-        # Calculate average score
-        if total_attempts > 0:
-            avg_pipeline = [
-                {"$match": {"user_id": user_id}},
-                {"$group": {"_id": None, "avgScore": {"$avg": "$percentage"}}}
-            ]
-            avg_result = list(db.quiz_attempts.aggregate(avg_pipeline))
-            avg_score = round(avg_result[0]['avgScore'], 2) if avg_result else 0
-        else:
-            avg_score = 0
+        total_attempts = stats['total_attempts']
+        avg_score = round(stats['percentage_sum'] / total_attempts, 2) if total_attempts > 0 else 0
         
         # Format attempts for display
         formatted_attempts = []
-        for attempt in attempts:
-            # Convert ObjectId to string
+        for attempt in stats['recent_attempts']:
             attempt['_id'] = str(attempt['_id'])
-            
-            # Format date
-            if 'created_at' in attempt:
-                attempt['created_at'] = attempt['created_at'].isoformat()
-            
-            # Remove detailed results to make the response lighter
-            if 'results' in attempt:
-                del attempt['results']
-            
-            if 'answers' in attempt:
-                del attempt['answers']
-            
+            attempt['created_at'] = attempt['created_at'].isoformat()
             formatted_attempts.append(attempt)
         
-        # Get recent quizzes (limit to last 3)
-        recent_quizzes = list(db.quizzes.find({"user_id": user_id}).sort("created_at", -1).limit(3))
         formatted_quizzes = []
-        
-        for quiz in recent_quizzes:
+        for quiz in stats['recent_quizzes']:
             formatted_quizzes.append({
-                "id": str(quiz['_id']),
+                "id": str(quiz['id']),
                 "title": quiz['title'],
                 "description": quiz.get('description', ''),
-                "num_questions": len(quiz.get('questions', [])),
+                "num_questions": quiz['num_questions'],
                 "created_at": quiz['created_at'].isoformat()
             })
         
-        # Get recent materials (limit to last 3)
-        recent_materials = list(db.study_materials.find({"user_id": user_id}).sort("created_at", -1).limit(3))
         formatted_materials = []
-        
-        for material in recent_materials:
+        for material in stats['recent_materials']:
             formatted_materials.append({
-                "id": str(material['_id']),
+                "id": str(material['id']),
                 "title": material['title'],
                 "description": material.get('description', ''),
                 "created_at": material['created_at'].isoformat()
@@ -537,8 +922,8 @@ def get_quiz_dashboard():
             "recentMaterials": formatted_materials,
             "stats": {
                 "total_attempts": total_attempts,
-                "total_quizzes": total_quizzes,
-                "total_materials": total_materials,
+                "total_quizzes": stats['total_quizzes'],
+                "total_materials": stats['total_materials'],
                 "average_score": avg_score
             }
         }
@@ -546,7 +931,7 @@ def get_quiz_dashboard():
         return jsonify(response), 200
     
     except Exception as e:
-        print(f"Error in get_quiz_dashboard: {str(e)}")
+        logger.exception("Failed to load dashboard")
         return jsonify({"error": f"Failed to retrieve dashboard data: {str(e)}"}), 500
 
 @quiz_bp.route('/attempts/<quiz_id>', methods=['GET'])
@@ -555,10 +940,11 @@ def get_quiz_attempts(quiz_id):
     """Get all attempts for a specific quiz with pagination"""
     user_id = get_jwt_identity()
     
-    # Pagination parameters
-    page = int(request.args.get('page', 1))
-    limit = int(request.args.get('limit', 10))
-    skip = (page - 1) * limit
+    # Pagination parameters (page/limit, or cursor for keyset paging)
+    try:
+        paging = PageRequest(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
     # Create filter
     query_filter = {
@@ -567,10 +953,11 @@ def get_quiz_attempts(quiz_id):
     }
     
     # Count total for pagination
-    total_attempts = db.quiz_attempts.count_documents(query_filter)
+    total_attempts = paging.count(db.quiz_attempts, query_filter)
     
     # Get attempts with pagination
-    attempts = list(db.quiz_attempts.find(query_filter).sort("created_at", -1).skip(skip).limit(limit))
+    attempts = paging.finish(db.quiz_attempts.find(paging.apply(query_filter), attempts_service.LISTING_PROJECTION)
+                             .sort(LISTING_SORT).skip(paging.skip).limit(paging.fetch_limit))
     
     # Convert ObjectId to string for JSON serialization
     for attempt in attempts:
@@ -582,10 +969,41 @@ def get_quiz_attempts(quiz_id):
     
     return jsonify({
         "attempts": attempts,
-        "pagination": {
-            "total": total_attempts,
-            "page": page,
-            "limit": limit,
-            "pages": (total_attempts + limit - 1) // limit
-        }
-    }), 200
\ No newline at end of file
+        "pagination": paging.to_dict(total_attempts)
+    }), 200
+
+@quiz_bp.route('/<quiz_id>/attempts/<attempt_id>', methods=['GET'])
+@jwt_required()
+def get_quiz_attempt(quiz_id, attempt_id):
+    """Get one attempt with its per-question results"""
+    user_id = get_jwt_identity()
+    
+    if not ObjectId.is_valid(quiz_id) or not ObjectId.is_valid(attempt_id):
+        return jsonify({"error": "Invalid quiz or attempt ID"}), 400
+    
+    attempt = db.quiz_attempts.find_one({
+        "_id": ObjectId(attempt_id),
+        "quiz_id": quiz_id,
+        "user_id": user_id
+    })
+    
+    if not attempt:
+        return jsonify({"error": "Attempt not found"}), 404
+    
+    quiz = db.quizzes.find_one(
+        {"_id": ObjectId(quiz_id), "user_id": user_id},
+        {"questions.correct_answer": 1, "questions.explanation": 1}
+    )
+    
+    if not quiz:
+        return jsonify({"error": "Quiz not found"}), 404
+    
+    results = attempts_service.attempt_results(attempt, quiz)
+    
+    for field in ('correct_bits', 'results', 'idempotency_key'):
+        attempt.pop(field, None)
+    attempt['_id'] = str(attempt['_id'])
+    attempt['created_at'] = attempt['created_at'].isoformat()
+    attempt['results'] = results
+    
+    return jsonify({"attempt": attempt}), 200
@@ -0,0 +1,42 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from utils.pagination import PageRequest
+from services import search as search_service
+
+# Initialize blueprint
+search_bp = Blueprint('search', __name__)
+
+@search_bp.route('/', methods=['GET'])
+@jwt_required()
+def search():
+    """Ranked full-text search over the user's quizzes, materials and attempts"""
+    user_id = get_jwt_identity()
+
+    query = search_service.clean_query(request.args.get('q'))
+    if not query:
+        return jsonify({"error": "Search query is required"}), 400
+
+    # Comma-separated subset of quizzes, materials, attempts (all by default)
+    types = request.args.get('type', ','.join(search_service.SEARCH_TYPES)).split(',')
+    unknown = [t for t in types if t not in search_service.SEARCH_TYPES]
+    if unknown:
+        return jsonify({"error": f"Unknown search type: {', '.join(unknown)}"}), 400
+
+    # Same page/limit parameters as the listings, applied to each type
+    try:
+        paging = PageRequest(request.args, default_limit=5)
+        search_service.check_paging(paging)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    results = {}
+    pagination = {}
+    for search_type in dict.fromkeys(types):
+        results[search_type], total = search_service.search(user_id, query, search_type, paging)
+        pagination[search_type] = paging.to_dict(total)
+
+    return jsonify({
+        "query": query,
+        "results": results,
+        "pagination": pagination
+    }), 200
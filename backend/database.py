@@ -0,0 +1,172 @@
+# backend/database.py
+import os
+import threading
+import pymongo
+from pymongo import monitoring
+from config import Config
+from utils.metrics import record_mongo_command
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Track connection pool activity for monitoring"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {
+                "connections_created": 0,
+                "connections_closed": 0,
+                "checked_out": 0,
+                "checkout_failures": 0,
+                "in_use": 0,
+                "pools_cleared": 0
+            }
+
+    def _inc(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._inc("pools_cleared")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._inc("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._inc("connections_closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._inc("checkout_failures")
+
+    def connection_checked_out(self, event):
+        with self._lock:
+            self.counters["checked_out"] += 1
+            self.counters["in_use"] += 1
+
+    def connection_checked_in(self, event):
+        self._inc("in_use", -1)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats["open"] = stats["connections_created"] - stats["connections_closed"]
+        return stats
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Feed MongoDB command timings into the metrics registry"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        record_mongo_command(event.command_name, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        record_mongo_command(event.command_name, event.duration_micros / 1e6, failed=True)
+
+
+_pool_listener = PoolStatsListener()
+_command_listener = CommandMetricsListener()
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def _write_concern():
+    """Parse MONGO_WRITE_CONCERN ('majority', '1', ...) into a MongoClient option"""
+    w = Config.MONGO_WRITE_CONCERN
+    return int(w) if w.isdigit() else w
+
+
+def get_client():
+    """Return the process-wide MongoClient, creating it on first use.
+
+    The client is created lazily and re-created when the process id changes so
+    that every forked gunicorn worker gets its own pool and monitor threads.
+    """
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            if _client_pid != pid:
+                _pool_listener.reset()
+            _client = pymongo.MongoClient(
+                Config.MONGO_URI,
+                maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
+                minPoolSize=Config.MONGO_MIN_POOL_SIZE,
+                maxIdleTimeMS=Config.MONGO_MAX_IDLE_TIME_MS,
+                waitQueueTimeoutMS=Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                serverSelectionTimeoutMS=Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                connectTimeoutMS=Config.MONGO_CONNECT_TIMEOUT_MS,
+                readPreference=Config.MONGO_READ_PREFERENCE,
+                w=_write_concern(),
+                event_listeners=[_pool_listener, _command_listener]
+            )
+            _client_pid = pid
+    return _client
+
+
+def get_db():
+    """Return the application database"""
+    return get_client()[Config.MONGO_DB_NAME]
+
+
+class _LazyCollection:
+    """Collection handle that resolves against the current process's client on every use"""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_db()[self._name], attr)
+
+    def __repr__(self):
+        return f"<LazyCollection {self._name}>"
+
+
+class _LazyDatabase:
+    """Module-level stand-in for the database so blueprints can bind ``db`` at import time"""
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return _LazyCollection(name)
+
+    def __getitem__(self, name):
+        return _LazyCollection(name)
+
+
+db = _LazyDatabase()
+
+
+def pool_stats():
+    """Return connection pool configuration and activity for monitoring"""
+    return {
+        "initialized": _client is not None and _client_pid == os.getpid(),
+        "max_pool_size": Config.MONGO_MAX_POOL_SIZE,
+        "min_pool_size": Config.MONGO_MIN_POOL_SIZE,
+        **_pool_listener.snapshot()
+    }
@@ -0,0 +1,177 @@
+# backend/indexes.py
+import click
+from flask.cli import AppGroup
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from config import Config
+from database import get_db
+
+# Indexes required by the hot queries, per collection
+INDEX_SPECS = {
+    "users": [
+        # Login / registration lookups
+        {"keys": [("email", ASCENDING)], "name": "email_unique", "unique": True}
+    ],
+    "study_materials": [
+        # Material listing and dashboard
+        {"keys": [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+         "name": "user_created_id"},
+        # Material search (queries always match user_id exactly)
+        {"keys": [("user_id", ASCENDING), ("title", TEXT), ("description", TEXT), ("tags", TEXT),
+                  ("content", TEXT)],
+         "name": "user_text",
+         "weights": {"title": 10, "tags": 5, "description": 3, "content": 1}}
+    ],
+    "quizzes": [
+        # Quiz listing (page and cursor modes) and dashboard
+        {"keys": [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+         "name": "user_created_id"},
+        # Quiz listing filtered by material, and cleanup on material delete
+        {"keys": [("material_id", ASCENDING), ("user_id", ASCENDING), ("created_at", DESCENDING),
+                  ("_id", DESCENDING)],
+         "name": "material_user_created_id"},
+        # Quiz search
+        {"keys": [("user_id", ASCENDING), ("title", TEXT), ("description", TEXT)],
+         "name": "user_text",
+         "weights": {"title": 5, "description": 1}}
+    ],
+    "quiz_attempts": [
+        # Attempt history (page and cursor modes) and dashboard
+        {"keys": [("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+         "name": "user_created_id"},
+        # Attempts for a quiz, attempt counts and cleanup on quiz delete
+        {"keys": [("user_id", ASCENDING), ("quiz_id", ASCENDING), ("created_at", DESCENDING),
+                  ("_id", DESCENDING)],
+         "name": "user_quiz_created_id"},
+        # Makes replayed batch submissions idempotent
+        {"keys": [("user_id", ASCENDING), ("idempotency_key", ASCENDING)],
+         "name": "user_idempotency_key_unique", "unique": True,
+         "partialFilterExpression": {"idempotency_key": {"$type": "string"}}},
+        # Attempt search by quiz title
+        {"keys": [("user_id", ASCENDING), ("quiz_title", TEXT)],
+         "name": "user_text",
+         "weights": {"quiz_title": 1}}
+    ],
+    "generation_jobs": [
+        # Per-user active job limit
+        {"keys": [("user_id", ASCENDING), ("status", ASCENDING), ("updated_at", DESCENDING)],
+         "name": "user_status_updated"},
+        # Startup sweep for jobs abandoned by dead workers
+        {"keys": [("status", ASCENDING), ("updated_at", ASCENDING)], "name": "status_updated"},
+        # Expire finished jobs (queued and running jobs have no finished_at)
+        {"keys": [("finished_at", ASCENDING)], "name": "finished_at_ttl",
+         "expireAfterSeconds": Config.GENERATION_JOB_TTL_SECONDS}
+    ],
+    "corpus_terms": [
+        # Document-frequency lookups and incremental updates
+        {"keys": [("user_id", ASCENDING), ("term", ASCENDING)], "name": "user_term_unique", "unique": True}
+    ],
+    "question_cache": [
+        # Expire cached generations
+        {"keys": [("created_at", ASCENDING)], "name": "created_at_ttl",
+         "expireAfterSeconds": Config.QUESTION_CACHE_TTL_SECONDS}
+    ]
+}
+
+# Options compared when checking for drift
+COMPARED_OPTIONS = ('unique', 'sparse', 'expireAfterSeconds', 'partialFilterExpression', 'weights')
+
+
+def _options(spec):
+    return {k: v for k, v in spec.items() if k not in ('keys', 'name')}
+
+
+def _stored_keys(keys):
+    """Key pattern as the server reports it (text fields collapse into _fts/_ftsx)"""
+    stored = []
+    for field, direction in keys:
+        if direction != TEXT:
+            stored.append((field, direction))
+        elif ('_fts', TEXT) not in stored:
+            stored += [('_fts', TEXT), ('_ftsx', 1)]
+    return stored
+
+
+def ensure_indexes(db=None):
+    """Create every declared index, skipping ones that already exist.
+
+    Returns a list of problems (indexes that could not be built).
+    """
+    db = db if db is not None else get_db()
+    problems = []
+
+    for collection_name, specs in INDEX_SPECS.items():
+        models = [IndexModel(spec['keys'], name=spec['name'], background=True, **_options(spec))
+                  for spec in specs]
+        try:
+            db[collection_name].create_indexes(models)
+        except OperationFailure as e:
+            # Usually an existing index with the same name but different keys/options
+            problems.append(f"{collection_name}: {e}")
+
+    return problems
+
+
+def check_indexes(db=None):
+    """Compare declared indexes with what exists in the database.
+
+    Returns a dict of collection -> {"missing": [...], "changed": [...], "unexpected": [...]}
+    for every collection that has drifted.
+    """
+    db = db if db is not None else get_db()
+    drift = {}
+
+    for collection_name, specs in INDEX_SPECS.items():
+        existing = db[collection_name].index_information()
+        existing.pop('_id_', None)
+
+        missing, changed = [], []
+        for spec in specs:
+            info = existing.pop(spec['name'], None)
+            if info is None:
+                missing.append(spec['name'])
+                continue
+
+            keys_match = [tuple(k) for k in info['key']] in (
+                [tuple(k) for k in spec['keys']], _stored_keys(spec['keys']))
+            options_match = all(info.get(opt) == spec.get(opt) for opt in COMPARED_OPTIONS
+                                if opt in spec or opt in info)
+            if not keys_match or not options_match:
+                changed.append(spec['name'])
+
+        if missing or changed or existing:
+            drift[collection_name] = {
+                "missing": missing,
+                "changed": changed,
+                "unexpected": sorted(existing)
+            }
+
+    return drift
+
+
+index_cli = AppGroup('indexes', help='Manage MongoDB indexes.')
+
+
+@index_cli.command('ensure')
+def ensure_indexes_command():
+    """Create missing indexes and report drift."""
+    for problem in ensure_indexes():
+        click.echo(f"ERROR {problem}")
+
+    drift = check_indexes()
+    if not drift:
+        click.echo("All indexes are in place")
+    for collection_name, report in drift.items():
+        click.echo(f"{collection_name}: {report}")
+
+
+@index_cli.command('check')
+def check_indexes_command():
+    """Report index drift without changing anything."""
+    drift = check_indexes()
+    if not drift:
+        click.echo("All indexes are in place")
+        return
+    for collection_name, report in drift.items():
+        click.echo(f"{collection_name}: {report}")
+    raise SystemExit(1)
@@ -0,0 +1,62 @@
+import click
+from datetime import datetime
+from flask.cli import AppGroup
+from pymongo import UpdateOne
+from database import db
+from services import grading
+
+# Attempts store a correctness bitmap and the raw answers; the answer key stays on the quiz
+LISTING_PROJECTION = {"answers": 0, "results": 0, "correct_bits": 0, "idempotency_key": 0}
+
+
+def build_attempt(user_id, quiz, answers, score, results):
+    """Compact attempt document for a graded submission"""
+    total_questions = len(quiz['questions'])
+    return {
+        "quiz_id": str(quiz['_id']),
+        "user_id": user_id,
+        "quiz_title": quiz['title'],
+        "answers": answers,
+        "score": score,
+        "total_questions": total_questions,
+        "percentage": (score / total_questions) * 100 if total_questions > 0 else 0,
+        "correct_bits": grading.pack_correctness(results),
+        "created_at": datetime.now()
+    }
+
+
+def attempt_results(attempt, quiz):
+    """Per-question results of a stored attempt (older attempts still carry them inline)"""
+    if 'correct_bits' in attempt:
+        return grading.expand_results(quiz, attempt['correct_bits'])
+    return attempt.get('results', [])
+
+
+def compact_attempts(batch_size=500):
+    """Rewrite attempts that still store full results into the compact form"""
+    compacted = 0
+    pending = []
+
+    for attempt in db.quiz_attempts.find({"results": {"$exists": True}}, {"results.correct": 1}):
+        pending.append(UpdateOne(
+            {"_id": attempt['_id']},
+            {"$set": {"correct_bits": grading.pack_correctness(attempt['results'])},
+             "$unset": {"results": ""}}
+        ))
+        if len(pending) >= batch_size:
+            compacted += db.quiz_attempts.bulk_write(pending, ordered=False).modified_count
+            pending = []
+
+    if pending:
+        compacted += db.quiz_attempts.bulk_write(pending, ordered=False).modified_count
+    return compacted
+
+
+attempts_cli = AppGroup('attempts', help='Maintain stored quiz attempts.')
+
+
+@attempts_cli.command('compact')
+@click.option('--batch-size', default=500, show_default=True, help='Updates per bulk write.')
+def compact_attempts_command(batch_size):
+    """Replace stored per-question results with a correctness bitmap."""
+    click.echo(f"Compacted {compact_attempts(batch_size)} attempt(s)")
@@ -0,0 +1,202 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import click
+from flask.cli import AppGroup
+from pymongo import UpdateOne
+from config import Config
+from database import db
+from ai.concept_index import CONCEPT_INDEX_VERSION, extract_terms, is_current
+from ai.tfidf import rank_terms
+
+logger = logging.getLogger(__name__)
+
+# Tokenizer version a material's terms were counted with; its terms are re-derived
+# from its content, which is only valid while the tokenizer is unchanged
+VERSION_FIELD = 'corpus_version'
+
+# Document-frequency writes (one upsert per term) run here, off the request thread.
+# A single worker applies them in submission order.
+_updates = ThreadPoolExecutor(max_workers=1, thread_name_prefix='corpus')
+
+# user_id -> {"expires": float, "n_docs": int, "df": {term: count}}, least recently used first.
+# Published entries are never mutated; lookups that add terms replace the entry.
+_df_cache = OrderedDict()
+_df_cache_lock = threading.Lock()
+
+
+def _invalidate(user_id):
+    with _df_cache_lock:
+        _df_cache.pop(user_id, None)
+
+
+def _apply_terms(user_id, terms, delta):
+    """Add delta to the document frequency of every term"""
+    if not terms:
+        return
+    db.corpus_terms.bulk_write([
+        UpdateOne({"user_id": user_id, "term": term}, {"$inc": {"df": delta}}, upsert=True)
+        for term in terms
+    ], ordered=False)
+    if delta < 0:
+        db.corpus_terms.delete_many({"user_id": user_id, "df": {"$lte": 0}})
+
+
+def corpus_fields():
+    """Fields to store on a material whose content is being counted"""
+    return {VERSION_FIELD: CONCEPT_INDEX_VERSION}
+
+
+def _counted_terms(material):
+    """Terms a material contributed, or None if they were counted with another tokenizer"""
+    if material.get(VERSION_FIELD) != CONCEPT_INDEX_VERSION:
+        return None
+    return set(extract_terms(material.get('content', '')))
+
+
+def _submit(func, user_id, *args):
+    def run():
+        try:
+            func(user_id, *args)
+        except Exception:
+            logger.exception("Corpus update failed", extra={"user_id": user_id})
+    return _updates.submit(run)
+
+
+def _add(user_id, text, terms):
+    terms = terms if terms is not None else extract_terms(text)
+    _apply_terms(user_id, list(terms), 1)
+    db.corpus_stats.update_one({"_id": user_id}, {"$inc": {"doc_count": 1}}, upsert=True)
+    _invalidate(user_id)
+
+
+def _remove(user_id, material):
+    old_terms = _counted_terms(material)
+    if old_terms is None:
+        # Counted under an older tokenizer: the exact terms are unknown, recount instead
+        rebuild_corpus(user_id)
+        return
+    _apply_terms(user_id, list(old_terms), -1)
+    db.corpus_stats.update_one({"_id": user_id}, {"$inc": {"doc_count": -1}})
+    _invalidate(user_id)
+
+
+def _replace(user_id, material, new_text, new_terms):
+    old_terms = _counted_terms(material)
+    if old_terms is None:
+        rebuild_corpus(user_id)
+        return
+    new_terms = set(new_terms if new_terms is not None else extract_terms(new_text))
+    _apply_terms(user_id, list(new_terms - old_terms), 1)
+    _apply_terms(user_id, list(old_terms - new_terms), -1)
+    _invalidate(user_id)
+
+
+def add_document(user_id, text, terms=None):
+    """Count a new material in the user's document-frequency table (in the background).
+
+    Store corpus_fields() on the material so its terms can be re-derived later.
+    """
+    return _submit(_add, user_id, text, terms)
+
+
+def remove_document(user_id, material):
+    """Remove a deleted material (with its content and version) from the user's table"""
+    return _submit(_remove, user_id, material)
+
+
+def replace_document(user_id, material, new_text, new_terms=None):
+    """Update document frequencies for a material whose content changed"""
+    return _submit(_replace, user_id, material, new_text, new_terms)
+
+
+def document_frequencies(user_id, terms):
+    """Return (n_docs, {term: df}) for the requested terms, cached per process"""
+    now = time.monotonic()
+    with _df_cache_lock:
+        entry = _df_cache.get(user_id)
+        if entry and entry['expires'] > now:
+            _df_cache.move_to_end(user_id)
+        else:
+            entry = None
+
+    cached = entry is not None
+    if not cached:
+        stats = db.corpus_stats.find_one({"_id": user_id})
+        entry = {
+            "expires": now + Config.CORPUS_DF_CACHE_SECONDS,
+            "n_docs": stats['doc_count'] if stats else 0,
+            "df": {}
+        }
+
+    missing = [term for term in set(terms) if term not in entry['df']]
+    if cached and not missing:
+        return entry['n_docs'], entry['df']
+
+    found = {doc['term']: doc['df'] for doc in db.corpus_terms.find(
+        {"user_id": user_id, "term": {"$in": missing}}, {"term": 1, "df": 1})} if missing else {}
+    # Copy-on-write so other threads keep reading the dict they were given
+    entry = {**entry, "df": {**entry['df'], **{term: found.get(term, 0) for term in missing}}}
+
+    with _df_cache_lock:
+        _df_cache[user_id] = entry
+        _df_cache.move_to_end(user_id)
+        while len(_df_cache) > Config.CORPUS_DF_CACHE_SIZE:
+            _df_cache.popitem(last=False)
+
+    return entry['n_docs'], entry['df']
+
+
+def rank_materials(user_id, materials, num_concepts=10):
+    """Score many materials against the user's corpus in one batch.
+
+    Returns {material _id: [concepts]} for materials with a current concept index.
+    """
+    indexed = [m for m in materials if is_current(m.get('concept_index'), m.get('content', ''))]
+    if not indexed:
+        return {}
+
+    batch = [m['concept_index']['terms'] for m in indexed]
+    n_docs, df = document_frequencies(user_id, [term for terms in batch for term, _ in terms])
+    ranked = rank_terms(batch, df, n_docs, top_k=num_concepts)
+    return {m['_id']: concepts for m, concepts in zip(indexed, ranked)}
+
+
+def concept_ranker(user_id, num_concepts=10):
+    """Callable for QuestionGenerator that ranks one material's index against the corpus"""
+    def rank(concept_index):
+        batch = [concept_index['terms']]
+        n_docs, df = document_frequencies(user_id, [term for term, _ in batch[0]])
+        return rank_terms(batch, df, n_docs, top_k=num_concepts)[0]
+    return rank
+
+
+def rebuild_corpus(user_id):
+    """Recompute a user's document-frequency table from their materials"""
+    db.corpus_terms.delete_many({"user_id": user_id})
+    doc_count = 0
+    for material in db.study_materials.find({"user_id": user_id}, {"content": 1}):
+        _apply_terms(user_id, list(extract_terms(material['content'])), 1)
+        # Record the tokenizer so later removals re-derive the same terms
+        # (and drop the term lists older versions stored on the material)
+        db.study_materials.update_one({"_id": material['_id']},
+                                      {"$set": corpus_fields(), "$unset": {"counted_terms": ""}})
+        doc_count += 1
+    db.corpus_stats.replace_one({"_id": user_id}, {"_id": user_id, "doc_count": doc_count}, upsert=True)
+    _invalidate(user_id)
+    return doc_count
+
+
+corpus_cli = AppGroup('corpus', help='Manage TF-IDF corpus statistics.')
+
+
+@corpus_cli.command('rebuild')
+@click.option('--user-id', default=None, help='Rebuild a single user instead of everyone.')
+def rebuild_corpus_command(user_id):
+    """Recompute document frequencies from the study materials."""
+    user_ids = [user_id] if user_id else db.study_materials.distinct('user_id')
+    for uid in user_ids:
+        rebuild_corpus(uid)
+    click.echo(f"Rebuilt corpus statistics for {len(user_ids)} user(s)")
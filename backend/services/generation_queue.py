@@ -0,0 +1,269 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+# Job states
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+ACTIVE_STATES = [JOB_QUEUED, JOB_RUNNING]
+TERMINAL_STATES = [JOB_COMPLETED, JOB_FAILED]
+
+
+class QueueFullError(Exception):
+    """Raised when the worker pool already has the maximum number of pending jobs"""
+
+
+class UserJobLimitError(Exception):
+    """Raised when a user already has the maximum number of active jobs"""
+
+
+class GenerationQueue:
+    """Bounded worker pool for quiz generation jobs with job state stored in MongoDB.
+
+    Each user's active jobs are counted in one ``slots_collection`` document
+    ({"_id": user_id, "active": n}) so the per-user limit holds across workers.
+    While a process holds jobs it refreshes their ``updated_at`` every
+    ``heartbeat_seconds``, so only jobs whose process died go stale.
+    """
+
+    def __init__(self, jobs_collection, slots_collection, max_workers=4, max_pending=32,
+                 max_jobs_per_user=2, stale_after_seconds=600, poll_interval=0.5,
+                 heartbeat_seconds=None):
+        self.jobs = jobs_collection
+        self.slots = slots_collection
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_jobs_per_user = max_jobs_per_user
+        self.stale_after = timedelta(seconds=stale_after_seconds)
+        self.poll_interval = poll_interval
+        self.heartbeat_seconds = heartbeat_seconds or max(stale_after_seconds / 4, 1)
+
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self._events = {}
+
+    def _get_executor(self):
+        """Create the worker pool lazily so every forked worker process gets its own threads"""
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='quiz-generation')
+            self._pid = pid
+            self._pending = 0
+            self._events = {}
+            threading.Thread(target=self._heartbeat_loop, args=(pid,), daemon=True,
+                             name='quiz-generation-heartbeat').start()
+        return self._executor
+
+    def _heartbeat_loop(self, pid):
+        while self._pid == pid:
+            time.sleep(self.heartbeat_seconds)
+            try:
+                self.heartbeat()
+            except Exception:
+                logger.exception("Error refreshing generation jobs")
+
+    def heartbeat(self):
+        """Refresh updated_at on the active jobs held by this process; returns how many"""
+        with self._lock:
+            job_ids = [ObjectId(job_id) for job_id in self._events]
+        if not job_ids:
+            return 0
+        result = self.jobs.update_many(
+            {"_id": {"$in": job_ids}, "status": {"$in": ACTIVE_STATES}},
+            {"$set": {"updated_at": datetime.now()}}
+        )
+        return result.modified_count
+
+    def _claim_slot(self, user_id):
+        """Atomically take one of the user's job slots; False if all are in use"""
+        try:
+            # At the limit the filter misses and the upsert collides with the existing counter
+            self.slots.find_one_and_update(
+                {"_id": user_id, "active": {"$lt": self.max_jobs_per_user}},
+                {"$inc": {"active": 1}, "$set": {"updated_at": datetime.now()}},
+                upsert=True
+            )
+            return True
+        except DuplicateKeyError:
+            return False
+
+    def _release_slot(self, user_id):
+        self.slots.update_one(
+            {"_id": user_id, "active": {"$gt": 0}},
+            {"$inc": {"active": -1}, "$set": {"updated_at": datetime.now()}}
+        )
+
+    def acquire_slot(self, user_id):
+        """Take a job slot, first freeing slots held by jobs abandoned by dead workers if needed"""
+        if self._claim_slot(user_id):
+            return True
+        return self.fail_stale_jobs(user_id) > 0 and self._claim_slot(user_id)
+
+    def fail_stale_jobs(self, user_id=None):
+        """Mark queued or running jobs not updated within stale_after as failed.
+
+        Jobs held by a live process are kept fresh by heartbeat(). Releases each job's slot and returns the number of jobs marked.
+        """
+        query = {"status": {"$in": ACTIVE_STATES},
+                 "updated_at": {"$lt": datetime.now() - self.stale_after}}
+        if user_id is not None:
+            query["user_id"] = user_id
+
+        failed = 0
+        for job in self.jobs.find(query, {"user_id": 1}):
+            now = datetime.now()
+            # Re-check the state so a job finishing right now is left alone
+            result = self.jobs.update_one(
+                {"_id": job['_id'], "status": {"$in": ACTIVE_STATES}},
+                {"$set": {"status": JOB_FAILED, "error": "Generation was interrupted, please try again",
+                          "finished_at": now, "updated_at": now}}
+            )
+            if result.modified_count:
+                self._release_slot(job['user_id'])
+                failed += 1
+
+        if failed:
+            logger.warning("Marked stale generation jobs as failed", extra={"jobs": failed})
+        return failed
+
+    def submit(self, user_id, params, handler):
+        """Record a queued job and hand it to the worker pool.
+
+        ``handler(params)`` runs on a worker thread and returns a dict that is
+        stored as the job result once it completes.
+        """
+        if not self.acquire_slot(user_id):
+            raise UserJobLimitError(
+                f"You already have {self.max_jobs_per_user} quiz generations in progress")
+
+        with self._lock:
+            executor = self._get_executor()
+            queue_full = self._pending >= self.max_pending
+            if not queue_full:
+                self._pending += 1
+        if queue_full:
+            self._release_slot(user_id)
+            raise QueueFullError("Quiz generation queue is full, please retry shortly")
+
+        try:
+            now = datetime.now()
+            job_id = self.jobs.insert_one({
+                "user_id": user_id,
+                "status": JOB_QUEUED,
+                "params": params,
+                "result": None,
+                "error": None,
+                "created_at": now,
+                "updated_at": now
+            }).inserted_id
+
+            with self._lock:
+                self._events[str(job_id)] = threading.Event()
+
+            executor.submit(self._run, job_id, user_id, params, handler)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            self._release_slot(user_id)
+            raise
+
+        return str(job_id)
+
+    def _run(self, job_id, user_id, params, handler):
+        """Execute a job on a worker thread and persist its outcome"""
+        try:
+            started = self.jobs.update_one(
+                {"_id": job_id, "status": JOB_QUEUED},
+                {"$set": {"status": JOB_RUNNING, "started_at": datetime.now(),
+                          "updated_at": datetime.now()}}
+            )
+            if not started.modified_count:
+                # Already failed as stale, which released its slot
+                return
+
+            try:
+                result = handler(params)
+                update = {"status": JOB_COMPLETED, "result": result}
+            except Exception as e:
+                logger.exception("Generation job failed", extra={"job_id": str(job_id)})
+                update = {"status": JOB_FAILED, "error": str(e)}
+
+            update["finished_at"] = datetime.now()
+            update["updated_at"] = update["finished_at"]
+            # Only the transition out of running frees the slot, so it is released exactly once
+            finished = self.jobs.update_one({"_id": job_id, "status": JOB_RUNNING}, {"$set": update})
+            if finished.modified_count:
+                self._release_slot(user_id)
+        except Exception:
+            logger.exception("Error recording generation job", extra={"job_id": str(job_id)})
+        finally:
+            with self._lock:
+                self._pending -= 1
+                event = self._events.pop(str(job_id), None)
+            if event:
+                event.set()
+
+    def get_job(self, job_id, user_id):
+        """Get a job owned by the user, or None"""
+        if not ObjectId.is_valid(job_id):
+            return None
+        return self.jobs.find_one({"_id": ObjectId(job_id), "user_id": user_id})
+
+    def wait_for_job(self, job_id, user_id, timeout):
+        """Long-poll a job until it reaches a terminal state or the timeout expires"""
+        deadline = time.monotonic() + max(timeout, 0)
+        job = self.get_job(job_id, user_id)
+
+        while job and job['status'] not in TERMINAL_STATES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            with self._lock:
+                event = self._events.get(job_id)
+
+            # Jobs running in this process signal completion directly;
+            # jobs owned by another worker process are polled
+            if event:
+                event.wait(remaining)
+            else:
+                time.sleep(min(self.poll_interval, remaining))
+
+            job = self.get_job(job_id, user_id)
+
+        return job
+
+    def stats(self):
+        """Return worker pool statistics for monitoring"""
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "pending": self._pending,
+                "max_pending": self.max_pending,
+                "max_jobs_per_user": self.max_jobs_per_user
+            }
+
+
+def format_job(job):
+    """Convert a job document to its JSON representation"""
+    return {
+        "job_id": str(job['_id']),
+        "status": job['status'],
+        "result": job.get('result'),
+        "error": job.get('error'),
+        "created_at": job['created_at'].isoformat(),
+        "updated_at": job['updated_at'].isoformat()
+    }
@@ -0,0 +1,191 @@
+import re
+import threading
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from config import Config
+
+NON_WORD = re.compile(r'[^\w\s]')
+
+# name -> (prepare(expected) -> normalized expected, grade(expected, answer) -> bool)
+GRADERS = {}
+
+# Question type -> grader name (short answers use Config.SHORT_ANSWER_GRADER)
+DEFAULT_GRADERS = {
+    "multiple_choice": "exact",
+    "true_false": "boolean",
+}
+
+
+def register_grader(name, prepare=None):
+    """Register a grading function under ``name``.
+
+    ``prepare`` normalizes the expected answer once when a plan is compiled;
+    the decorated function receives that value and the raw user answer.
+    """
+    def decorator(grade):
+        GRADERS[name] = (prepare or (lambda expected: expected), grade)
+        return grade
+    return decorator
+
+
+def _normalize_text(value):
+    return ' '.join(NON_WORD.sub('', value.lower()).split())
+
+
+def _token_set(value):
+    return frozenset(_normalize_text(value).split())
+
+
+@register_grader('exact')
+def _grade_exact(expected, answer):
+    return answer == expected
+
+
+@register_grader('boolean')
+def _grade_boolean(expected, answer):
+    if isinstance(answer, str):
+        answer = answer.lower()
+        return (answer == 'true' and expected is True) or (answer == 'false' and expected is False)
+    return answer == expected
+
+
+@register_grader('case_insensitive', prepare=lambda e: e.lower() if isinstance(e, str) else e)
+def _grade_case_insensitive(expected, answer):
+    if isinstance(answer, str) and isinstance(expected, str):
+        return answer.lower() == expected
+    return answer == expected
+
+
+@register_grader('token_overlap', prepare=lambda e: _token_set(e) if isinstance(e, str) else e)
+def _grade_token_overlap(expected, answer):
+    if not isinstance(expected, frozenset) or not isinstance(answer, str):
+        return answer == expected
+    if not expected:
+        return not _token_set(answer)
+    return len(expected & _token_set(answer)) / len(expected) >= Config.SHORT_ANSWER_MATCH_THRESHOLD
+
+
+@register_grader('fuzzy', prepare=lambda e: _normalize_text(e) if isinstance(e, str) else e)
+def _grade_fuzzy(expected, answer):
+    if not isinstance(expected, str) or not isinstance(answer, str):
+        return answer == expected
+    answer = _normalize_text(answer)
+    if answer == expected:
+        return True
+    return SequenceMatcher(None, expected, answer).ratio() >= Config.SHORT_ANSWER_MATCH_THRESHOLD
+
+
+def _never(expected, answer):
+    return False
+
+
+def grader_for(question, short_answer_grader=None):
+    """Name of the grader for a question (a question may name its own)"""
+    if question.get('grader') in GRADERS:
+        return question['grader']
+    if question.get('type') == 'short_answer':
+        return short_answer_grader or Config.SHORT_ANSWER_GRADER
+    return DEFAULT_GRADERS.get(question.get('type'))
+
+
+def compile_plan(questions, short_answer_grader=None):
+    """Compile an answer key into a grading plan.
+
+    Each step is ``(answer key, grade, normalized expected, correct answer, explanation)``.
+    """
+    plan = []
+    for i, question in enumerate(questions):
+        name = grader_for(question, short_answer_grader)
+        if name in GRADERS:
+            prepare, grade = GRADERS[name]
+            expected = prepare(question.get('correct_answer'))
+        else:
+            # Unknown question types are never marked correct
+            grade, expected = _never, None
+        plan.append((str(i), grade, expected, question.get('correct_answer'), question.get('explanation')))
+    return tuple(plan)
+
+
+def grade(plan, answers):
+    """Grade answers ({"<index>": answer}) against a compiled plan; returns (score, results)"""
+    score = 0
+    results = []
+    for i, (key, grade_answer, expected, correct_answer, explanation) in enumerate(plan):
+        answer = answers.get(key)
+        correct = answer is not None and grade_answer(expected, answer)
+        score += correct
+        results.append({
+            "question_id": i,
+            "correct": correct,
+            "correct_answer": correct_answer,
+            "explanation": explanation
+        })
+    return score, results
+
+
+def pack_correctness(results):
+    """Pack per-question correctness into a bitmap (bit i of byte i // 8 is question i)"""
+    bits = bytearray((len(results) + 7) // 8)
+    for i, result in enumerate(results):
+        if result['correct']:
+            bits[i >> 3] |= 1 << (i & 7)
+    return bytes(bits)
+
+
+def unpack_correctness(bits, count):
+    """Inverse of pack_correctness"""
+    return [bool(bits[i >> 3] & (1 << (i & 7))) if (i >> 3) < len(bits) else False
+            for i in range(count)]
+
+
+def expand_results(quiz, bits):
+    """Rebuild the per-question result detail of a stored attempt from the quiz's answer key"""
+    questions = quiz['questions']
+    return [{
+        "question_id": i,
+        "correct": correct,
+        "correct_answer": question.get('correct_answer'),
+        "explanation": question.get('explanation')
+    } for i, (question, correct) in enumerate(zip(questions, unpack_correctness(bits, len(questions))))]
+
+
+class PlanCache:
+    """Small LRU of compiled plans keyed by quiz id and updated_at"""
+
+    def __init__(self, size):
+        self.size = size
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_plan(self, quiz):
+        key = (str(quiz['_id']), quiz.get('updated_at'))
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+
+        plan = compile_plan(quiz['questions'])
+
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.size:
+                self._plans.popitem(last=False)
+        return plan
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._plans), "max_size": self.size,
+                    "hits": self.hits, "misses": self.misses}
+
+
+plan_cache = PlanCache(Config.GRADING_PLAN_CACHE_SIZE)
+
+
+def grade_quiz(quiz, answers):
+    """Grade a submission against a quiz document using the cached plan"""
+    return grade(plan_cache.get_plan(quiz), answers)
@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+from config import Config
+
+# Latency samples kept per operation for percentiles
+LATENCY_WINDOW = 512
+
+
+class HasherBusyError(Exception):
+    """Raised when too many hash operations are already queued or one takes too long"""
+
+
+def normalize_method(method):
+    """Spell out PBKDF2 iterations the way Werkzeug records them in a hash"""
+    if method.startswith('pbkdf2:') and method.count(':') == 1:
+        return f"{method}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return method
+
+
+class PasswordHasher:
+    """Runs password hashing on a small dedicated pool so it cannot tie up request threads.
+
+    ``method`` is any Werkzeug method string such as ``pbkdf2:sha256:600000``.
+    Hashes made with other parameters are reported by ``needs_rehash``.
+    """
+
+    def __init__(self, method='pbkdf2:sha256', salt_length=16, max_workers=2,
+                 max_pending=64, timeout=10):
+        self.method = normalize_method(method)
+        self.salt_length = salt_length
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._pending = 0
+        self._latencies = {"hash": deque(maxlen=LATENCY_WINDOW), "verify": deque(maxlen=LATENCY_WINDOW)}
+        self._counts = {"hash": 0, "verify": 0, "rehash": 0, "rejected": 0, "timeouts": 0}
+        self._queue_wait = deque(maxlen=LATENCY_WINDOW)
+
+    def _get_executor(self):
+        """Create the pool lazily so every forked worker process gets its own threads"""
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix='password-hash')
+            self._pid = pid
+            self._pending = 0
+        return self._executor
+
+    def _run(self, operation, func, *args):
+        with self._lock:
+            executor = self._get_executor()
+            if self._pending >= self.max_pending:
+                self._counts['rejected'] += 1
+                raise HasherBusyError("Too many sign-in requests, please retry shortly")
+            self._pending += 1
+
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self._pending -= 1
+                    self._counts[operation] += 1
+                    self._latencies[operation].append(finished - started)
+                    self._queue_wait.append(started - submitted)
+
+        try:
+            return executor.submit(task).result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._counts['timeouts'] += 1
+            raise HasherBusyError("Password check timed out, please retry shortly")
+
+    def hash(self, password):
+        return self._run('hash', generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, password_hash, password):
+        return self._run('verify', check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if a stored hash was made with a different method, cost or salt length"""
+        try:
+            method, salt, _ = password_hash.split('$', 2)
+        except ValueError:
+            return True
+        return method != self.method or len(salt) != self.salt_length
+
+    def record_rehash(self):
+        with self._lock:
+            self._counts['rehash'] += 1
+
+    @staticmethod
+    def _summary(samples):
+        if not samples:
+            return {"count": 0}
+        ordered = sorted(samples)
+
+        def pick(q):
+            return round(ordered[min(int(q * len(ordered)), len(ordered) - 1)] * 1000, 2)
+
+        return {"count": len(ordered), "p50_ms": pick(0.5), "p95_ms": pick(0.95),
+                "max_ms": round(ordered[-1] * 1000, 2)}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "method": self.method,
+                "workers": self.max_workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                **self._counts,
+                "hash_latency": self._summary(self._latencies['hash']),
+                "verify_latency": self._summary(self._latencies['verify']),
+                "queue_wait": self._summary(self._queue_wait)
+            }
+
+
+password_hasher = PasswordHasher(
+    method=Config.PASSWORD_HASH_METHOD,
+    salt_length=Config.PASSWORD_SALT_LENGTH,
+    max_workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_QUEUE_SIZE,
+    timeout=Config.PASSWORD_HASH_TIMEOUT_SECONDS
+)
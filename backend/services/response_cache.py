@@ -0,0 +1,122 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from flask import Response, json, request
+from config import Config
+
+
+class ResponseCache:
+    """Per-process cache of serialized GET responses with strong ETags.
+
+    Entries are keyed by (user_id, kind, resource_id) so a repeat view is served
+    without touching MongoDB. Write handlers invalidate the entries they affect,
+    but only in their own process: the TTL bounds how long another worker can
+    serve a response its writes did not invalidate.
+
+    Memory is bounded by the total size of the cached bodies (least recently
+    used entries are evicted first); bodies over max_entry_bytes are not kept.
+    """
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, max_entry_bytes=256 * 1024, ttl_seconds=60,
+                 enabled=True):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.invalidations = 0
+
+    def get(self, user_id, kind, resource_id):
+        """Return the cached entry for a resource, or None"""
+        if not self.enabled:
+            return None
+
+        key = (user_id, kind, resource_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['expires'] <= now:
+                self._pop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= len(entry['body'])
+        return entry
+
+    def store(self, user_id, kind, resource_id, payload, updated_at):
+        """Serialize and cache a payload; returns the entry"""
+        body = json.dumps(payload).encode('utf-8')
+        version = updated_at.isoformat() if updated_at else ''
+        digest = hashlib.sha256(f"{kind}:{resource_id}:{version}:".encode('utf-8') + body).hexdigest()
+        entry = {
+            "body": body,
+            "etag": digest[:32],
+            "expires": time.monotonic() + self.ttl_seconds
+        }
+
+        if self.enabled and len(body) <= self.max_entry_bytes:
+            key = (user_id, kind, resource_id)
+            with self._lock:
+                self._pop(key)
+                self._entries[key] = entry
+                self._bytes += len(body)
+                while self._bytes > self.max_bytes:
+                    self._pop(next(iter(self._entries)))
+        return entry
+
+    def respond(self, entry, status=200):
+        """Build the response for an entry, answering 304 when the client's ETag matches"""
+        if entry['etag'] in request.if_none_match:
+            with self._lock:
+                self.not_modified += 1
+            response = Response(status=304)
+        else:
+            response = Response(entry['body'], status=status, mimetype='application/json')
+        response.set_etag(entry['etag'])
+        # Clients may keep the body but must revalidate before reusing it
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def invalidate(self, user_id, kind, resource_id=None):
+        """Drop one resource, or every resource of a kind for the user"""
+        with self._lock:
+            if resource_id is not None:
+                removed = self._pop((user_id, kind, resource_id)) is not None
+                self.invalidations += removed
+                return
+            for key in [key for key in self._entries if key[0] == user_id and key[1] == kind]:
+                self._pop(key)
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+                "invalidations": self.invalidations
+            }
+
+
+response_cache = ResponseCache(
+    max_bytes=Config.RESPONSE_CACHE_MAX_BYTES,
+    max_entry_bytes=Config.RESPONSE_CACHE_MAX_ENTRY_BYTES,
+    ttl_seconds=Config.RESPONSE_CACHE_TTL_SECONDS,
+    enabled=Config.RESPONSE_CACHE_ENABLED
+)
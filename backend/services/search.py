@@ -0,0 +1,89 @@
+from config import Config
+from database import db
+
+TEXT_SCORE = {"$meta": "textScore"}
+
+# Text relevance is projected under its own name so it never shadows a stored
+# field (attempts have a real ``score``)
+RELEVANCE_FIELD = 'relevance'
+
+# Best match first; _id keeps ties in a stable order across pages
+RELEVANCE_SORT = [(RELEVANCE_FIELD, TEXT_SCORE), ("_id", -1)]
+
+SEARCH_TYPES = ('quizzes', 'materials', 'attempts')
+
+
+def clean_query(value):
+    """Normalize a search string; returns None when there is nothing to search for"""
+    value = ' '.join((value or '').split())[:Config.SEARCH_MAX_QUERY_LENGTH]
+    return value or None
+
+
+def text_filter(query_filter, query):
+    """Add a text-index match to a filter that already pins user_id"""
+    return {**query_filter, "$text": {"$search": query}}
+
+
+def check_paging(paging):
+    """Relevance order has no stable keyset, so search results use page mode"""
+    if paging.cursor_mode:
+        raise ValueError("Search results are paginated with page/limit, not cursor")
+
+
+def _format_quiz(quiz):
+    return {
+        "id": str(quiz['_id']),
+        "title": quiz['title'],
+        "description": quiz.get('description', ''),
+        "material_id": str(quiz.get('material_id')),
+        "created_at": quiz['created_at'].isoformat(),
+        "relevance": quiz[RELEVANCE_FIELD]
+    }
+
+
+def _format_material(material):
+    return {
+        "id": str(material['_id']),
+        "title": material['title'],
+        "description": material.get('description', ''),
+        "tags": material.get('tags', []),
+        "created_at": material['created_at'].isoformat(),
+        "relevance": material[RELEVANCE_FIELD]
+    }
+
+
+def _format_attempt(attempt):
+    return {
+        "id": str(attempt['_id']),
+        "quiz_id": attempt['quiz_id'],
+        "quiz_title": attempt.get('quiz_title', ''),
+        "score": attempt.get('score', 0),
+        "total_questions": attempt.get('total_questions', 0),
+        "percentage": attempt.get('percentage', 0),
+        "created_at": attempt['created_at'].isoformat(),
+        "relevance": attempt[RELEVANCE_FIELD]
+    }
+
+
+# type -> (collection name, projection, formatter)
+SEARCHABLE = {
+    "quizzes": ("quizzes", {"title": 1, "description": 1, "material_id": 1, "created_at": 1},
+                _format_quiz),
+    "materials": ("study_materials", {"title": 1, "description": 1, "tags": 1, "created_at": 1},
+                  _format_material),
+    "attempts": ("quiz_attempts", {"quiz_id": 1, "quiz_title": 1, "score": 1, "total_questions": 1,
+                                   "percentage": 1, "created_at": 1},
+                 _format_attempt)
+}
+
+
+def search(user_id, query, search_type, paging):
+    """Ranked page of one type of the user's documents; returns (results, total)"""
+    collection_name, projection, formatter = SEARCHABLE[search_type]
+    collection = db[collection_name]
+    query_filter = text_filter({"user_id": user_id}, query)
+
+    documents = collection.find(query_filter, {**projection, RELEVANCE_FIELD: TEXT_SCORE}) \
+        .sort(RELEVANCE_SORT).skip(paging.skip).limit(paging.limit)
+
+    return [formatter(document) for document in documents], paging.count(collection, query_filter)
@@ -0,0 +1,47 @@
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from database import db
+
+# Profile fields carried as access token claims
+CLAIM_FIELDS = ('email', 'name')
+
+PROFILE_PROJECTION = {field: 1 for field in CLAIM_FIELDS}
+
+
+def token_claims(user):
+    """Additional access token claims so most requests never need a users lookup"""
+    return {field: user.get(field, '') for field in CLAIM_FIELDS}
+
+
+def _profile(user_id, document):
+    return {"id": user_id, **{field: document.get(field, '') for field in CLAIM_FIELDS}}
+
+
+def load_user(user_id):
+    """Read a user's stored profile (one query), or None if the user does not exist.
+
+    For handlers that must show the current profile rather than the token's claims.
+    """
+    if not ObjectId.is_valid(user_id):
+        return None
+    document = db.users.find_one({"_id": ObjectId(user_id)}, PROFILE_PROJECTION)
+    return _profile(user_id, document) if document is not None else None
+
+
+def update_user(user_id, update_data):
+    """Apply a profile update and return the updated profile in the same round trip"""
+    document = db.users.find_one_and_update({"_id": ObjectId(user_id)}, {"$set": update_data},
+                                            projection=PROFILE_PROJECTION,
+                                            return_document=ReturnDocument.AFTER)
+    return _profile(user_id, document) if document is not None else None
+
+
+def lookup_user(jwt_header, jwt_data):
+    """JWTManager user_lookup_loader: runs once per request after the token is verified.
+
+    The user is built from the token's claims without touching MongoDB, and
+    Flask-JWT-Extended keeps it on ``flask.g`` for the rest of the request
+    (``get_current_user()``). Claims reflect the profile when the token was
+    issued; /api/auth/me reads the stored profile.
+    """
+    return _profile(jwt_data['sub'], jwt_data)
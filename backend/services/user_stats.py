@@ -0,0 +1,241 @@
+import click
+import logging
+from datetime import datetime
+from flask.cli import AppGroup
+from pymongo.errors import DuplicateKeyError
+from database import db
+
+logger = logging.getLogger(__name__)
+
+# Number of recent items kept for the dashboard
+RECENT_ATTEMPTS = 5
+RECENT_QUIZZES = 3
+RECENT_MATERIALS = 3
+
+# Rebuilds start over when an incremental update lands while they read the sources
+REBUILD_ATTEMPTS = 3
+
+
+def _attempt_summary(attempt):
+    return {
+        "_id": attempt['_id'],
+        "quiz_id": attempt['quiz_id'],
+        "user_id": attempt['user_id'],
+        "quiz_title": attempt.get('quiz_title', ''),
+        "score": attempt.get('score', 0),
+        "total_questions": attempt.get('total_questions', 0),
+        "percentage": attempt.get('percentage', 0),
+        "created_at": attempt['created_at']
+    }
+
+
+def _quiz_summary(quiz, num_questions=None):
+    if num_questions is None:
+        num_questions = len(quiz.get('questions', []))
+    return {
+        "id": quiz['_id'],
+        "material_id": quiz.get('material_id'),
+        "title": quiz['title'],
+        "description": quiz.get('description', ''),
+        "num_questions": num_questions,
+        "created_at": quiz['created_at']
+    }
+
+
+def _material_summary(material):
+    return {
+        "id": material['_id'],
+        "title": material['title'],
+        "description": material.get('description', ''),
+        "created_at": material['created_at']
+    }
+
+
+def _push_recent(field, item, size):
+    """$push modifier that keeps the newest `size` items first"""
+    return {field: {"$each": [item], "$position": 0, "$slice": size}}
+
+
+def _apply(user_id, update):
+    """Apply an incremental update, rebuilding from source if the user has no stats yet.
+
+    Stats are never upserted from a partial update: a user whose document is
+    missing gets a full rebuild, which already includes the write being recorded.
+    """
+    update.setdefault("$set", {})["updated_at"] = datetime.now()
+    update.setdefault("$inc", {})["version"] = 1
+    result = db.user_stats.update_one({"_id": user_id}, update)
+    if result.matched_count == 0:
+        rebuild_user_stats(user_id)
+
+
+def record_material_created(user_id, material):
+    _apply(user_id, {
+        "$inc": {"total_materials": 1},
+        "$push": _push_recent("recent_materials", _material_summary(material), RECENT_MATERIALS)
+    })
+
+
+def record_material_updated(user_id, material_id, update_data):
+    """Keep the recent materials entry in step with title/description edits"""
+    changes = {f"recent_materials.$.{field}": update_data[field]
+               for field in ('title', 'description') if field in update_data}
+    if changes:
+        db.user_stats.update_one({"_id": user_id, "recent_materials.id": material_id},
+                                 {"$set": changes, "$inc": {"version": 1}})
+
+
+def record_material_deleted(user_id, material_id, deleted_quizzes):
+    """Record a material delete together with the quizzes removed with it"""
+    _apply(user_id, {
+        "$inc": {"total_materials": -1, "total_quizzes": -deleted_quizzes},
+        "$pull": {
+            "recent_materials": {"id": material_id},
+            "recent_quizzes": {"material_id": str(material_id)}
+        }
+    })
+
+
+def record_quiz_created(user_id, quiz):
+    _apply(user_id, {
+        "$inc": {"total_quizzes": 1},
+        "$push": _push_recent("recent_quizzes", _quiz_summary(quiz), RECENT_QUIZZES)
+    })
+
+
+def record_quizzes_created(user_id, quizzes):
+    """Record several quizzes created together (newest last in the list)"""
+    summaries = [_quiz_summary(quiz) for quiz in reversed(quizzes)]
+    _apply(user_id, {
+        "$inc": {"total_quizzes": len(quizzes)},
+        "$push": {"recent_quizzes": {"$each": summaries, "$position": 0, "$slice": RECENT_QUIZZES}}
+    })
+
+
+def record_quiz_deleted(user_id, quiz_id, deleted_attempts, deleted_percentage_sum):
+    """Record a quiz delete together with the attempts removed with it"""
+    _apply(user_id, {
+        "$inc": {
+            "total_quizzes": -1,
+            "total_attempts": -deleted_attempts,
+            "percentage_sum": -deleted_percentage_sum
+        },
+        "$pull": {
+            "recent_quizzes": {"id": quiz_id},
+            "recent_attempts": {"quiz_id": str(quiz_id)}
+        }
+    })
+
+
+def record_attempt(user_id, attempt):
+    _apply(user_id, {
+        "$inc": {"total_attempts": 1, "percentage_sum": attempt['percentage']},
+        "$push": _push_recent("recent_attempts", _attempt_summary(attempt), RECENT_ATTEMPTS)
+    })
+
+
+def record_attempts(user_id, attempts):
+    """Record several attempts inserted together (newest last in the list)"""
+    _apply(user_id, {
+        "$inc": {
+            "total_attempts": len(attempts),
+            "percentage_sum": sum(attempt['percentage'] for attempt in attempts)
+        },
+        "$push": {"recent_attempts": {
+            "$each": [_attempt_summary(attempt) for attempt in reversed(attempts)],
+            "$position": 0,
+            "$slice": RECENT_ATTEMPTS
+        }}
+    })
+
+
+def rebuild_user_stats(user_id):
+    """Recompute a user's stats document from the source collections.
+
+    Every incremental update bumps ``version``. The recomputed fields are only
+    written if the version is unchanged since before the sources were read;
+    otherwise a concurrent update may be missing from them and the rebuild
+    starts over, instead of overwriting that update.
+    """
+    for _ in range(REBUILD_ATTEMPTS):
+        current = db.user_stats.find_one({"_id": user_id}, {"version": 1})
+        stats = _compute_stats(user_id)
+        if current is None:
+            try:
+                db.user_stats.insert_one({"_id": user_id, "version": 0, **stats})
+                return {"_id": user_id, **stats}
+            except DuplicateKeyError:
+                continue
+        # A missing version (documents written before versioning) matches null
+        result = db.user_stats.update_one({"_id": user_id, "version": current.get('version')},
+                                          {"$set": stats})
+        if result.matched_count:
+            return {"_id": user_id, **stats}
+
+    logger.warning("User stats kept changing during rebuild", extra={"user_id": user_id})
+    return {"_id": user_id, **stats}
+
+
+def _compute_stats(user_id):
+    """Dashboard fields computed from the source collections"""
+    avg_result = list(db.quiz_attempts.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$group": {"_id": None, "count": {"$sum": 1}, "sum": {"$sum": "$percentage"}}}
+    ]))
+
+    recent_quizzes = db.quizzes.aggregate([
+        {"$match": {"user_id": user_id}},
+        {"$sort": {"created_at": -1}},
+        {"$limit": RECENT_QUIZZES},
+        {"$project": {"title": 1, "description": 1, "material_id": 1, "created_at": 1,
+                      "num_questions": {"$size": {"$ifNull": ["$questions", []]}}}}
+    ])
+    recent_materials = db.study_materials.find(
+        {"user_id": user_id}, {"title": 1, "description": 1, "created_at": 1}
+    ).sort("created_at", -1).limit(RECENT_MATERIALS)
+    recent_attempts = db.quiz_attempts.find(
+        {"user_id": user_id},
+        {"quiz_id": 1, "user_id": 1, "quiz_title": 1, "score": 1, "total_questions": 1,
+         "percentage": 1, "created_at": 1}
+    ).sort("created_at", -1).limit(RECENT_ATTEMPTS)
+
+    return {
+        "total_materials": db.study_materials.count_documents({"user_id": user_id}),
+        "total_quizzes": db.quizzes.count_documents({"user_id": user_id}),
+        "total_attempts": avg_result[0]['count'] if avg_result else 0,
+        "percentage_sum": avg_result[0]['sum'] if avg_result else 0,
+        "recent_attempts": [_attempt_summary(a) for a in recent_attempts],
+        "recent_quizzes": [_quiz_summary(q, q['num_questions']) for q in recent_quizzes],
+        "recent_materials": [_material_summary(m) for m in recent_materials],
+        "updated_at": datetime.now()
+    }
+
+
+def _needs_refill(stats):
+    """Deletes can leave recent lists shorter than they should be"""
+    return (
+        len(stats.get('recent_attempts', [])) < min(stats.get('total_attempts', 0), RECENT_ATTEMPTS) or
+        len(stats.get('recent_quizzes', [])) < min(stats.get('total_quizzes', 0), RECENT_QUIZZES) or
+        len(stats.get('recent_materials', [])) < min(stats.get('total_materials', 0), RECENT_MATERIALS)
+    )
+
+
+def get_user_stats(user_id):
+    """Get a user's stats document with a single point lookup, rebuilding it if needed"""
+    stats = db.user_stats.find_one({"_id": user_id})
+    if stats is None or _needs_refill(stats):
+        stats = rebuild_user_stats(user_id)
+    return stats
+
+
+stats_cli = AppGroup('stats', help='Manage materialized dashboard stats.')
+
+
+@stats_cli.command('rebuild')
+@click.option('--user-id', default=None, help='Rebuild a single user instead of everyone.')
+def rebuild_stats_command(user_id):
+    """Recompute dashboard stats from the source collections."""
+    user_ids = [user_id] if user_id else [str(u['_id']) for u in db.users.find({}, {"_id": 1})]
+    for uid in user_ids:
+        rebuild_user_stats(uid)
+    click.echo(f"Rebuilt stats for {len(user_ids)} user(s)")
@@ -8,6 +8,7 @@ load_dotenv()
 
 # Configuration
 BASE_URL = "http://localhost:5000/api"
+JOB_MAX_POLLS = 24
 TEST_USER = {
     "email": "testuser@example.com",
     "password": "testpassword123",
@@ -158,11 +159,29 @@ def test_quiz_flow(token, material_id):
     )
     print_response(quiz_resp, "Quiz Generation Response")
     
-    if quiz_resp.status_code != 201:
+    if quiz_resp.status_code != 202:
         print("Quiz generation failed")
         return None
     
-    quiz_id = quiz_resp.json()["quiz_id"]
+    # Generation runs as a background job; long-poll it until it finishes
+    job_id = quiz_resp.json()["job_id"]
+    job = quiz_resp.json()
+    for _ in range(JOB_MAX_POLLS):
+        job_resp = requests.get(
+            f"{BASE_URL}/quizzes/jobs/{job_id}",
+            headers=get_auth_header(token),
+            params={"wait": 5}
+        )
+        job = job_resp.json()
+        if job_resp.status_code != 200 or job.get("status") in ("completed", "failed"):
+            break
+    print_response(job_resp, "Generation Job Response")
+    
+    if job.get("status") != "completed":
+        print("Quiz generation failed")
+        return None
+    
+    quiz_id = job["result"]["quiz_id"]
     
     # Get quiz details
     print("\n2. Fetching quiz details")
@@ -0,0 +1,149 @@
+from datetime import datetime
+import mongomock
+import pytest
+from bson.objectid import ObjectId
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+from pymongo.errors import BulkWriteError
+import database
+from controllers.quiz_controller import quiz_bp
+
+USER_ID = 'user-1'
+QUESTIONS = [
+    {"type": "multiple_choice", "question": "Q1", "options": ["A", "B"], "correct_answer": "A"},
+    {"type": "true_false", "question": "Q2", "correct_answer": True},
+]
+
+
+class PartialUniqueAttempts:
+    """quiz_attempts with the partial unique index on (user_id, idempotency_key).
+
+    mongomock ignores partialFilterExpression, which would make key-less attempts
+    collide; here only string keys are unique, as in MongoDB. ``before_insert``
+    runs just before the insert to simulate a concurrent request winning the race.
+    """
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.before_insert = None
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def insert_many(self, documents, ordered=True):
+        if self.before_insert:
+            self.before_insert()
+        errors = []
+        for index, document in enumerate(documents):
+            key = document.get('idempotency_key')
+            if isinstance(key, str) and self._collection.find_one(
+                    {"user_id": document['user_id'], "idempotency_key": key}):
+                errors.append({"index": index, "code": 11000, "errmsg": "E11000 duplicate key error"})
+                continue
+            self._collection.insert_one(document)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(documents) - len(errors)})
+
+
+class _Database:
+    def __init__(self, db, **overrides):
+        self._db = db
+        self._overrides = overrides
+
+    def __getitem__(self, name):
+        if name in self._overrides:
+            return self._overrides[name]
+        return self._db[name]
+
+
+@pytest.fixture
+def mongo(monkeypatch):
+    db = mongomock.MongoClient().db
+    attempts = PartialUniqueAttempts(db.quiz_attempts)
+    monkeypatch.setattr(database, 'get_db', lambda: _Database(db, quiz_attempts=attempts))
+    return db, attempts
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'batch-attempts-test-secret-key-0123456789'
+    JWTManager(app)
+    app.register_blueprint(quiz_bp, url_prefix='/api/quizzes')
+    with app.app_context():
+        app.config['TEST_TOKEN'] = create_access_token(identity=USER_ID)
+    return app
+
+
+@pytest.fixture
+def submit(app, mongo):
+    db, _ = mongo
+    quiz_id = str(db.quizzes.insert_one({
+        "user_id": USER_ID, "title": "Quiz", "questions": QUESTIONS,
+        "created_at": datetime.now(), "updated_at": datetime.now()
+    }).inserted_id)
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {app.config['TEST_TOKEN']}"}
+
+    def post(*entries):
+        attempts = [{"quiz_id": quiz_id, "answers": {"0": "A", "1": "true"}, **entry} for entry in entries]
+        response = client.post('/api/quizzes/attempts/batch', json={"attempts": attempts}, headers=headers)
+        assert response.status_code == 200
+        return response.get_json()
+
+    return post
+
+
+def test_attempts_without_keys_are_all_stored(submit, mongo):
+    db, _ = mongo
+    body = submit({}, {}, {"answers": {"0": "B"}})
+    assert body['counts'] == {"created": 3}
+    assert [item['score'] for item in body['items']] == [2, 2, 0]
+    assert db.quiz_attempts.count_documents({}) == 3
+
+
+def test_repeated_key_in_one_request_is_stored_once(submit, mongo):
+    db, _ = mongo
+    body = submit({"idempotency_key": "k1"}, {"idempotency_key": "k2"}, {"idempotency_key": "k1"})
+    assert body['counts'] == {"created": 2, "duplicate": 1}
+    assert body['items'][2]['status'] == "duplicate"
+    assert body['items'][2]['duplicate_of'] == 0
+    assert db.quiz_attempts.count_documents({}) == 2
+
+
+def test_replayed_request_returns_the_stored_attempts(submit, mongo):
+    db, _ = mongo
+    first = submit({"idempotency_key": "k1"}, {})
+    replay = submit({"idempotency_key": "k1"}, {})
+    assert replay['counts'] == {"duplicate": 1, "created": 1}
+    assert replay['items'][0]['attempt_id'] == first['items'][0]['attempt_id']
+    assert db.quiz_attempts.count_documents({"idempotency_key": "k1"}) == 1
+    assert db.quiz_attempts.count_documents({}) == 3
+
+
+def test_concurrent_insert_of_the_same_key_is_reported_as_duplicate(submit, mongo):
+    db, attempts = mongo
+    winner = ObjectId()
+
+    def concurrent_request():
+        # Lands after this request checked for stored keys, before its insert
+        db.quiz_attempts.insert_one({
+            "_id": winner, "user_id": USER_ID, "idempotency_key": "k1", "quiz_id": "q",
+            "quiz_title": "Quiz", "score": 1, "total_questions": 2, "percentage": 50.0,
+            "created_at": datetime.now()
+        })
+
+    attempts.before_insert = concurrent_request
+    body = submit({"idempotency_key": "k1"}, {"idempotency_key": "k2"})
+    assert body['counts'] == {"duplicate": 1, "created": 1}
+    assert body['items'][0]['attempt_id'] == str(winner)
+    assert body['items'][0]['score'] == 1
+    assert db.quiz_attempts.count_documents({"idempotency_key": "k1"}) == 1
+    assert db.quiz_attempts.count_documents({}) == 2
+
+
+def test_non_string_key_is_invalid(submit, mongo):
+    db, _ = mongo
+    body = submit({"idempotency_key": 7})
+    assert body['items'][0]['status'] == "invalid"
+    assert db.quiz_attempts.count_documents({}) == 0
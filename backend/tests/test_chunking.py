@@ -0,0 +1,106 @@
+from ai.chunking import split_into_chunks, select_evenly, condense_sections, type_quotas, merge_by_type
+
+
+def _paragraphs(count, length=90):
+    return [f"Paragraph {i} " + "x" * (length - len(f"Paragraph {i} ")) for i in range(count)]
+
+
+def test_short_text_is_one_chunk():
+    assert split_into_chunks("One paragraph.\n\nAnother one.", chunk_size=100, overlap=10) == [
+        "One paragraph.\nAnother one."]
+
+
+def test_empty_text_has_no_chunks():
+    assert split_into_chunks("  \n\n ", chunk_size=100) == []
+
+
+def test_chunks_respect_size_and_cover_every_paragraph():
+    paragraphs = _paragraphs(20)
+    chunks = split_into_chunks("\n\n".join(paragraphs), chunk_size=300, overlap=0)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 300 for chunk in chunks)
+    assert [p for chunk in chunks for p in chunk.split('\n')] == paragraphs
+
+
+def test_overlap_repeats_trailing_paragraphs():
+    paragraphs = _paragraphs(10)
+    chunks = split_into_chunks("\n\n".join(paragraphs), chunk_size=300, overlap=100)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split('\n')[0] == previous.split('\n')[-1]
+    assert all(len(chunk) <= 300 for chunk in chunks)
+
+
+def test_oversized_paragraph_splits_on_sentences():
+    sentences = [f"Sentence number {i} is here." for i in range(30)]
+    chunks = split_into_chunks(" ".join(sentences), chunk_size=100, overlap=0)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert [s for chunk in chunks for s in chunk.split('\n')] == sentences
+
+
+def test_oversized_sentence_is_sliced():
+    chunks = split_into_chunks("y" * 250, chunk_size=100, overlap=0)
+    assert chunks == ["y" * 100, "y" * 100, "y" * 50]
+
+
+def test_select_evenly_spreads_picks():
+    assert select_evenly(list(range(10)), 5) == [0, 2, 4, 6, 8]
+    assert select_evenly(list(range(10)), 3) == [0, 3, 6]
+
+
+def test_select_evenly_returns_everything_under_the_limit():
+    assert select_evenly([1, 2], 5) == [1, 2]
+
+
+def test_select_evenly_with_no_limit_returns_nothing():
+    assert select_evenly([1, 2, 3], 0) == []
+    assert select_evenly([1, 2, 3], -1) == []
+
+
+def test_condense_keeps_short_runs_whole():
+    assert condense_sections(["a", "b", "c", "d"], 2, limit=100) == ["a\nb", "c\nd"]
+
+
+def test_condense_never_makes_more_sections_than_chunks():
+    assert condense_sections(["a", "b"], 5, limit=100) == ["a", "b"]
+
+
+def test_condense_samples_every_part_of_a_long_run():
+    chunks = [f"chunk{i} " + "word " * 200 for i in range(40)]
+    sections = condense_sections(chunks, 2, limit=3000, min_excerpt=500)
+    assert len(sections) == 2
+    assert all(len(section) <= 3000 for section in sections)
+    assert "chunk0 " in sections[0] and "chunk20 " in sections[1]
+    assert "chunk16 " in sections[0] and "chunk36 " in sections[1]
+    assert not any(line.endswith("wor") for section in sections for line in section.split("\n"))
+
+
+def test_type_quotas_spread_evenly_in_order():
+    assert type_quotas(5, ["multiple_choice", "true_false", "short_answer"]) == {
+        "multiple_choice": 2, "true_false": 2, "short_answer": 1}
+    assert type_quotas(2, ["true_false"]) == {"true_false": 2}
+
+
+def _questions(chunk, types):
+    return [{"type": question_type, "question": f"{chunk} {question_type} {i}?"}
+            for i, question_type in enumerate(types)]
+
+
+def test_merge_follows_type_quotas_across_chunks():
+    # Models list questions grouped by type, so a plain round-robin would take only the first type
+    grouped = ["multiple_choice", "multiple_choice", "true_false", "true_false", "short_answer", "short_answer"]
+    results = [_questions(chunk, grouped) for chunk in ("a", "b", "c")]
+    merged = merge_by_type(results, 5, ["multiple_choice", "true_false", "short_answer"])
+    assert [q["type"] for q in merged].count("multiple_choice") == 2
+    assert [q["type"] for q in merged].count("true_false") == 2
+    assert [q["type"] for q in merged].count("short_answer") == 1
+    # The first questions still come from different chunks
+    assert [q["question"][0] for q in merged[:2]] == ["a", "b"]
+
+
+def test_merge_fills_short_types_and_drops_duplicates_and_unrequested_types():
+    results = [
+        [{"type": "multiple_choice", "question": "Same?"}, {"type": "essay", "question": "Essay?"}],
+        [{"type": "multiple_choice", "question": "same"}, {"type": "multiple_choice", "question": "Other?"}],
+    ]
+    merged = merge_by_type(results, 4, ["multiple_choice", "true_false"])
+    assert [q["question"] for q in merged] == ["Same?", "Other?"]
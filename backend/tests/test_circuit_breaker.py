@@ -0,0 +1,96 @@
+import pytest
+from ai import circuit_breaker
+from ai.circuit_breaker import CircuitBreaker, OutcomeTally, CLOSED, OPEN, HALF_OPEN
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(circuit_breaker.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def _trip(breaker):
+    for _ in range(breaker.failure_threshold):
+        assert breaker.allow_request()
+        breaker.record_failure()
+
+
+def test_opens_after_threshold_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+    assert breaker.stats() == {"state": OPEN, "consecutive_failures": 3, "rejected_calls": 1}
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_one_probe_through(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    _trip(breaker)
+    clock[0] += 29
+    assert not breaker.allow_request()
+    clock[0] += 1
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()
+
+
+def test_successful_probe_closes(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+    _trip(breaker)
+    clock[0] += 30
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens_for_another_timeout(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+    _trip(breaker)
+    clock[0] += 30
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    clock[0] += 29
+    assert not breaker.allow_request()
+    clock[0] += 1
+    assert breaker.allow_request()
+
+
+def test_tally_counts_many_failures_once(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    tally = OutcomeTally()
+    for _ in range(5):
+        tally.record_failure()
+    tally.apply(breaker)
+    assert breaker.stats()["consecutive_failures"] == 1
+    assert breaker.state == CLOSED
+
+
+def test_tally_success_wins_over_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    tally = OutcomeTally()
+    tally.record_failure()
+    tally.record_success()
+    tally.apply(breaker)
+    assert breaker.stats()["consecutive_failures"] == 0
+
+
+def test_empty_tally_changes_nothing(clock):
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record_failure()
+    OutcomeTally().apply(breaker)
+    assert breaker.stats()["consecutive_failures"] == 1
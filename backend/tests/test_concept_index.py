@@ -0,0 +1,47 @@
+from collections import Counter
+from ai.concept_index import (
+    CONCEPT_INDEX_VERSION, tokenize, extract_terms, build_concept_index, is_current, concepts_from_index
+)
+
+TEXT = "Photosynthesis converts light energy. The chloroplast stores light energy, and light matters."
+
+
+def test_tokenize_drops_stopwords_short_words_and_punctuation():
+    assert tokenize("The cell, and its DNA: mitochondria!") == ["cell", "mitochondria"]
+
+
+def test_extract_terms_counts_unigrams_and_adjacent_phrases():
+    terms = extract_terms(TEXT)
+    assert terms["light"] == 3
+    assert terms["light energy"] == 2
+    assert terms["energy"] == 2
+    # "and" between the words breaks the phrase
+    assert "energy light" not in terms
+
+
+def test_build_index_keeps_the_most_common_terms():
+    index = build_concept_index(TEXT, top_n=2)
+    assert index["version"] == CONCEPT_INDEX_VERSION
+    assert index["terms"][0] == ["light", 3]
+    assert len(index["terms"]) == 2
+    assert index["token_count"] == len(tokenize(TEXT))
+
+
+def test_build_index_accepts_precomputed_terms():
+    terms = Counter({"cell": 2, "cell wall": 1})
+    index = build_concept_index("ignored for terms", terms=terms)
+    assert index["terms"] == [["cell", 2], ["cell wall", 1]]
+    assert index["token_count"] == 2
+
+
+def test_index_is_current_only_for_the_same_text_and_version():
+    index = build_concept_index(TEXT)
+    assert is_current(index, TEXT)
+    assert not is_current(index, TEXT + " More.")
+    assert not is_current({**index, "version": CONCEPT_INDEX_VERSION - 1}, TEXT)
+    assert not is_current(None, TEXT)
+
+
+def test_concepts_from_index():
+    index = build_concept_index(TEXT)
+    assert concepts_from_index(index, num_concepts=2) == ["light", "energy"]
@@ -0,0 +1,170 @@
+import threading
+from datetime import datetime, timedelta
+import mongomock
+import pytest
+from services.generation_queue import (
+    GenerationQueue, QueueFullError, UserJobLimitError,
+    JOB_QUEUED, JOB_RUNNING, JOB_COMPLETED, JOB_FAILED
+)
+
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().db
+
+
+def _queue(db, **options):
+    options.setdefault('max_jobs_per_user', 2)
+    options.setdefault('heartbeat_seconds', 3600)
+    return GenerationQueue(db.generation_jobs, db.generation_slots, **options)
+
+
+def _active(db, user_id):
+    slot = db.generation_slots.find_one({"_id": user_id})
+    return slot['active'] if slot else 0
+
+
+def _drain(queue):
+    # A job's status is written before its slot is released
+    queue._executor.shutdown(wait=True)
+
+
+def _stale_job(db, user_id, status=JOB_RUNNING):
+    old = datetime.now() - timedelta(hours=1)
+    return db.generation_jobs.insert_one({
+        "user_id": user_id, "status": status, "params": {},
+        "created_at": old, "updated_at": old
+    }).inserted_id
+
+
+def test_claims_slots_up_to_the_per_user_limit(db):
+    queue = _queue(db)
+    assert queue._claim_slot('u1')
+    assert queue._claim_slot('u1')
+    assert not queue._claim_slot('u1')
+    assert queue._claim_slot('u2')
+    assert _active(db, 'u1') == 2
+
+
+def test_release_frees_a_slot_and_never_goes_negative(db):
+    queue = _queue(db, max_jobs_per_user=1)
+    assert queue._claim_slot('u1')
+    queue._release_slot('u1')
+    queue._release_slot('u1')
+    assert _active(db, 'u1') == 0
+    assert queue._claim_slot('u1')
+
+
+def test_completed_job_stores_result_and_releases_slot(db):
+    queue = _queue(db)
+    job_id = queue.submit('u1', {"n": 3}, lambda params: {"quiz_id": "q", "n": params['n']})
+    job = queue.wait_for_job(job_id, 'u1', 5)
+    assert job['status'] == JOB_COMPLETED
+    assert job['result'] == {"quiz_id": "q", "n": 3}
+    _drain(queue)
+    assert _active(db, 'u1') == 0
+    assert queue.stats()['pending'] == 0
+
+
+def test_failed_job_records_error_and_releases_slot(db):
+    queue = _queue(db)
+
+    def handler(params):
+        raise ValueError("no content")
+
+    job = queue.wait_for_job(queue.submit('u1', {}, handler), 'u1', 5)
+    assert job['status'] == JOB_FAILED
+    assert job['error'] == "no content"
+    _drain(queue)
+    assert _active(db, 'u1') == 0
+
+
+def test_user_limit_and_full_queue_are_rejected_without_leaking_slots(db):
+    queue = _queue(db, max_workers=1, max_pending=1)
+    release = threading.Event()
+    job_id = queue.submit('u1', {}, lambda params: release.wait(5) and {})
+
+    with pytest.raises(QueueFullError):
+        queue.submit('u2', {}, lambda params: {})
+    assert _active(db, 'u2') == 0
+
+    queue.max_pending = 5
+    queue.submit('u1', {}, lambda params: {})
+    with pytest.raises(UserJobLimitError):
+        queue.submit('u1', {}, lambda params: {})
+
+    release.set()
+    assert queue.wait_for_job(job_id, 'u1', 5)['status'] == JOB_COMPLETED
+
+
+def test_stale_sweep_fails_old_jobs_and_releases_their_slots(db):
+    queue = _queue(db)
+    assert queue._claim_slot('u1')
+    stale_id = _stale_job(db, 'u1')
+    fresh_id = db.generation_jobs.insert_one({
+        "user_id": 'u1', "status": JOB_QUEUED, "updated_at": datetime.now()
+    }).inserted_id
+
+    assert queue.fail_stale_jobs() == 1
+    assert db.generation_jobs.find_one({"_id": stale_id})['status'] == JOB_FAILED
+    assert db.generation_jobs.find_one({"_id": fresh_id})['status'] == JOB_QUEUED
+    assert _active(db, 'u1') == 0
+    assert queue.fail_stale_jobs() == 0
+
+
+def test_acquire_slot_reclaims_slots_of_abandoned_jobs(db):
+    queue = _queue(db, max_jobs_per_user=1)
+    assert queue._claim_slot('u1')
+    _stale_job(db, 'u1')
+    assert queue.acquire_slot('u1')
+    assert _active(db, 'u1') == 1
+
+
+def test_heartbeat_keeps_long_running_jobs_alive(db):
+    queue = _queue(db, stale_after_seconds=60)
+    release = threading.Event()
+    running = threading.Event()
+
+    def handler(params):
+        running.set()
+        release.wait(5)
+        return {"quiz_id": "q"}
+
+    job_id = queue.submit('u1', {}, handler)
+    assert running.wait(5)
+    old = datetime.now() - timedelta(hours=1)
+    db.generation_jobs.update_one({}, {"$set": {"updated_at": old}})
+
+    assert queue.heartbeat() == 1
+    assert queue.fail_stale_jobs() == 0
+
+    release.set()
+    job = queue.wait_for_job(job_id, 'u1', 5)
+    assert job['status'] == JOB_COMPLETED
+    _drain(queue)
+    assert _active(db, 'u1') == 0
+    assert queue.heartbeat() == 0
+
+
+def test_job_failed_as_stale_releases_its_slot_once(db):
+    queue = _queue(db, stale_after_seconds=60)
+    release = threading.Event()
+    running = threading.Event()
+
+    def handler(params):
+        running.set()
+        release.wait(5)
+        return {}
+
+    job_id = queue.submit('u1', {}, handler)
+    assert queue._claim_slot('u1')
+    assert running.wait(5)
+    # Simulate a missed heartbeat
+    db.generation_jobs.update_one({}, {"$set": {"updated_at": datetime.now() - timedelta(hours=1)}})
+    assert queue.fail_stale_jobs() == 1
+    assert _active(db, 'u1') == 1
+
+    release.set()
+    _drain(queue)
+    assert queue.get_job(job_id, 'u1')['status'] == JOB_FAILED
+    assert _active(db, 'u1') == 1
@@ -0,0 +1,113 @@
+from bson.objectid import ObjectId
+from services import grading
+
+QUESTIONS = [
+    {"type": "multiple_choice", "question": "Q1", "options": ["A", "B"], "correct_answer": "A",
+     "explanation": "A it is"},
+    {"type": "true_false", "question": "Q2", "correct_answer": False, "explanation": "False"},
+    {"type": "short_answer", "question": "Q3", "correct_answer": "Chlorophyll", "explanation": "Pigment"},
+]
+
+
+def test_plan_has_one_step_per_question_keyed_by_index():
+    plan = grading.compile_plan(QUESTIONS)
+    assert [step[0] for step in plan] == ["0", "1", "2"]
+    assert plan[2][3] == "Chlorophyll"
+    assert plan[2][4] == "Pigment"
+
+
+def test_grade_scores_each_question_type():
+    plan = grading.compile_plan(QUESTIONS, short_answer_grader='case_insensitive')
+    score, results = grading.grade(plan, {"0": "A", "1": "false", "2": "chlorophyll"})
+    assert score == 3
+    assert [r['correct'] for r in results] == [True, True, True]
+    assert results[0] == {"question_id": 0, "correct": True, "correct_answer": "A", "explanation": "A it is"}
+
+
+def test_missing_and_wrong_answers_are_incorrect():
+    plan = grading.compile_plan(QUESTIONS, short_answer_grader='case_insensitive')
+    score, results = grading.grade(plan, {"0": "B", "1": True})
+    assert score == 0
+    assert [r['correct'] for r in results] == [False, False, False]
+
+
+def test_multiple_choice_is_exact():
+    plan = grading.compile_plan(QUESTIONS[:1])
+    assert grading.grade(plan, {"0": "a"})[0] == 0
+
+
+def test_boolean_grader_accepts_strings_and_booleans():
+    plan = grading.compile_plan([{"type": "true_false", "correct_answer": True}])
+    assert grading.grade(plan, {"0": True})[0] == 1
+    assert grading.grade(plan, {"0": "TRUE"})[0] == 1
+    assert grading.grade(plan, {"0": "yes"})[0] == 0
+
+
+def test_short_answer_graders():
+    question = [{"type": "short_answer", "correct_answer": "light energy conversion"}]
+    overlap = grading.compile_plan(question, short_answer_grader='token_overlap')
+    assert grading.grade(overlap, {"0": "Conversion of light energy!"})[0] == 1
+    assert grading.grade(overlap, {"0": "light"})[0] == 0
+
+    fuzzy = grading.compile_plan(question, short_answer_grader='fuzzy')
+    assert grading.grade(fuzzy, {"0": "light energy convertion"})[0] == 1
+    assert grading.grade(fuzzy, {"0": "photosynthesis"})[0] == 0
+
+
+def test_question_can_name_its_grader():
+    plan = grading.compile_plan([{"type": "short_answer", "grader": "exact", "correct_answer": "Cell"}],
+                                short_answer_grader='case_insensitive')
+    assert grading.grade(plan, {"0": "cell"})[0] == 0
+
+
+def test_unknown_question_type_is_never_correct():
+    plan = grading.compile_plan([{"type": "essay", "correct_answer": "anything"}])
+    assert grading.grade(plan, {"0": "anything"})[0] == 0
+
+
+def test_plan_cache_reuses_plans_until_quiz_changes():
+    cache = grading.PlanCache(size=2)
+    quiz = {"_id": ObjectId(), "updated_at": 1, "questions": QUESTIONS}
+    plan = cache.get_plan(quiz)
+    assert cache.get_plan(quiz) is plan
+    assert cache.get_plan({**quiz, "updated_at": 2}) is not plan
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+
+def test_plan_cache_evicts_least_recently_used():
+    cache = grading.PlanCache(size=1)
+    first = {"_id": ObjectId(), "questions": QUESTIONS}
+    cache.get_plan(first)
+    cache.get_plan({"_id": ObjectId(), "questions": QUESTIONS})
+    cache.get_plan(first)
+    assert cache.stats() == {"size": 1, "max_size": 1, "hits": 0, "misses": 3}
+
+
+def _results(flags):
+    return [{"correct": flag} for flag in flags]
+
+
+def test_pack_sets_bit_i_of_byte_i_div_8():
+    assert grading.pack_correctness(_results([True, False, True])) == bytes([0b101])
+    assert grading.pack_correctness(_results([False] * 8 + [True])) == bytes([0, 1])
+    assert grading.pack_correctness([]) == b''
+
+
+def test_pack_unpack_round_trip():
+    for count in (1, 7, 8, 9, 16, 50):
+        flags = [(i * 7) % 3 == 0 for i in range(count)]
+        bits = grading.pack_correctness(_results(flags))
+        assert len(bits) == (count + 7) // 8
+        assert grading.unpack_correctness(bits, count) == flags
+
+
+def test_unpack_pads_short_bitmaps_with_false():
+    assert grading.unpack_correctness(bytes([0b11]), 10) == [True, True] + [False] * 8
+
+
+def test_expand_results_rebuilds_graded_detail():
+    quiz = {"_id": ObjectId(), "questions": QUESTIONS}
+    plan = grading.compile_plan(QUESTIONS, short_answer_grader='case_insensitive')
+    _, results = grading.grade(plan, {"0": "A", "1": "true", "2": "chlorophyll"})
+    assert grading.expand_results(quiz, grading.pack_correctness(results)) == results
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+import mongomock
+import pytest
+from bson.objectid import ObjectId
+from config import Config
+from utils.pagination import PageRequest, LISTING_SORT, encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    document = {"_id": ObjectId(), "created_at": datetime(2024, 5, 1, 12, 30, 15, 250000)}
+    assert decode_cursor(encode_cursor(document)) == (document['created_at'], document['_id'])
+
+
+def test_cursor_is_url_safe_without_padding():
+    cursor = encode_cursor({"_id": ObjectId(), "created_at": datetime.now()})
+    assert '=' not in cursor and '+' not in cursor and '/' not in cursor
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "eyJ0IjogMX0", encode_cursor(
+    {"_id": ObjectId(), "created_at": datetime.now()})[:-4]])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_page_mode_defaults():
+    paging = PageRequest({"page": "3", "limit": "20"})
+    assert not paging.cursor_mode
+    assert (paging.skip, paging.fetch_limit, paging.total_mode) == (40, 20, 'exact')
+    assert paging.to_dict(45) == {"total": 45, "page": 3, "limit": 20, "pages": 3}
+
+
+def test_cursor_mode_defaults_and_limit_clamp():
+    paging = PageRequest({"cursor": "", "limit": "100000"})
+    assert paging.cursor_mode and paging.cursor is None
+    assert paging.limit == Config.PAGINATION_MAX_LIMIT
+    assert (paging.skip, paging.fetch_limit, paging.total_mode) == (0, paging.limit + 1, 'none')
+
+
+def test_invalid_total_mode():
+    with pytest.raises(ValueError):
+        PageRequest({"total": "approximate"})
+
+
+def test_finish_trims_look_ahead_and_sets_next_cursor():
+    now = datetime.now()
+    documents = [{"_id": ObjectId(), "created_at": now - timedelta(seconds=i)} for i in range(3)]
+    paging = PageRequest({"cursor": "", "limit": "2"})
+    assert paging.finish(documents) == documents[:2]
+    assert decode_cursor(paging.next_cursor) == (documents[1]['created_at'], documents[1]['_id'])
+    assert paging.to_dict(None)["has_more"]
+
+    last = PageRequest({"cursor": "", "limit": "2"})
+    assert last.finish(documents[:2]) == documents[:2]
+    assert last.to_dict(None) == {"limit": 2, "next_cursor": None, "has_more": False, "total": None}
+
+
+def _walk(collection, query_filter, limit):
+    pages, cursor = [], ""
+    while True:
+        paging = PageRequest({"cursor": cursor, "limit": str(limit)})
+        documents = paging.finish(collection.find(paging.apply(query_filter))
+                                  .sort(LISTING_SORT).limit(paging.fetch_limit))
+        pages.append([document['_id'] for document in documents])
+        if not paging.next_cursor:
+            return pages
+        cursor = paging.next_cursor
+
+
+def test_cursor_pages_break_created_at_ties_on_id():
+    collection = mongomock.MongoClient().db.items
+    shared = datetime(2024, 1, 1).replace(microsecond=0)
+    # Most documents share a timestamp, as bulk inserts do
+    collection.insert_many([{"user_id": "u", "created_at": shared} for _ in range(17)] +
+                           [{"user_id": "u", "created_at": shared - timedelta(minutes=1)} for _ in range(4)] +
+                           [{"user_id": "other", "created_at": shared} for _ in range(3)])
+
+    pages = _walk(collection, {"user_id": "u"}, limit=5)
+    walked = [object_id for page in pages for object_id in page]
+    expected = [document['_id'] for document in collection.find({"user_id": "u"}).sort(LISTING_SORT)]
+
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 1]
+    assert walked == expected
@@ -0,0 +1,62 @@
+import json
+from ai.stream_parser import IncrementalQuestionParser
+
+QUESTIONS = [
+    {"type": "multiple_choice", "question": "Which {braces} and [brackets]?", "options": ["A", "B"],
+     "correct_answer": "A", "explanation": "Quotes \" and backslashes \\ stay inside strings"},
+    {"type": "true_false", "question": "Nested?", "correct_answer": True,
+     "explanation": "Yes", "meta": {"source": {"page": 1}}},
+]
+
+
+def _feed_all(parser, pieces):
+    objects = []
+    for piece in pieces:
+        objects.extend(parser.feed(piece))
+    return objects
+
+
+def test_whole_array_in_one_chunk():
+    parser = IncrementalQuestionParser()
+    assert parser.feed(json.dumps(QUESTIONS)) == QUESTIONS
+    assert parser.done
+
+
+def test_objects_are_returned_by_the_chunk_that_completes_them():
+    text = json.dumps(QUESTIONS)
+    split = text.index('}, {') + 1
+    parser = IncrementalQuestionParser()
+    assert parser.feed(text[:split - 5]) == []
+    assert parser.feed(text[split - 5:split]) == QUESTIONS[:1]
+    assert parser.feed(text[split:]) == QUESTIONS[1:]
+
+
+def test_one_character_at_a_time():
+    parser = IncrementalQuestionParser()
+    assert _feed_all(parser, json.dumps(QUESTIONS)) == QUESTIONS
+    assert parser.done
+
+
+def test_text_before_the_array_is_ignored():
+    parser = IncrementalQuestionParser()
+    text = "Here you go:\n```json\n" + json.dumps(QUESTIONS) + "\n```"
+    assert _feed_all(parser, [text[:10], text[10:]]) == QUESTIONS
+
+
+def test_text_after_the_closing_bracket_is_ignored():
+    parser = IncrementalQuestionParser()
+    assert parser.feed(json.dumps(QUESTIONS[:1]) + ' [{"type": "extra"}]') == QUESTIONS[:1]
+
+
+def test_truncated_stream_keeps_completed_objects():
+    text = json.dumps(QUESTIONS)
+    parser = IncrementalQuestionParser()
+    assert parser.feed(text[:-20]) == QUESTIONS[:1]
+    assert not parser.done
+
+
+def test_escaped_quote_at_chunk_boundary():
+    text = json.dumps(QUESTIONS[:1])
+    boundary = text.index('\\"') + 1
+    parser = IncrementalQuestionParser()
+    assert _feed_all(parser, [text[:boundary], text[boundary:]]) == QUESTIONS[:1]
@@ -0,0 +1,38 @@
+import math
+import numpy as np
+from ai.tfidf import idf, rank_terms
+
+
+def test_idf_is_smoothed():
+    assert np.allclose(idf(np.array([0.0, 9.0]), 9), [math.log(10) + 1, 1.0])
+
+
+def test_rare_terms_outrank_common_ones_at_equal_counts():
+    ranked = rank_terms([[("cell", 2), ("chlorophyll", 2)]], {"cell": 90, "chlorophyll": 1}, n_docs=100)
+    assert ranked == [["chlorophyll", "cell"]]
+
+
+def test_term_frequency_is_sublinear():
+    doc_freqs = {"common": 10, "rare": 1}
+    # log damping: ten times the occurrences is not ten times the score
+    ranked = rank_terms([[("common", 10), ("rare", 2)]], doc_freqs, n_docs=10)
+    scores = {"common": (1 + math.log(10)) * (math.log(11 / 11) + 1),
+              "rare": (1 + math.log(2)) * (math.log(11 / 2) + 1)}
+    assert ranked == [sorted(scores, key=scores.get, reverse=True)]
+
+
+def test_each_document_is_ranked_over_its_own_terms():
+    batch = [[("alpha", 3), ("beta", 1)], [], [("gamma", 1)], [("beta", 5), ("delta", 1)]]
+    ranked = rank_terms(batch, {}, n_docs=4)
+    assert ranked == [["alpha", "beta"], [], ["gamma"], ["beta", "delta"]]
+
+
+def test_top_k_limits_each_document():
+    terms = [(f"term{i}", i + 1) for i in range(20)]
+    ranked = rank_terms([terms], {}, n_docs=1, top_k=3)
+    assert ranked == [["term19", "term18", "term17"]]
+
+
+def test_empty_batches():
+    assert rank_terms([], {}, n_docs=0) == []
+    assert rank_terms([[], []], {}, n_docs=0) == [[], []]
@@ -0,0 +1,37 @@
+import json
+from datetime import datetime
+from bson.objectid import ObjectId
+
+
+class DocumentEncoder(json.JSONEncoder):
+    """JSON encoder for MongoDB documents (ObjectId and datetime values)"""
+
+    def default(self, value):
+        if isinstance(value, ObjectId):
+            return str(value)
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return super().default(value)
+
+
+def iter_json_array(documents, batch_size=16):
+    """Encode an iterable of documents as a JSON array, yielding it piece by piece.
+
+    Only ``batch_size`` encoded documents are held at a time, so large exports
+    never build the whole response in memory.
+    """
+    encoder = DocumentEncoder(separators=(',', ':'))
+    pending = []
+    first = True
+
+    yield '['
+    for document in documents:
+        pending.append(encoder.encode(document))
+        if len(pending) >= batch_size:
+            yield ('' if first else ',') + ','.join(pending)
+            first = False
+            pending = []
+
+    if pending:
+        yield ('' if first else ',') + ','.join(pending)
+    yield ']'
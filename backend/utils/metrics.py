@@ -0,0 +1,183 @@
+import threading
+import time
+from flask import g, request
+
+# Seconds; roughly 5ms to 10s covers everything from a cached read to a Gemini call
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            series = sorted(self._series.items())
+            lines.extend(self._render_series(key, value) for key, value in series)
+        return '\n'.join(line for line in lines if line)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set"""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def _render_series(self, key, value):
+        return f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _render_series(self, key, value):
+        counts, total, count = value
+        lines = [f"{self.name}_bucket{_format_labels(self.labels, key, ('le', _format_value(bound)))} {n}"
+                 for bound, n in zip(self.buckets, counts)]
+        labels = _format_labels(self.labels, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return '\n'.join(lines)
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text exposition format.
+
+    Values live in the memory of each worker process, so every worker should be
+    scraped (or the scrape pinned to one worker) when running under gunicorn.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labels != metric.labels:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram(
+    'http_request_duration_seconds', 'Time spent handling a request, by route.',
+    ('method', 'endpoint', 'status'))
+MONGO_COMMAND_DURATION = registry.histogram(
+    'mongo_command_duration_seconds', 'MongoDB command round trip time, by command.',
+    ('command', 'outcome'))
+MONGO_COMMANDS_PER_REQUEST = registry.histogram(
+    'mongo_commands_per_request', 'MongoDB commands issued while handling a request, by route.',
+    ('endpoint',), buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+MONGO_TIME_PER_REQUEST = registry.histogram(
+    'mongo_request_time_seconds', 'Total MongoDB time while handling a request, by route.',
+    ('endpoint',))
+
+# Mongo activity of the request running on this thread
+_request_scope = threading.local()
+
+
+def record_mongo_command(command, duration, failed=False):
+    """Called by the pymongo command listener on the thread that ran the command"""
+    MONGO_COMMAND_DURATION.observe(duration, command=command, outcome='failure' if failed else 'success')
+    totals = getattr(_request_scope, 'totals', None)
+    if totals is not None:
+        totals[0] += 1
+        totals[1] += duration
+
+
+def configure_metrics(app):
+    """Time every request and attribute the Mongo commands it runs to its route"""
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        _request_scope.totals = [0, 0.0]
+
+    @app.after_request
+    def finish_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        totals = getattr(_request_scope, 'totals', None)
+        _request_scope.totals = None
+        if started is None:
+            return response
+
+        # Unmatched URLs share one label so scanners cannot blow up the series count
+        endpoint = request.endpoint or 'unmatched'
+        REQUEST_DURATION.observe(time.perf_counter() - started, method=request.method,
+                                 endpoint=endpoint, status=response.status_code)
+        if totals is not None:
+            MONGO_COMMANDS_PER_REQUEST.observe(totals[0], endpoint=endpoint)
+            MONGO_TIME_PER_REQUEST.observe(totals[1], endpoint=endpoint)
+            # Picked up by the access log record
+            g.mongo_commands = totals[0]
+            g.mongo_time_ms = round(totals[1] * 1000, 2)
+        return response
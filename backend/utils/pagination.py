@@ -0,0 +1,133 @@
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from bson.objectid import ObjectId
+from config import Config
+
+# Listing order shared by page and cursor modes; _id breaks created_at ties
+LISTING_SORT = [("created_at", -1), ("_id", -1)]
+
+TOTAL_MODES = ('exact', 'cached', 'none')
+
+# (collection name, filter) -> (expires_at, count)
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+
+def encode_cursor(document):
+    """Build an opaque cursor pointing just past a document in LISTING_SORT order"""
+    payload = json.dumps({"t": document['created_at'].isoformat(), "id": str(document['_id'])})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor into (created_at, ObjectId); raises ValueError if malformed"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        created_at = datetime.fromisoformat(payload['t'])
+        object_id = ObjectId(payload['id'])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return created_at, object_id
+
+
+class PageRequest:
+    """Pagination parameters parsed from the query string.
+
+    Page mode (``?page=&limit=``) keeps the original offset behaviour. Cursor mode
+    is selected by passing ``cursor`` (empty for the first page) and seeks on
+    ``(created_at, _id)`` instead of skipping. ``total`` chooses how the total is
+    computed: ``exact`` (default in page mode), ``cached`` or ``none`` (default in
+    cursor mode).
+    """
+
+    def __init__(self, args, default_limit=10):
+        self.cursor_mode = 'cursor' in args
+        self.limit = min(max(int(args.get('limit', default_limit)), 1), Config.PAGINATION_MAX_LIMIT)
+        self.page = max(int(args.get('page', 1)), 1)
+        self.cursor = None
+        self.next_cursor = None
+
+        if self.cursor_mode and args.get('cursor'):
+            self.cursor = decode_cursor(args['cursor'])
+
+        self.total_mode = args.get('total', 'none' if self.cursor_mode else 'exact')
+        if self.total_mode not in TOTAL_MODES:
+            raise ValueError(f"total must be one of: {', '.join(TOTAL_MODES)}")
+
+    @property
+    def skip(self):
+        return 0 if self.cursor_mode else (self.page - 1) * self.limit
+
+    @property
+    def fetch_limit(self):
+        """Fetch one extra document in cursor mode to know whether another page exists"""
+        return self.limit + 1 if self.cursor_mode else self.limit
+
+    def apply(self, query_filter):
+        """Return the filter restricted to documents after the cursor"""
+        if not self.cursor:
+            return query_filter
+
+        created_at, object_id = self.cursor
+        return {"$and": [query_filter, {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": object_id}}
+        ]}]}
+
+    def finish(self, documents):
+        """Trim the look-ahead document and remember the cursor for the next page"""
+        documents = list(documents)
+        if self.cursor_mode and len(documents) > self.limit:
+            documents = documents[:self.limit]
+            self.next_cursor = encode_cursor(documents[-1])
+        return documents
+
+    def count(self, collection, query_filter):
+        """Count matching documents according to the requested total mode"""
+        if self.total_mode == 'none':
+            return None
+        if self.total_mode == 'exact':
+            return collection.count_documents(query_filter)
+        return cached_count(collection, query_filter)
+
+    def to_dict(self, total):
+        """Pagination block for the response"""
+        if self.cursor_mode:
+            return {
+                "limit": self.limit,
+                "next_cursor": self.next_cursor,
+                "has_more": self.next_cursor is not None,
+                "total": total
+            }
+
+        return {
+            "total": total,
+            "page": self.page,
+            "limit": self.limit,
+            "pages": (total + self.limit - 1) // self.limit if total is not None else None
+        }
+
+
+def cached_count(collection, query_filter):
+    """count_documents with a short-lived per-process cache"""
+    key = (collection.name, json.dumps(query_filter, sort_keys=True, default=str))
+    now = time.monotonic()
+
+    with _count_cache_lock:
+        entry = _count_cache.get(key)
+        if entry and entry[0] > now:
+            return entry[1]
+
+    total = collection.count_documents(query_filter)
+
+    with _count_cache_lock:
+        # Keep the cache from growing without bound
+        if len(_count_cache) >= Config.PAGINATION_COUNT_CACHE_SIZE:
+            _count_cache.clear()
+        _count_cache[key] = (now + Config.PAGINATION_COUNT_CACHE_SECONDS, total)
+
+    return total
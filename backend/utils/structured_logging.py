@@ -0,0 +1,166 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+
+REDACTED = '[REDACTED]'
+SENSITIVE_HEADERS = {'authorization', 'cookie', 'set-cookie', 'x-api-key', 'x-goog-api-key'}
+SENSITIVE_FIELDS = {'password', 'access_token', 'token'}
+
+# Accept client-supplied request ids only if they look like ids
+REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'request_id'}
+
+
+def redact_headers(headers):
+    """Copy of request headers with credentials masked"""
+    return {name: REDACTED if name.lower() in SENSITIVE_HEADERS else value
+            for name, value in headers.items()}
+
+
+def redact_payload(payload):
+    """Copy of a JSON body with password/token fields masked (top level)"""
+    if not isinstance(payload, dict):
+        return payload
+    return {key: REDACTED if key.lower() in SENSITIVE_FIELDS else value
+            for key, value in payload.items()}
+
+
+def log_request_payload(logger, message, payload=None):
+    """Debug dump of the current request; costs nothing unless DEBUG is enabled"""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(message, extra={
+            "headers": redact_headers(request.headers),
+            "payload": redact_payload(payload)
+        })
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the request id and any ``extra`` fields"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if getattr(record, 'request_id', None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records logged during a request with its id"""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller and writes on a background listener thread.
+
+    The queue and listener are created per process so forked workers get their
+    own thread. Records are dropped (and counted) when the queue is full.
+    """
+
+    def __init__(self, target, max_size=10000):
+        super().__init__(queue.Queue(max_size))
+        self.target = target
+        self.max_size = max_size
+        self.dropped = 0
+        self._pid = None
+        self._listener = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._start_lock:
+            if self._pid != pid:
+                self.queue = queue.Queue(self.max_size)
+                self._listener = QueueListener(self.queue, self.target, respect_handler_level=True)
+                self._listener.start()
+                self._pid = pid
+
+    def prepare(self, record):
+        # Merge args now (they may change later) but leave JSON encoding to the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        self._ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        if self._listener and self._pid == os.getpid():
+            self._listener.stop()
+            self._pid = None
+
+
+def configure_logging(app, level='INFO', queue_size=10000, sample_rate=1.0, slow_request_ms=1000):
+    """Route all logging through a non-blocking JSON handler and log each request"""
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter())
+
+    handler = NonBlockingQueueHandler(stream, queue_size)
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+    atexit.register(handler.stop)
+
+    access_logger = logging.getLogger('access')
+
+    @app.before_request
+    def start_request_log():
+        incoming = request.headers.get('X-Request-ID', '')
+        g.request_id = incoming if REQUEST_ID_PATTERN.match(incoming) else uuid.uuid4().hex
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def finish_request_log(response):
+        duration_ms = (time.perf_counter() - g.get('request_started', time.perf_counter())) * 1000
+        response.headers['X-Request-ID'] = g.get('request_id', '')
+
+        # Errors and slow requests are always logged; the rest are sampled
+        if response.status_code >= 500 or duration_ms >= slow_request_ms or random.random() < sample_rate:
+            access_logger.info("request", extra={
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "duration_ms": round(duration_ms, 2),
+                "mongo_commands": g.get('mongo_commands'),
+                "mongo_time_ms": g.get('mongo_time_ms')
+            })
+        return response
+
+    return handler
@@ -3,6 +3,13 @@ import { useNavigate } from 'react-router-dom';
 import api from '../../services/api';
 import './Quizzes.css';
 
+// Short long-polls keep request workers free; the pause between polls backs off
+const JOB_WAIT_SECONDS = 5;
+const POLL_DELAY_MS = 500;
+const MAX_POLL_DELAY_MS = 4000;
+
+const sleep = (ms) => new Promise(resolve => setTimeout(resolve, ms));
+
 const GenerateQuiz = () => {
   const [materials, setMaterials] = useState([]);
   const [selectedMaterialId, setSelectedMaterialId] = useState('');
@@ -55,7 +62,24 @@ const GenerateQuiz = () => {
       };
       
       const response = await api.post('/quizzes/generate', quizData);
-      navigate(`/quizzes/${response.data.quiz_id}`);
+      
+      // Generation runs in the background; poll the job until the quiz exists
+      let job = { status: response.data.status };
+      let delay = POLL_DELAY_MS;
+      while (job.status === 'queued' || job.status === 'running') {
+        const jobResponse = await api.get(`/quizzes/jobs/${response.data.job_id}?wait=${JOB_WAIT_SECONDS}`);
+        job = jobResponse.data;
+        if (job.status === 'queued' || job.status === 'running') {
+          await sleep(delay);
+          delay = Math.min(delay * 2, MAX_POLL_DELAY_MS);
+        }
+      }
+      
+      if (job.status !== 'completed') {
+        throw new Error(job.error || 'Failed to generate quiz');
+      }
+      
+      navigate(`/quizzes/${job.result.quiz_id}`);
     } catch (err) {
       setError(err.response?.data?.error || err.message || 'Failed to generate quiz');
     } finally {